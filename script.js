@@ -42,6 +42,10 @@ function buildProjectCard(project) {
     statusText.className = "status-text";
     statusText.textContent = "Not started";
 
+    const failure = document.createElement("div");
+    failure.className = "failure";
+    failure.hidden = true;
+
     const progressLabel = document.createElement("div");
     progressLabel.className = "progress-label";
     progressLabel.innerHTML = `<span><i class="fas fa-tasks"></i> Progress</span><span>0%</span>`;
@@ -59,6 +63,7 @@ function buildProjectCard(project) {
     const buildBtn = document.createElement("button");
     buildBtn.className = "btn";
     buildBtn.innerHTML = `<i class="fas fa-play"></i> Start build`;
+    buildBtn.title = "Shift+click to rebuild even if nothing changed";
 
     const deployBtn = document.createElement("button");
     deployBtn.className = "btn secondary";
@@ -76,7 +81,7 @@ function buildProjectCard(project) {
     viewLogsBtn.className = "btn secondary view-logs-btn";
     viewLogsBtn.innerHTML = `<i class="fas fa-file-alt"></i> View Logs`;
     viewLogsBtn.style.display = "none";
-    viewLogsBtn.addEventListener("click", () => showLogs(project));
+    viewLogsBtn.addEventListener("click", () => showLogs(project, projectElements.get(project).logDevice));
 
     actions.appendChild(buildBtn);
     actions.appendChild(deployBtn);
@@ -84,19 +89,21 @@ function buildProjectCard(project) {
 
     card.appendChild(header);
     card.appendChild(statusText);
+    card.appendChild(failure);
     card.appendChild(progressLabel);
     card.appendChild(progress);
     card.appendChild(actions);
     card.appendChild(artifact);
     card.appendChild(viewLogsBtn);
 
-    buildBtn.addEventListener("click", () => startBuild(project, buildBtn));
-    deployBtn.addEventListener("click", () => deployProject(project, deployBtn));
+    buildBtn.addEventListener("click", (event) => startBuild(project, buildBtn, event.shiftKey));
+    deployBtn.addEventListener("click", (event) => deployProject(project, deployBtn, event.shiftKey));
     cleanBtn.addEventListener("click", () => cleanCache(project, cleanBtn));
 
     projectElements.set(project, {
         pill,
         statusText,
+        failure,
         progressLabel,
         progressBar,
         buildBtn,
@@ -112,6 +119,9 @@ function buildProjectCard(project) {
 function updateProjectStatus(project, data) {
     const refs = projectElements.get(project);
     if (!refs) return;
+    // Pushed events and polled snapshots can arrive out of order
+    if (data.version !== undefined && refs.version !== undefined && data.version < refs.version) return;
+    refs.version = data.version;
 
     const status = data.status || "not_started";
     refs.statusText.textContent = titleize(status);
@@ -137,8 +147,12 @@ function updateProjectStatus(project, data) {
     refs.deployBtn.disabled = isRunning;
     refs.cleanBtn.disabled = isRunning;
 
-    // Show view logs button when there's an error
-    if (status === "error") {
+    // Deploys log per device: show the deployed device's log, or the first one that failed
+    const failedDevice = Object.entries(data.devices || {}).find(([, device]) => device.state === "error");
+    refs.logDevice = data.log_device || (failedDevice ? failedDevice[0] : null);
+
+    // Show view logs button when there's an error, or to follow a running build
+    if (status === "error" || status === "building" || status === "cleaning") {
         refs.viewLogsBtn.style.display = "block";
     } else {
         refs.viewLogsBtn.style.display = "none";
@@ -151,6 +165,48 @@ function updateProjectStatus(project, data) {
     if (data.message) {
         refs.statusText.textContent = `${titleize(status)} - ${data.message}`;
     }
+    if (data.warm_daemon !== undefined) {
+        refs.statusText.textContent += data.warm_daemon ? " (warm Gradle daemon)" : " (cold Gradle daemon start)";
+    }
+    if (data.devices) {
+        const devices = Object.values(data.devices).map((device) => `${device.name}: ${titleize(device.state)}`);
+        refs.statusText.textContent += ` (${devices.join(", ")})`;
+    }
+    showFailure(refs.failure, data.failure);
+}
+
+// Render the failing task and first errors of a failed build
+function showFailure(element, failure) {
+    element.textContent = "";
+    element.hidden = !failure;
+    if (!failure) return;
+
+    const heading = document.createElement("div");
+    heading.className = "failure-heading";
+    heading.textContent = failure.task ? `Failed task ${failure.task}` : (failure.headline || "Build failed");
+    element.appendChild(heading);
+
+    const errors = failure.errors.slice(0, 5);
+    errors.forEach((error) => {
+        const line = document.createElement("div");
+        line.className = "failure-error";
+        const location = error.file ? `${error.file.split("/").pop()}:${error.line}: ` : "";
+        line.textContent = `${location}${error.message}`;
+        line.title = error.file ? `${error.file}:${error.line}` : error.kind;
+        element.appendChild(line);
+    });
+    if (!errors.length && failure.task && failure.headline) {
+        const line = document.createElement("div");
+        line.className = "failure-error";
+        line.textContent = failure.headline;
+        element.appendChild(line);
+    }
+    if (failure.error_count > errors.length) {
+        const more = document.createElement("div");
+        more.className = "failure-more";
+        more.textContent = `and ${failure.error_count - errors.length} more`;
+        element.appendChild(more);
+    }
 }
 
 function fetchProjects() {
@@ -188,11 +244,48 @@ function updateStatusForProject(project) {
 }
 
 function updateAllStatuses() {
-    const projects = Array.from(projectElements.keys());
-    return Promise.all(projects.map(updateStatusForProject));
+    // One bulk request; the browser revalidates it with If-None-Match
+    return fetch("/api/status")
+        .then((response) => response.json())
+        .then((data) => {
+            const statuses = data.statuses || {};
+            Object.keys(statuses).forEach((project) => updateProjectStatus(project, statuses[project]));
+        })
+        .catch((error) => console.error("Error fetching statuses:", error));
+}
+
+// Status updates are pushed over /api/events; polling only runs while the
+// stream is unavailable.
+let statusEventsConnected = false;
+
+function subscribeStatusEvents() {
+    if (!window.EventSource) return;
+    const events = new EventSource("/api/events");
+    events.addEventListener("open", () => {
+        statusEventsConnected = true;
+        // Catch up on anything that changed while disconnected
+        updateAllStatuses();
+    });
+    events.addEventListener("status", (event) => {
+        const data = JSON.parse(event.data);
+        updateProjectStatus(data.project, data);
+    });
+    events.addEventListener("error", () => {
+        statusEventsConnected = false;
+        // The browser retries on its own unless the server refused the stream
+        if (events.readyState === EventSource.CLOSED) {
+            setTimeout(subscribeStatusEvents, 30000);
+        }
+    });
+}
+
+function pollStatusesIfDisconnected() {
+    if (!statusEventsConnected) {
+        updateAllStatuses();
+    }
 }
 
-function startBuild(project, button) {
+function startBuild(project, button, force = false) {
     button.disabled = true;
     fetch("/api/start-build", {
         method: "POST",
@@ -202,6 +295,7 @@ function startBuild(project, button) {
         body: JSON.stringify({
             project,
             build_type: buildTypeSelect.value,
+            force,
         }),
     })
         .then((response) => response.json())
@@ -212,17 +306,21 @@ function startBuild(project, button) {
         });
 }
 
-function deployProject(project, button) {
+function deployProject(project, button, allDevices = false) {
     button.disabled = true;
+    const payload = {
+        project,
+        build_type: buildTypeSelect.value,
+    };
+    if (allDevices) {
+        payload.devices = "all";
+    }
     fetch("/api/deploy", {
         method: "POST",
         headers: {
             "Content-Type": "application/json",
         },
-        body: JSON.stringify({
-            project,
-            build_type: buildTypeSelect.value,
-        }),
+        body: JSON.stringify(payload),
     })
         .then((response) => response.json())
         .then(() => updateStatusForProject(project))
@@ -265,6 +363,9 @@ function loadDevice() {
                 const option = document.createElement("option");
                 option.value = device.id;
                 option.textContent = `${device.name} (${device.address})`;
+                if (device.health && device.health.state !== "unknown") {
+                    option.textContent += ` - ${device.health.state}`;
+                }
                 if (device.id === selected) {
                     option.selected = true;
                 }
@@ -394,36 +495,71 @@ function closeAddDeviceModal() {
     modal.classList.remove("active");
 }
 
-function showLogs(project) {
+// Bumped whenever the logs modal is opened or closed, so stale follow loops stop
+let logsSession = 0;
+
+function showLogs(project, device) {
     const modal = document.getElementById("logs-modal");
     const modalContent = document.getElementById("modal-logs-content");
+    const session = ++logsSession;
+    let offset = 0;
+    let logId = "";
     
     modal.classList.add("active");
     modalContent.textContent = "Loading logs...";
-    
-    fetch(`/api/logs?project=${encodeURIComponent(project)}`)
-        .then((response) => {
-            if (!response.ok) {
-                return response.json().then((data) => {
-                    throw new Error(data.error || "Failed to load logs");
-                });
-            }
-            return response.json();
-        })
-        .then((data) => {
-            modalContent.textContent = data.logs || "No logs available.";
-        })
-        .catch((error) => {
-            modalContent.textContent = `Error: ${error.message}`;
-        });
+
+    // Fetch only what was appended since the last request; while the job is
+    // still running the server holds the request until new output arrives
+    const follow = (wait) => {
+        if (session !== logsSession) return;
+        const params = new URLSearchParams({ project, since: offset, wait });
+        if (device) params.set("device", device);
+        if (logId) params.set("log", logId);
+        fetch(`/api/logs?${params}`)
+            .then((response) => {
+                if (!response.ok) {
+                    return response.json().then((data) => {
+                        throw new Error(data.error || "Failed to load logs");
+                    });
+                }
+                return response.json();
+            })
+            .then((data) => {
+                if (session !== logsSession) return;
+                if (offset === 0 || data.reset) modalContent.textContent = "";
+                const atBottom = modalContent.scrollTop + modalContent.clientHeight >= modalContent.scrollHeight - 4;
+                if (data.data) modalContent.appendChild(document.createTextNode(data.data));
+                if (atBottom) modalContent.scrollTop = modalContent.scrollHeight;
+                const more = data.offset > offset || data.reset;
+                offset = data.offset;
+                logId = data.log_id;
+                if (!modalContent.textContent && !data.running) {
+                    modalContent.textContent = "No logs available.";
+                }
+                // A busy server answers at once instead of waiting; poll again a little later
+                if (data.running && !more) setTimeout(() => follow(20), 2000);
+                else if (data.running || more) follow(data.running ? 20 : 0);
+            })
+            .catch((error) => {
+                if (session !== logsSession) return;
+                modalContent.textContent = `Error: ${error.message}`;
+            });
+    };
+    follow(0);
 }
 
 function closeLogsModal() {
+    logsSession++;
     const modal = document.getElementById("logs-modal");
     modal.classList.remove("active");
 }
 
-refreshBtn.addEventListener("click", fetchProjects);
+refreshBtn.addEventListener("click", () => {
+    // Ask the server to rescan the projects directory before reloading the list
+    fetch("/api/projects/rescan", { method: "POST" })
+        .catch((error) => console.error("Error rescanning projects:", error))
+        .finally(fetchProjects);
+});
 deviceAddBtn.addEventListener("click", addDevice);
 deviceRemoveBtn.addEventListener("click", removeDevice);
 deviceSelect.addEventListener("change", (e) => {
@@ -623,4 +759,5 @@ document.getElementById("pairing-code").addEventListener("keypress", (e) => {
 
 fetchProjects();
 loadDevice();
-setInterval(updateAllStatuses, 5000);
+subscribeStatusEvents();
+setInterval(pollStatusesIfDisconnected, 5000);
@@ -1,15 +1,34 @@
 
+import bisect
+import collections
+import gzip
+import hashlib
+import heapq
 import http.server
+import itertools
+import socket
 import socketserver
 import json
 import subprocess
 import logging
 import os
+import queue
+import re
+import signal
+import sqlite3
 import threading
 import time
+import secrets
+import shlex
 import shutil
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
 from pathlib import Path
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, unquote
 from http import HTTPStatus
 
 logging.basicConfig(filename='server.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,8 +38,92 @@ STATUS_DIR = Path("status")
 ARTIFACT_DIR = Path("artifacts")
 LOGS_DIR = Path("logs")
 DEVICE_FILE = Path("device.json")
+# Dashboard files served from memory; nothing else in this directory is exposed
+STATIC_DIR = Path(__file__).resolve().parent
+BUILD_CACHE_DIR = Path("build-cache")
+GRADLE_INIT_DIR = Path("gradle-init")
 BUILD_LOCK = threading.Lock()
 ACTIVE_BUILDS = {}
+# Lines of command output kept in memory while streaming the rest to disk
+LOG_TAIL_LINES = 2000
+# Longest piece of a single output line read at once
+LOG_READ_CHUNK = 64 * 1024
+# Lines returned by a paged /api/logs request by default and at most
+LOG_PAGE_LINES = 1000
+MAX_LOG_PAGE_LINES = 10000
+# Bytes returned by one /api/logs?since= request, and longest wait for new output
+LOG_DELTA_BYTES = 1024 * 1024
+MAX_LOG_WAIT = 25
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment, falling back to default."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        logging.warning("Ignoring invalid value for %s", name)
+        return default
+
+
+def default_build_concurrency(memory_per_build_mb):
+    """Pick a build concurrency limit from CPU count and physical memory."""
+    limit = max(1, (os.cpu_count() or 1) // 2)
+    try:
+        total_mb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return limit
+    return max(1, min(limit, total_mb // memory_per_build_mb))
+
+
+# Gradle jobs (builds and cleans) allowed to run at once; the rest are queued
+BUILD_MEMORY_MB = _env_int("BUILD_SERVER_BUILD_MEMORY_MB", 4096)
+MAX_CONCURRENT_BUILDS = _env_int("BUILD_SERVER_MAX_BUILDS", 0) or default_build_concurrency(BUILD_MEMORY_MB)
+
+# Idle Gradle daemons kept alive across builds; least recently used are stopped first
+MAX_IDLE_DAEMONS = _env_int("BUILD_SERVER_MAX_IDLE_DAEMONS", 4)
+DAEMON_IDLE_TIMEOUT = _env_int("BUILD_SERVER_DAEMON_IDLE_TIMEOUT", 3600)
+
+# Shared Gradle remote build cache served at /cache/
+BUILD_CACHE_ENABLED = _env_int("BUILD_SERVER_BUILD_CACHE", 1) != 0
+BUILD_CACHE_MAX_MB = _env_int("BUILD_SERVER_BUILD_CACHE_MAX_MB", 10240)
+BUILD_CACHE_MAX_ENTRY_MB = _env_int("BUILD_SERVER_BUILD_CACHE_MAX_ENTRY_MB", 256)
+
+# Seconds before the project list is rescanned even if the projects directory looks unchanged
+PROJECT_RESCAN_INTERVAL = _env_int("BUILD_SERVER_PROJECT_RESCAN_INTERVAL", 300)
+
+# Artifacts kept per project unless the project sets its own retention
+ARTIFACT_RETENTION = _env_int("BUILD_SERVER_ARTIFACT_RETENTION", 10)
+
+# Total size of archived job logs (compressed); the oldest logs are removed first
+LOG_RETENTION_MB = _env_int("BUILD_SERVER_LOG_RETENTION_MB", 2048)
+
+# Module whose APK is published and deployed when a build produces several
+APP_MODULE = os.environ.get("BUILD_SERVER_APP_MODULE", ":app")
+
+# Devices installed to at once by a multi-device deploy
+DEPLOY_WORKERS = _env_int("BUILD_SERVER_DEPLOY_WORKERS", 8)
+
+# HTTP serving limits
+HTTP_WORKERS = _env_int("BUILD_SERVER_WORKERS", 32)
+MAX_INFLIGHT_REQUESTS = _env_int("BUILD_SERVER_MAX_INFLIGHT", 96)
+REQUEST_TIMEOUT = _env_int("BUILD_SERVER_REQUEST_TIMEOUT", 60)
+# Each open /api/events stream holds a worker, so keep them (and log waiters) below HTTP_WORKERS
+MAX_EVENT_STREAMS = _env_int("BUILD_SERVER_MAX_EVENT_STREAMS", 16)
+# Likewise for /api/logs requests waiting for a running job's output
+MAX_LOG_WAITERS = _env_int("BUILD_SERVER_MAX_LOG_WAITERS", 8)
+EVENT_KEEPALIVE = 15
+# Seconds between write-behind flushes of status files
+STATUS_FLUSH_INTERVAL = 0.5
+
+# Port of the local ADB server (same variable the adb CLI reads)
+ADB_SERVER_PORT = _env_int("ANDROID_ADB_SERVER_PORT", 5037)
+ADB_TIMEOUT = 30
+ADB_INSTALL_TIMEOUT = 600
+# Configured devices are reconnected and checked this often (seconds); failing
+# devices back off up to DEVICE_MAX_BACKOFF
+DEVICE_CHECK_INTERVAL = _env_int("BUILD_SERVER_DEVICE_CHECK_INTERVAL", 15)
+DEVICE_MAX_BACKOFF = _env_int("BUILD_SERVER_DEVICE_MAX_BACKOFF", 300)
+DEVICE_CONNECT_TIMEOUT = 10
 
 # Android SDK environment
 ANDROID_HOME = "/home/android/sdk"
@@ -67,7 +170,7 @@ def load_device():
         return {"devices": [], "selected": None}
 
 
-def save_device(address=None, device_id=None, device_name=None, selected_id=None):
+def save_device(address=None, device_id=None, device_name=None, selected_id=None, group=None):
     """Save device configuration. Can add/update a device or set selected device."""
     try:
         data = load_device()
@@ -85,12 +188,20 @@ def save_device(address=None, device_id=None, device_name=None, selected_id=None
                 devices[device_index]["address"] = address
                 if device_name:
                     devices[device_index]["name"] = device_name
+                if group is not None:
+                    if group:
+                        devices[device_index]["group"] = group
+                    else:
+                        devices[device_index].pop("group", None)
                 logging.info(f"Updated device {device_id}: {device_name} at {address}")
             else:
                 # Add new device
                 if not device_name:
                     device_name = f"Device {device_id}"
-                devices.append({"id": device_id, "name": device_name, "address": address})
+                device = {"id": device_id, "name": device_name, "address": address}
+                if group:
+                    device["group"] = group
+                devices.append(device)
                 logging.info(f"Adding new device {device_id}: {device_name} at {address}")
             data["devices"] = devices
             # Auto-select if no device is selected
@@ -141,6 +252,19 @@ def get_selected_device_address():
     return device["address"] if device else None
 
 
+def select_devices(target):
+    """Return the configured devices a deploy targets.
+
+    ``target`` is ``"all"``, a group name, or a list of device ids.
+    """
+    devices = load_device().get("devices", [])
+    if target == "all":
+        return devices
+    if isinstance(target, list):
+        return [d for d in devices if d["id"] in target]
+    return [d for d in devices if d.get("group") == target]
+
+
 def remove_device(device_id):
     """Remove a device from the configuration."""
     data = load_device()
@@ -175,8 +299,7 @@ def status_path(project_name):
     return STATUS_DIR / f"{project_name}.json"
 
 
-def load_status(project_name):
-    path = status_path(project_name)
+def _read_status_file(path):
     if not path.exists():
         return {"status": "not_started", "progress": 0}
     try:
@@ -186,7 +309,124 @@ def load_status(project_name):
         return {"status": "unknown", "progress": 0}
 
 
-def write_status(project_name, status, progress, message=None, artifact=None):
+class StatusStore:
+    """Process-wide status store with write-behind persistence.
+
+    Reads are served from memory; each status file is read at most once.
+    Every write bumps the entry's per-project ``version`` (continued from
+    disk across restarts) and the store-wide ``version`` used for bulk
+    ETags. Files are replaced atomically via a temp file and rename.
+    Until start() is called writes go straight to disk; afterwards a
+    background thread flushes changed entries every ``interval`` seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._entries = {}
+        self._dirty = {}
+        self._stop = threading.Event()
+        self._writer = None
+        self.version = 0
+
+    def get(self, project_name):
+        # Keyed by path so a different STATUS_DIR never sees stale entries
+        path = status_path(project_name)
+        key = str(path)
+        with self._lock:
+            status = self._entries.get(key)
+        if status is None:
+            loaded = _read_status_file(path)
+            with self._lock:
+                status = self._entries.setdefault(key, loaded)
+        return dict(status)
+
+    def put(self, project_name, payload):
+        """Store a new status for a project and return it with its version."""
+        path = status_path(project_name)
+        key = str(path)
+        current = self.get(project_name)
+        with self._lock:
+            current = self._entries.get(key, current)
+            entry = dict(payload, version=current.get("version", 0) + 1)
+            self._entries[key] = entry
+            self.version += 1
+            write_behind = self._writer is not None
+            if write_behind:
+                self._dirty[key] = path
+        if not write_behind:
+            self._persist(key, path)
+        return dict(entry)
+
+    def snapshot(self, projects):
+        """Return ``{project: status}`` for the given projects."""
+        return {project: self.get(project) for project in projects}
+
+    def flush(self):
+        """Write every changed entry to disk."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        for key, path in dirty.items():
+            try:
+                self._persist(key, path)
+            except OSError as e:
+                logging.error("Error writing status file %s: %s", path, e)
+                with self._lock:
+                    self._dirty.setdefault(key, path)
+
+    def start(self, interval=None):
+        """Switch to write-behind persistence."""
+        if self._writer is not None:
+            return
+        interval = interval or STATUS_FLUSH_INTERVAL
+        self._stop.clear()
+        self._writer = threading.Thread(
+            target=self._write_behind, args=(interval,), name="status-writer", daemon=True
+        )
+        self._writer.start()
+
+    def stop(self):
+        """Stop the background writer and flush anything still pending."""
+        writer = self._writer
+        if writer is not None:
+            self._stop.set()
+            writer.join()
+            self._writer = None
+        self.flush()
+
+    def _write_behind(self, interval):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def _persist(self, key, path):
+        # Always write the latest entry so concurrent writers can't leave an
+        # older status on disk than the one in memory.
+        with self._io_lock:
+            with self._lock:
+                payload = self._entries[key]
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            with tmp_path.open("w") as f:
+                json.dump(payload, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+
+STATUS_STORE = StatusStore()
+# Distinguishes ETags issued by different server processes
+STATUS_BOOT_ID = format(int(time.time() * 1000), "x")
+
+
+def load_status(project_name):
+    return STATUS_STORE.get(project_name)
+
+
+def status_snapshot_etag(version, projects):
+    projects_crc = zlib.crc32(",".join(projects).encode())
+    return f'"{STATUS_BOOT_ID}-{version}-{projects_crc:08x}"'
+
+
+def write_status(project_name, status, progress, message=None, artifact=None, **fields):
     payload = {
         "project": project_name,
         "status": status,
@@ -197,27 +437,441 @@ def write_status(project_name, status, progress, message=None, artifact=None):
         payload["message"] = message
     if artifact:
         payload["artifact"] = artifact
-    path = status_path(project_name)
-    with path.open("w") as f:
-        json.dump(payload, f)
+    payload.update(fields)
+    payload = STATUS_STORE.put(project_name, payload)
+    STATUS_EVENTS.publish(payload)
+
+
+class StatusEvents:
+    """Fan out status updates to connected /api/events clients.
+
+    Every subscriber gets its own bounded queue. A client that falls too far
+    behind is disconnected so that it reconnects and resyncs instead of
+    holding an ever-growing backlog.
+    """
+
+    def __init__(self, max_streams=None, max_queued=256):
+        self.max_streams = max_streams or MAX_EVENT_STREAMS
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self):
+        """Register a new stream; returns None when the stream limit is reached."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_streams:
+                return None
+            subscription = queue.Queue(maxsize=self.max_queued)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, payload):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(payload)
+            except queue.Full:
+                logging.warning("Dropping slow event stream subscriber")
+                self.unsubscribe(subscription)
+                self._end(subscription)
+
+    def close(self):
+        """End every open stream (used on shutdown)."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscription in subscribers:
+            self._end(subscription)
+
+    @staticmethod
+    def _end(subscription):
+        # Make room for the end-of-stream marker if the queue is full
+        while True:
+            try:
+                subscription.put_nowait(None)
+                return
+            except queue.Full:
+                try:
+                    subscription.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+STATUS_EVENTS = StatusEvents()
+
+
+class Metrics:
+    """In-process histograms rendered in the Prometheus text format.
+
+    Each histogram is keyed by its sorted label set; observations only
+    touch a few counters under a lock, so they are cheap enough for the
+    request path.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+    HISTOGRAMS = {
+        "build_server_phase_duration_seconds": "Duration of build, deploy and clean pipeline phases.",
+        "build_server_queue_wait_seconds": "Time scheduled jobs waited for a build slot.",
+        "build_server_http_request_duration_seconds": "HTTP request latency per route.",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {name: {} for name in self.HISTOGRAMS}
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series[name].get(key)
+            if series is None:
+                series = self._series[name][key] = {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def phases(self, job, project_name):
+        return PhaseTimer(self, job, project_name)
+
+    @staticmethod
+    def _labels(pairs):
+        escaped = (
+            (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in pairs
+        )
+        return ",".join(f'{name}="{value}"' for name, value in escaped)
+
+    def render(self, gauges=()):
+        """Return the metrics text; ``gauges`` is ``[(name, help, value)]``."""
+        lines = []
+        with self._lock:
+            for name, help_text in self.HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, series in sorted(self._series[name].items()):
+                    for bound, count in zip(self.BUCKETS, series["buckets"]):
+                        lines.append(f"{name}_bucket{{{self._labels(key + (('le', bound),))}}} {count}")
+                    lines.append(f"{name}_bucket{{{self._labels(key + (('le', '+Inf'),))}}} {series['count']}")
+                    lines.append(f"{name}_sum{{{self._labels(key)}}} {series['sum']:.6f}")
+                    lines.append(f"{name}_count{{{self._labels(key)}}} {series['count']}")
+        for name, help_text, value in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class PhaseTimer:
+    """Times the consecutive phases of one job.
+
+    ``start(phase)`` ends the running phase and begins the next one;
+    ``finish()`` ends the last phase and records the job's total time.
+    """
+
+    def __init__(self, metrics, job, project_name):
+        self.metrics = metrics
+        self.labels = {"job": job, "project": project_name}
+        self.started = time.monotonic()
+        self._phase = None
+        self._phase_started = None
+
+    def start(self, phase):
+        now = time.monotonic()
+        self._end(now)
+        self._phase, self._phase_started = phase, now
+
+    def _end(self, now):
+        if self._phase is not None:
+            self.metrics.observe("build_server_phase_duration_seconds", now - self._phase_started,
+                                 phase=self._phase, **self.labels)
+            self._phase = None
+
+    def finish(self):
+        now = time.monotonic()
+        self._end(now)
+        self.metrics.observe("build_server_phase_duration_seconds", now - self.started,
+                             phase="total", **self.labels)
+
+
+METRICS = Metrics()
+
+
+def settings_modules(project_dir):
+    """Return the modules included by settings.gradle(.kts), e.g. ``[":app"]``."""
+    modules = []
+    for name in ("settings.gradle", "settings.gradle.kts"):
+        try:
+            text = (project_dir / name).read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+        for line in text.splitlines():
+            if line.strip().startswith("include"):
+                for module in re.findall(r"""["'](:?[\w.\-:]+)["']""", line):
+                    module = module if module.startswith(":") else f":{module}"
+                    if module not in modules:
+                        modules.append(module)
+    return modules
+
+
+class ProjectIndex:
+    """Cached list of projects under BASE_PROJECT_DIR with per-project metadata.
+
+    The projects directory is rescanned when its mtime changes (a project was
+    added, removed or renamed), every ``rescan_interval`` seconds, or on
+    request. Once start() is called the interval rescan runs on a background
+    thread, so requests only stat the projects directory; scans build the new
+    list without holding the lock readers take. Metadata is re-read only for
+    projects whose settings or wrapper files changed since the last scan.
+    """
+
+    METADATA_FILES = (
+        "settings.gradle",
+        "settings.gradle.kts",
+        "gradle/wrapper/gradle-wrapper.properties",
+    )
+
+    def __init__(self, rescan_interval=None):
+        self.rescan_interval = rescan_interval or PROJECT_RESCAN_INTERVAL
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._base = None
+        self._base_mtime = None
+        self._scanned_at = 0
+        self._projects = {}
+        self._signatures = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def names(self):
+        return list(self.projects())
+
+    def projects(self):
+        """Return ``{name: metadata}`` in name order, rescanning if the directory changed."""
+        base_mtime = self._mtime(BASE_PROJECT_DIR)
+        with self._lock:
+            stale = self._base != BASE_PROJECT_DIR or base_mtime != self._base_mtime
+            if self._thread is None and time.time() - self._scanned_at > self.rescan_interval:
+                stale = True
+            if not stale:
+                return {name: dict(meta) for name, meta in self._projects.items()}
+            seen_scan = self._scanned_at
+        self._scan(seen_scan)
+        with self._lock:
+            return {name: dict(meta) for name, meta in self._projects.items()}
+
+    def rescan(self):
+        self._scan()
+        with self._lock:
+            return list(self._projects)
+
+    def _scan(self, seen_scan=None):
+        """Rebuild the project list.
+
+        ``seen_scan`` is the scan time a caller found stale; if another caller
+        finished a scan of the current directory since then, it is reused.
+        """
+        with self._scan_lock:
+            base = BASE_PROJECT_DIR
+            # Taken before listing, so a change during the scan triggers another one
+            base_mtime = self._mtime(base)
+            with self._lock:
+                if (seen_scan is not None and self._scanned_at != seen_scan
+                        and self._base == base and self._base_mtime == base_mtime):
+                    return
+                same_base = self._base == base
+                previous = self._projects if same_base else {}
+                previous_signatures = self._signatures if same_base else {}
+            projects = {}
+            signatures = {}
+            if base_mtime is not None:
+                for entry in sorted(base.iterdir()):
+                    if not (entry.is_dir() and has_gradlew(entry)):
+                        continue
+                    signature = tuple(self._mtime(entry / name) for name in self.METADATA_FILES)
+                    if previous_signatures.get(entry.name) == signature and entry.name in previous:
+                        projects[entry.name] = previous[entry.name]
+                    else:
+                        projects[entry.name] = {
+                            "gradle_version": gradle_wrapper_version(entry),
+                            "modules": settings_modules(entry),
+                        }
+                    signatures[entry.name] = signature
+            with self._lock:
+                self._base = base
+                self._base_mtime = base_mtime
+                self._scanned_at = time.time()
+                self._projects = projects
+                self._signatures = signatures
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="project-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.rescan_interval):
+            try:
+                self._scan()
+            except Exception as e:
+                logging.error("Project rescan failed: %s", e)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+
+PROJECT_INDEX = ProjectIndex()
 
 
 def list_projects():
-    if not BASE_PROJECT_DIR.exists():
-        return []
-    projects = []
-    for entry in sorted(BASE_PROJECT_DIR.iterdir()):
-        if entry.is_dir() and has_gradlew(entry):
-            projects.append(entry.name)
-    return projects
-
-
-def find_latest_apk(project_dir, build_type):
-    apk_root = project_dir / "app" / "build" / "outputs" / "apk" / build_type
-    if apk_root.exists():
-        candidates = list(apk_root.glob("*.apk"))
-    else:
-        candidates = list(project_dir.glob("**/build/outputs/apk/**/*.apk"))
+    return PROJECT_INDEX.names()
+
+
+def project_details():
+    """Return the indexed metadata of every project plus its latest build."""
+    details = PROJECT_INDEX.projects()
+    for name, meta in details.items():
+        latest = ARTIFACT_STORE.latest(name)
+        meta["last_build"] = {key: latest[key] for key in ("build", "build_type", "timestamp")} if latest else None
+    return details
+
+
+# Top-level directories that are never Gradle modules
+NON_MODULE_DIRS = {"build", "gradle", "buildSrc", "node_modules"}
+_MODULE_DIRS_LOCK = threading.Lock()
+_MODULE_DIRS = {}
+
+
+def module_dirs(project_dir):
+    """Return the directories that may hold a module's build outputs.
+
+    That is the project root, every module included by the settings file and
+    any other top-level directory. The list is cached per project and only
+    rebuilt when the settings files or the project root change.
+    """
+    signature = tuple(
+        ProjectIndex._mtime(path)
+        for path in (project_dir, project_dir / "settings.gradle", project_dir / "settings.gradle.kts")
+    )
+    key = str(project_dir)
+    with _MODULE_DIRS_LOCK:
+        cached = _MODULE_DIRS.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+    dirs = [project_dir]
+    for module in settings_modules(project_dir):
+        module_dir = project_dir.joinpath(*module.strip(":").split(":"))
+        if module_dir not in dirs:
+            dirs.append(module_dir)
+    try:
+        entries = sorted(project_dir.iterdir())
+    except OSError:
+        entries = []
+    for entry in entries:
+        if entry.name.startswith(".") or entry.name in NON_MODULE_DIRS or entry in dirs:
+            continue
+        if entry.is_dir():
+            dirs.append(entry)
+    with _MODULE_DIRS_LOCK:
+        _MODULE_DIRS[key] = (signature, dirs)
+    return dirs
+
+
+def _read_output_metadata(metadata_dir, module):
+    """Read the APKs listed in an Android Gradle Plugin output-metadata.json."""
+    try:
+        with (metadata_dir / "output-metadata.json").open("r", encoding="utf-8") as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    outputs = []
+    for element in metadata.get("elements", []):
+        output_file = element.get("outputFile")
+        if not output_file:
+            continue
+        outputs.append({
+            "module": module,
+            "variant": metadata.get("variantName"),
+            "application_id": metadata.get("applicationId"),
+            "version_code": element.get("versionCode"),
+            "version_name": element.get("versionName"),
+            "filters": element.get("filters", []),
+            "path": metadata_dir / output_file,
+        })
+    return outputs
+
+
+def find_apk_outputs(project_dir, build_type=None):
+    """List every APK output of the project, optionally only for one build type.
+
+    Outputs are read from each module's output-metadata.json; only the small
+    build/outputs/apk tree of each module is visited. APK directories without
+    metadata (older plugin versions) are listed by file.
+    """
+    outputs = []
+    for module_dir in module_dirs(project_dir):
+        apk_root = module_dir / "build" / "outputs" / "apk"
+        if not apk_root.is_dir():
+            continue
+        module = ":" + ":".join(module_dir.relative_to(project_dir).parts)
+        for root, dirs, files in os.walk(apk_root):
+            dirs.sort()
+            root = Path(root)
+            listed = _read_output_metadata(root, module) if "output-metadata.json" in files else None
+            if listed is None:
+                parts = root.relative_to(apk_root).parts
+                variant = parts[0] + "".join(part.capitalize() for part in parts[1:]) if parts else None
+                listed = [
+                    {"module": module, "variant": variant, "path": root / name}
+                    for name in sorted(files) if name.endswith(".apk")
+                ]
+            outputs.extend(listed)
+    if build_type:
+        outputs = [o for o in outputs if (o.get("variant") or "").lower().endswith(build_type.lower())]
+    return outputs
+
+
+def apk_application_id(project_dir, apk_path):
+    """Return the application id the output metadata records for an APK, if any."""
+    for output in find_apk_outputs(project_dir):
+        if output["path"] == apk_path:
+            return output.get("application_id")
+    return None
+
+
+def find_latest_apk(project_dir, build_type, module=None):
+    """Return the APK to publish and deploy for a build type.
+
+    One assemble task builds every application module, so the APKs of the
+    application module (``module``, else APP_MODULE) are preferred; only if
+    it has none is the newest APK of any module taken.
+    """
+    outputs = [o for o in find_apk_outputs(project_dir, build_type) if o["path"].is_file()]
+    module = ":" + (module or APP_MODULE).strip(":")
+    preferred = [o for o in outputs if o["module"] == module]
+    candidates = [o["path"] for o in preferred or outputs]
     if not candidates:
         return None
     candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
@@ -228,16 +882,136 @@ def build_log_path(project_name):
     return LOGS_DIR / f"{project_name}.log"
 
 
+def deploy_log_path(project_name, device_id):
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", device_id)
+    return LOGS_DIR / f"{project_name}.deploy-{safe_id}.log"
+
+
+class LiveLogs:
+    """Lets readers follow log files while commands are still writing them.
+
+    Writers call begin() when they create a log, appended() as it grows and
+    end() when done. Every new file gets a fresh generation, so a reader
+    holding an offset into an earlier log of the same project can tell that
+    it has to start over.
+    """
+
+    def __init__(self, max_waiters=None):
+        self.max_waiters = MAX_LOG_WAITERS if max_waiters is None else max_waiters
+        self._waiters = 0
+        self._condition = threading.Condition()
+        self._generations = {}
+        self._running = set()
+        self._next_generation = itertools.count(1)
+
+    def begin(self, path, running=True):
+        key = str(path)
+        with self._condition:
+            self._generations[key] = next(self._next_generation)
+            if running:
+                self._running.add(key)
+            else:
+                self._running.discard(key)
+            self._condition.notify_all()
+
+    def appended(self, path):
+        with self._condition:
+            self._condition.notify_all()
+
+    def end(self, path):
+        with self._condition:
+            self._running.discard(str(path))
+            self._condition.notify_all()
+
+    def running(self, path):
+        with self._condition:
+            return str(path) in self._running
+
+    def read(self, path, since=0, log_id=None, wait=0, limit=None):
+        """Return the bytes of ``path`` after offset ``since``, or None if there is no log.
+
+        When ``log_id`` names an earlier file, or ``since`` lies past the end,
+        the log is read from the start and ``reset`` is set. With ``wait``, a
+        reader that is up to date waits up to that many seconds for a running
+        log to grow; at most ``max_waiters`` readers wait at once and the
+        rest get an immediate (possibly empty) answer.
+        """
+        limit = limit or LOG_DELTA_BYTES
+        deadline = time.monotonic() + wait
+        waiting = False
+        with self._condition:
+            try:
+                while True:
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        return None
+                    current_id = f"{stat.st_ino:x}-{self._generations.get(str(path), 0)}"
+                    reset = (log_id is not None and log_id != current_id) or since > stat.st_size
+                    offset = 0 if reset else since
+                    running = str(path) in self._running
+                    remaining = deadline - time.monotonic()
+                    if reset or not running or remaining <= 0 or stat.st_size > offset:
+                        break
+                    if not waiting:
+                        # Waiting readers hold HTTP workers; past the limit they are answered now
+                        if self._waiters >= self.max_waiters:
+                            break
+                        self._waiters += 1
+                        waiting = True
+                    self._condition.wait(remaining)
+            finally:
+                if waiting:
+                    self._waiters -= 1
+        try:
+            with path.open("rb") as f:
+                f.seek(offset)
+                data = f.read(limit)
+        except OSError:
+            return None
+        if len(data) == limit:
+            # Stop before a character split by the limit; the rest comes next time
+            try:
+                data.decode("utf-8")
+            except UnicodeDecodeError as e:
+                if e.reason == "unexpected end of data":
+                    data = data[:e.start]
+        return {
+            "data": data.decode("utf-8", errors="replace"),
+            "offset": offset + len(data),
+            "log_id": current_id,
+            "reset": reset,
+            "running": running,
+        }
+
+
+LIVE_LOGS = LiveLogs()
+
+
 def save_build_log(project_name, log_content):
     """Save build log to file."""
     log_path = build_log_path(project_name)
-    with log_path.open("w", encoding="utf-8") as f:
+    # Replaced rather than rewritten so a log being archived is never truncated
+    tmp_path = log_path.with_name(f".{log_path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
         f.write(log_content)
+    os.replace(tmp_path, log_path)
+    LIVE_LOGS.begin(log_path, running=False)
 
 
-def get_build_log(project_name):
-    """Retrieve build log for a project."""
-    log_path = build_log_path(project_name)
+def save_deploy_log(project_name, device_id, lines):
+    """Write a device's deploy output to its deploy log and return the path."""
+    log_path = deploy_log_path(project_name, device_id)
+    # A new file each time, so the copy archived with the job stays intact
+    log_path.unlink(missing_ok=True)
+    log_path.write_text("\n".join(lines), encoding="utf-8")
+    LIVE_LOGS.begin(log_path, running=False)
+    return log_path
+
+
+def get_build_log(project_name, device_id=None):
+    """Retrieve build log for a project, or its deploy log for one device."""
+    log_path = deploy_log_path(project_name, device_id) if device_id else build_log_path(project_name)
     if not log_path.exists():
         return None
     try:
@@ -247,167 +1021,2047 @@ def get_build_log(project_name):
         return None
 
 
-def run_build(project_name, build_type):
-    project_dir = project_path(project_name)
-    if not project_dir:
-        return
+class LogArchive:
+    """Compressed job logs that can be read a range of lines at a time.
 
-    log_output = []
-    
-    try:
-        write_status(project_name, "preparing", 10)
-        gradlew = project_dir / "gradlew"
-        subprocess.run(["chmod", "+x", str(gradlew)], check=True)
+    A job's log is stored under logs/jobs/ as a series of gzip members of at
+    most BLOCK_LINES lines each. Together they are an ordinary gzip file, but
+    each member also decompresses on its own, and a small index records every
+    block's offset, length and first line. Reading a range of lines only
+    decompresses the blocks it covers. Once the archive grows past
+    ``max_bytes`` the oldest logs are removed.
+    """
 
-        write_status(project_name, "building", 40)
-        cmd = [str(gradlew), f"assemble{build_type.capitalize()}"]
-        
-        # Capture build output (don't use check=True so we can capture output on failure)
-        process = subprocess.run(
-            cmd,
-            cwd=str(project_dir),
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            env=BUILD_ENV
-        )
-        
-        # Save build output (last 2000 lines to avoid huge files)
-        combined_output = (process.stdout or "") + "\n" + (process.stderr or "")
-        output_lines = combined_output.splitlines()
-        log_content = "\n".join(output_lines[-2000:])
-        save_build_log(project_name, log_content)
-        
-        # Now check if it failed
-        if process.returncode != 0:
-            raise subprocess.CalledProcessError(process.returncode, cmd, process.stdout, process.stderr)
+    BLOCK_LINES = 1000
+    BLOCK_BYTES = 256 * 1024
 
-        write_status(project_name, "finding_apk", 75)
-        latest_apk = find_latest_apk(project_dir, build_type)
-        if not latest_apk:
-            write_status(project_name, "error", 0, message="APK not found in build outputs.")
+    def __init__(self, max_bytes=None):
+        self.max_bytes = LOG_RETENTION_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+
+    def directory(self):
+        return LOGS_DIR / "jobs"
+
+    def write(self, job_id, source):
+        """Compress ``source`` as the log of ``job_id``; return its name or None."""
+        directory = self.directory()
+        name = f"{job_id}.log.gz"
+        blocks, lines = [], 0
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(source, "rb") as src, (directory / name).open("wb") as dst:
+                block, size = [], 0
+                for line in itertools.chain(src, [None]):
+                    if line is not None:
+                        block.append(line)
+                        size += len(line)
+                        if len(block) < self.BLOCK_LINES and size < self.BLOCK_BYTES:
+                            continue
+                    if block:
+                        data = gzip.compress(b"".join(block), mtime=0)
+                        blocks.append([dst.tell(), len(data), lines])
+                        dst.write(data)
+                        lines += len(block)
+                        block, size = [], 0
+            self._index_path(name).write_text(json.dumps({"lines": lines, "blocks": blocks}))
+        except OSError as e:
+            logging.error("Error archiving log of job %s: %s", job_id, e)
+            return None
+        self.enforce_retention()
+        return name
+
+    def _index_path(self, name):
+        return self.directory() / f"{name}.idx"
+
+    def read_lines(self, name, start=0, count=None):
+        """Return ``(lines, total)`` for lines ``start`` to ``start + count``, or None.
+
+        Lines keep their line endings.
+        """
+        path = self.directory() / name
+        try:
+            index = json.loads(self._index_path(name).read_text())
+        except (OSError, ValueError):
+            return self._read_plain(path, start, count)
+        total = index["lines"]
+        end = total if count is None else min(total, start + count)
+        if start >= end:
+            return [], total
+        blocks = index["blocks"]
+        first = bisect.bisect_right([block[2] for block in blocks], start) - 1
+        lines = []
+        try:
+            with path.open("rb") as f:
+                for offset, length, first_line in blocks[first:]:
+                    if first_line >= end:
+                        break
+                    f.seek(offset)
+                    block = self._split_lines(gzip.decompress(f.read(length)))
+                    lines.extend(block[max(0, start - first_line):end - first_line])
+        except (OSError, EOFError, zlib.error, gzip.BadGzipFile):
+            return None
+        return [line.decode("utf-8", errors="replace") for line in lines], total
+
+    def blocks(self, name):
+        """Yield ``(first_line, lines)`` for each block of a log, in order."""
+        path = self.directory() / name
+        try:
+            index = json.loads(self._index_path(name).read_text())
+        except (OSError, ValueError):
+            plain = self._read_plain(path, 0, None)
+            lines = plain[0] if plain else []
+            for first in range(0, len(lines), self.BLOCK_LINES):
+                yield first, lines[first:first + self.BLOCK_LINES]
             return
+        try:
+            with path.open("rb") as f:
+                for offset, length, first_line in index["blocks"]:
+                    f.seek(offset)
+                    block = self._split_lines(gzip.decompress(f.read(length)))
+                    yield first_line, [line.decode("utf-8", errors="replace") for line in block]
+        except (OSError, EOFError, zlib.error, gzip.BadGzipFile) as e:
+            logging.error("Error reading archived log %s: %s", name, e)
 
-        project_artifacts = ARTIFACT_DIR / project_name
-        project_artifacts.mkdir(parents=True, exist_ok=True)
-        target_path = project_artifacts / latest_apk.name
-        shutil.copy2(str(latest_apk), str(target_path))
+    @staticmethod
+    def _split_lines(data):
+        """Split a block into lines the way write() counted them, on LF only.
 
-        artifact_url = f"/artifacts/{project_name}/{latest_apk.name}"
-        write_status(project_name, "done", 100, artifact=artifact_url)
-    except subprocess.CalledProcessError as e:
-        # Capture failed build output
+        A bare CR (progress output) or a form feed stays inside its line.
+        """
+        lines = [line + b"\n" for line in data.split(b"\n")]
+        lines[-1] = lines[-1][:-1]
+        if not lines[-1]:
+            lines.pop()
+        return lines
+
+    @staticmethod
+    def _read_plain(path, start, count):
+        # Logs archived before compression was introduced
         try:
-            # Try to get stderr if available
-            error_output = e.stderr if hasattr(e, 'stderr') and e.stderr else ""
-            stdout_output = e.stdout if hasattr(e, 'stdout') and e.stdout else ""
-            log_content = f"{stdout_output}\n{error_output}".strip()
-            if not log_content:
-                log_content = str(e)
-            save_build_log(project_name, log_content)
-        except Exception:
-            save_build_log(project_name, str(e))
-        
-        logging.error("Build failed for %s: %s", project_name, e)
-        write_status(project_name, "error", 0, message="Build failed. View logs for details.")
-    except Exception as e:
-        save_build_log(project_name, f"Unexpected error: {str(e)}")
-        logging.error("Unexpected build error for %s: %s", project_name, e)
-        write_status(project_name, "error", 0, message="Unexpected error. View logs for details.")
-    finally:
-        with BUILD_LOCK:
-            ACTIVE_BUILDS.pop(project_name, None)
+            with path.open("r", encoding="utf-8", errors="replace", newline="\n") as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        end = None if count is None else start + count
+        return lines[start:end], len(lines)
 
+    def disk_usage(self):
+        try:
+            return sum(entry.stat().st_size for entry in os.scandir(self.directory()) if entry.is_file())
+        except OSError:
+            return 0
 
-def run_clean_cache(project_name):
-    """Clean Gradle cache for a project."""
-    project_dir = project_path(project_name)
-    if not project_dir:
-        return
+    def enforce_retention(self):
+        """Remove the oldest logs until the archive fits in ``max_bytes``."""
+        with self._lock:
+            try:
+                entries = [entry for entry in os.scandir(self.directory()) if entry.is_file()]
+            except OSError:
+                return
+            logs = {}
+            for entry in entries:
+                name = entry.name[:-len(".idx")] if entry.name.endswith(".idx") else entry.name
+                stat = entry.stat()
+                mtime, size = logs.get(name, (stat.st_mtime, 0))
+                logs[name] = (min(mtime, stat.st_mtime), size + stat.st_size)
+            total = sum(size for _, size in logs.values())
+            for name, (_, size) in sorted(logs.items(), key=lambda item: item[1][0]):
+                if total <= self.max_bytes:
+                    break
+                LOG_SEARCH.remove(name)
+                for path in (self.directory() / name, self._index_path(name)):
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+                total -= size
 
-    try:
-        write_status(project_name, "cleaning", 10, message="Cleaning Gradle cache...")
-        gradlew = project_dir / "gradlew"
-        subprocess.run(["chmod", "+x", str(gradlew)], check=True)
 
-        # Run gradle clean
-        write_status(project_name, "cleaning", 50, message="Running gradle clean...")
-        process = subprocess.run(
-            [str(gradlew), "clean"],
-            cwd=str(project_dir),
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            env=BUILD_ENV
-        )
+LOG_ARCHIVE = LogArchive()
 
-        # Save output
-        combined_output = (process.stdout or "") + "\n" + (process.stderr or "")
-        save_build_log(project_name, combined_output)
 
-        if process.returncode != 0:
-            raise subprocess.CalledProcessError(process.returncode, ["gradlew", "clean"])
+class BuildHistory:
+    """SQLite history of every build, deploy and clean job.
 
-        # Also clean .gradle directory in project
-        gradle_cache = project_dir / ".gradle"
-        if gradle_cache.exists():
-            shutil.rmtree(str(gradle_cache), ignore_errors=True)
+    A job's row is written when it starts and again when it finishes, with
+    its variant, device, timings, Gradle exit code, artifact hash and a
+    reference to its archived log. Until start() is called rows are written
+    straight away; afterwards a background thread writes them in batches, so
+    jobs never wait on the database. Queries open their own connection.
+    """
 
-        # Clean build directory
-        build_dir = project_dir / "build"
-        if build_dir.exists():
-            shutil.rmtree(str(build_dir), ignore_errors=True)
+    COLUMNS = (
+        "id", "project", "type", "variant", "device", "status", "message", "queued_at", "started_at",
+        "finished_at", "duration", "exit_code", "artifact_sha256", "log", "failure",
+    )
+    # Columns holding JSON
+    JSON_COLUMNS = ("failure",)
+    SCHEMA = """
+        PRAGMA journal_mode = WAL;
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            project TEXT NOT NULL,
+            type TEXT NOT NULL,
+            variant TEXT,
+            device TEXT,
+            status TEXT NOT NULL,
+            message TEXT,
+            queued_at REAL,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            duration REAL,
+            exit_code INTEGER,
+            artifact_sha256 TEXT,
+            log TEXT,
+            failure TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_started ON jobs (started_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS jobs_project_started ON jobs (project, started_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS jobs_status_started ON jobs (status, started_at DESC, id DESC);
+    """
+    MAX_PAGE = 200
 
-        app_build_dir = project_dir / "app" / "build"
-        if app_build_dir.exists():
-            shutil.rmtree(str(app_build_dir), ignore_errors=True)
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._writer = None
+        self._schema_lock = threading.Lock()
+        self._schema_path = None
 
-        write_status(project_name, "done", 100, message="Cache cleaned successfully.")
-    except subprocess.CalledProcessError as e:
-        logging.error("Clean cache failed for %s: %s", project_name, e)
-        write_status(project_name, "error", 0, message="Clean cache failed. View logs for details.")
-    except Exception as e:
-        save_build_log(project_name, f"Unexpected error: {str(e)}")
-        logging.error("Unexpected clean error for %s: %s", project_name, e)
-        write_status(project_name, "error", 0, message="Unexpected error. View logs for details.")
-    finally:
-        with BUILD_LOCK:
-            ACTIVE_BUILDS.pop(project_name, None)
+    def db_path(self):
+        return STATUS_DIR / "history.sqlite3"
 
+    def _connect(self):
+        path = self.db_path()
+        conn = sqlite3.connect(str(path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        with self._schema_lock:
+            if self._schema_path != path:
+                conn.executescript(self.SCHEMA)
+                # Databases created before a column was added
+                existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+                for column in self.COLUMNS:
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+                self._schema_path = path
+        return conn
 
-def latest_artifact_path(project_name):
-    project_artifacts = ARTIFACT_DIR / project_name
-    if project_artifacts.exists():
-        artifacts = list(project_artifacts.glob("*.apk"))
-        if artifacts:
-            artifacts.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-            return artifacts[0]
+    def start_job(self, project_name, job_type, variant=None, device=None):
+        """Record a job as running and return it; pass it to finish_job() later."""
+        scheduled = BUILD_SCHEDULER.current_job()
+        job = {
+            "id": f"{time.strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(4)}",
+            "project": project_name,
+            "type": job_type,
+            "variant": variant,
+            "device": device,
+            "status": "running",
+            "queued_at": scheduled["submitted"] if scheduled else None,
+            "started_at": time.time(),
+        }
+        self._write(job)
+        return job
+
+    def finish_job(self, job, status=None, message=None, log_source=None, **fields):
+        """Record a job's outcome.
+
+        Without ``status`` the project's current status is taken as the
+        outcome. ``log_source`` is compressed into the LOG_ARCHIVE as the job's log.
+        """
+        if status is None:
+            current = load_status(job["project"]) or {}
+            status, message = current.get("status", "error"), current.get("message")
+        job.update(fields, status=status, message=message, finished_at=time.time())
+        job["duration"] = round(job["finished_at"] - job["started_at"], 3)
+        if log_source is not None:
+            job["log"] = LOG_ARCHIVE.write(job["id"], log_source)
+        self._write(job)
+        if job.get("log"):
+            LOG_SEARCH.add(job)
+
+    def _write(self, job):
+        row = tuple(
+            json.dumps(job[column]) if column in self.JSON_COLUMNS and job.get(column) is not None
+            else job.get(column)
+            for column in self.COLUMNS
+        )
+        if self._writer is None:
+            self._insert([row])
+        else:
+            self._queue.put(row)
+
+    def _insert(self, rows):
+        placeholders = ", ".join("?" * len(self.COLUMNS))
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({placeholders})", rows
+                )
+        finally:
+            conn.close()
+
+    def start(self):
+        if self._writer is not None:
+            return
+        self._writer = threading.Thread(target=self._write_behind, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def stop(self):
+        """Stop the background writer once everything queued is written."""
+        writer = self._writer
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+            self._writer = None
+
+    def _write_behind(self):
+        while True:
+            rows = [self._queue.get()]
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+            if rows:
+                try:
+                    self._insert(rows)
+                except sqlite3.Error as e:
+                    logging.error("Error writing build history: %s", e)
+            if stop:
+                return
+
+    def jobs(self, project_name=None, job_type=None, status=None, since=None, before=None, limit=50):
+        """Return ``(jobs, next_cursor)``, newest first.
+
+        ``before`` is the cursor (a job id) returned with the previous page.
+        """
+        limit = max(1, min(limit, self.MAX_PAGE))
+        where, params = [], []
+        for column, value in (("project", project_name), ("type", job_type), ("status", status)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("started_at >= ?")
+            params.append(since)
+        if before:
+            where.append("(started_at, id) < (SELECT started_at, id FROM jobs WHERE id = ?)")
+            params.append(before)
+        sql = "SELECT * FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        conn = self._connect()
+        try:
+            rows = [self._decode(row) for row in conn.execute(sql, params + [limit + 1])]
+        finally:
+            conn.close()
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def logged_jobs(self):
+        """Return every job with an archived log, oldest first."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, project, type, started_at, log FROM jobs WHERE log IS NOT NULL ORDER BY started_at"
+            )
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def job(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._decode(row) if row else None
+
+    def _decode(self, row):
+        job = dict(row)
+        for column in self.JSON_COLUMNS:
+            if job.get(column) is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+
+BUILD_HISTORY = BuildHistory()
+
+
+class LogSearch:
+    """Full-text index over the archived job logs.
+
+    Each block of an archived log (see LogArchive) is one row of an SQLite
+    FTS5 table using the trigram tokenizer, so any piece of text of three or
+    more characters is looked up through the index, whatever words surround
+    it. Only the index is stored: the blocks it points at are read back from
+    the archive to find the matching lines and apply an optional regular
+    expression. Logs are indexed as their jobs finish, by a background
+    thread once start() is called, and dropped when the archive removes them.
+    """
+
+    SCHEMA = """
+        PRAGMA journal_mode = WAL;
+        CREATE TABLE IF NOT EXISTS log_jobs (
+            job TEXT PRIMARY KEY,
+            project TEXT NOT NULL,
+            type TEXT NOT NULL,
+            started_at REAL NOT NULL,
+            log TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS log_jobs_log ON log_jobs (log);
+        CREATE INDEX IF NOT EXISTS log_jobs_started ON log_jobs (started_at DESC);
+        CREATE TABLE IF NOT EXISTS log_blocks (
+            id INTEGER PRIMARY KEY,
+            job TEXT NOT NULL,
+            first_line INTEGER NOT NULL,
+            lines INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS log_blocks_job ON log_blocks (job);
+        CREATE VIRTUAL TABLE IF NOT EXISTS log_text USING fts5(text, tokenize = 'trigram', content = '');
+    """
+    # Shortest text the trigram index can look up
+    MIN_QUERY = 3
+    MAX_RESULTS = 1000
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._worker = None
+        self._schema_lock = threading.Lock()
+        self._schema_path = None
+        self._available = None
+
+    def db_path(self):
+        return STATUS_DIR / "log-search.sqlite3"
+
+    def _connect(self):
+        path = self.db_path()
+        conn = sqlite3.connect(str(path), timeout=30)
+        with self._schema_lock:
+            if self._schema_path != path:
+                conn.executescript(self.SCHEMA)
+                self._schema_path = path
+        return conn
+
+    def available(self):
+        """Whether this SQLite has FTS5 with the trigram tokenizer (3.34 or newer)."""
+        if self._available is None:
+            try:
+                self._connect().close()
+                self._available = True
+            except sqlite3.OperationalError as e:
+                logging.warning("Log search disabled: %s", e)
+                self._available = False
+        return self._available
+
+    def add(self, job):
+        """Index the archived log of a finished job."""
+        if self._worker is None:
+            self._index(job)
+        else:
+            self._queue.put(job)
+
+    def _index(self, job):
+        if not self.available() or not (LOG_ARCHIVE.directory() / job["log"]).exists():
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    if conn.execute("SELECT 1 FROM log_jobs WHERE job = ?", (job["id"],)).fetchone():
+                        return
+                    conn.execute(
+                        "INSERT INTO log_jobs (job, project, type, started_at, log) VALUES (?, ?, ?, ?, ?)",
+                        (job["id"], job["project"], job["type"], job["started_at"], job["log"]),
+                    )
+                    for first_line, lines in LOG_ARCHIVE.blocks(job["log"]):
+                        block_id = conn.execute(
+                            "INSERT INTO log_blocks (job, first_line, lines) VALUES (?, ?, ?)",
+                            (job["id"], first_line, len(lines)),
+                        ).lastrowid
+                        conn.execute("INSERT INTO log_text (rowid, text) VALUES (?, ?)", (block_id, "".join(lines)))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.error("Error indexing log of job %s: %s", job["id"], e)
+
+    def remove(self, name):
+        """Drop an archived log from the index before the archive deletes it."""
+        if not self.available():
+            return
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    jobs = [row[0] for row in conn.execute("SELECT job FROM log_jobs WHERE log = ?", (name,))]
+                    if not jobs:
+                        return
+                    placeholders = ", ".join("?" * len(jobs))
+                    block_ids = dict(conn.execute(
+                        f"SELECT first_line, id FROM log_blocks WHERE job IN ({placeholders})", jobs
+                    ).fetchall())
+                    # Contentless FTS rows are deleted by handing back the text they indexed
+                    for first_line, lines in LOG_ARCHIVE.blocks(name):
+                        if first_line in block_ids:
+                            conn.execute(
+                                "INSERT INTO log_text (log_text, rowid, text) VALUES ('delete', ?, ?)",
+                                (block_ids[first_line], "".join(lines)),
+                            )
+                    conn.execute(f"DELETE FROM log_blocks WHERE job IN ({placeholders})", jobs)
+                    conn.execute(f"DELETE FROM log_jobs WHERE job IN ({placeholders})", jobs)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.error("Error removing log %s from the search index: %s", name, e)
+
+    def search(self, text, pattern=None, project_name=None, job_type=None, since=None, until=None, limit=100):
+        """Return ``(matches, truncated)`` for lines containing ``text``, newest jobs first.
+
+        ``text`` is matched case-insensitively and must be at least MIN_QUERY
+        characters long; ``pattern`` is a compiled regex lines must also match.
+        Each match has the job, project, job type, start time, line number
+        (from 0, as /api/logs counts) and the line itself.
+        """
+        limit = max(1, min(limit, self.MAX_RESULTS))
+        where = ["log_text MATCH ?"]
+        params = ['"' + text.replace('"', '""') + '"']
+        for column, value in (("j.project", project_name), ("j.type", job_type)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("j.started_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("j.started_at < ?")
+            params.append(until)
+        sql = (
+            "SELECT j.job, j.project, j.type, j.started_at, j.log, b.first_line, b.lines FROM log_text"
+            " JOIN log_blocks b ON b.id = log_text.rowid JOIN log_jobs j ON j.job = b.job"
+            f" WHERE {' AND '.join(where)} ORDER BY j.started_at DESC, j.job DESC, b.first_line"
+        )
+        needle = text.casefold()
+        matches = []
+        conn = self._connect()
+        try:
+            for job_id, project, kind, started_at, log, first_line, count in conn.execute(sql, params):
+                block = LOG_ARCHIVE.read_lines(log, first_line, count)
+                if block is None:
+                    continue
+                for number, line in enumerate(block[0], first_line):
+                    line = line.rstrip("\r\n")
+                    if needle not in line.casefold() or (pattern is not None and not pattern.search(line)):
+                        continue
+                    if len(matches) == limit:
+                        return matches, True
+                    matches.append({
+                        "job": job_id,
+                        "project": project,
+                        "type": kind,
+                        "started_at": started_at,
+                        "line": number,
+                        "text": line,
+                    })
+        finally:
+            conn.close()
+        return matches, False
+
+    def start(self):
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._index_behind, name="log-indexer", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """Stop the background indexer once everything queued is indexed."""
+        worker = self._worker
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+            self._worker = None
+
+    def _index_behind(self):
+        # Catch up on logs archived while the server was not indexing them
+        if self.available():
+            try:
+                conn = self._connect()
+                try:
+                    indexed = {row[0] for row in conn.execute("SELECT job FROM log_jobs")}
+                finally:
+                    conn.close()
+                for job in BUILD_HISTORY.logged_jobs():
+                    if job["id"] not in indexed:
+                        self._index(job)
+            except sqlite3.Error as e:
+                logging.error("Error listing logs to index: %s", e)
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._index(job)
+
+
+LOG_SEARCH = LogSearch()
+
+
+def get_job_log(job_id, start=0, count=None):
+    """Return ``(lines, total)`` from the archived log of a job, or None."""
+    job = BUILD_HISTORY.job(job_id)
+    if not job or not job.get("log"):
+        return None
+    return LOG_ARCHIVE.read_lines(job["log"], start, count)
+
+
+def run_logged_command(cmd, cwd, log_path, tail_lines=LOG_TAIL_LINES, on_line=None):
+    """Run a command and stream its combined output to log_path as it is produced.
+
+    Only the last ``tail_lines`` lines stay in memory; ``on_line`` (if given)
+    sees every line as it arrives. Returns ``(returncode, tail)``.
+    """
+    tail = collections.deque(maxlen=tail_lines)
+    # A new file rather than a truncated one, so logs archived by hard link stay intact
+    try:
+        log_path.unlink()
+    except FileNotFoundError:
+        pass
+    with log_path.open("w", encoding="utf-8", buffering=1) as log_file:
+        LIVE_LOGS.begin(log_path)
+        try:
+            process = subprocess.Popen(
+                cmd,
+                cwd=str(cwd),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                env=BUILD_ENV
+            )
+            with process.stdout:
+                for chunk in iter(lambda: process.stdout.readline(LOG_READ_CHUNK), ""):
+                    log_file.write(chunk)
+                    LIVE_LOGS.appended(log_path)
+                    line = chunk.rstrip("\n")
+                    tail.append(line)
+                    if on_line:
+                        on_line(line)
+            returncode = process.wait()
+        finally:
+            LIVE_LOGS.end(log_path)
+    return returncode, list(tail)
+
+
+def gradle_wrapper_version(project_dir):
+    """Return the Gradle version pinned by the project's wrapper, if any."""
+    properties = project_dir / "gradle" / "wrapper" / "gradle-wrapper.properties"
+    try:
+        text = properties.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    match = re.search(r"distributionUrl=.*?gradle-([0-9][\w.\-]*?)-(?:bin|all)\.zip", text)
+    return match.group(1) if match else None
+
+
+class GradleDaemonPool:
+    """Track Gradle daemons per (Gradle version, JDK) and cap idle ones.
+
+    Gradle reuses a compatible idle daemon on its own; this keeps count of
+    how many each version/JDK pair should have, notes whether a build really
+    got a warm daemon (no "Starting a Gradle Daemon" line), and stops the
+    least recently used version's daemons with ``gradlew --stop`` once more
+    than ``max_idle`` sit idle. While such a stop runs, builds needing that
+    version wait for it so that their fresh daemon is not stopped too.
+    Daemons are started with an idle timeout so entries older than that are
+    dropped as well.
+    """
+
+    COLD_START_MARKER = "Starting a Gradle Daemon"
+
+    def __init__(self, max_idle=None, idle_timeout=None):
+        self.max_idle = MAX_IDLE_DAEMONS if max_idle is None else max_idle
+        self.idle_timeout = idle_timeout or DAEMON_IDLE_TIMEOUT
+        self._lock = threading.Lock()
+        # Signalled when a "gradlew --stop" has finished
+        self._stopped = threading.Condition(self._lock)
+        # Least recently used first
+        self._pools = collections.OrderedDict()
+
+    def daemon_key(self, project_dir):
+        return (gradle_wrapper_version(project_dir) or "unknown", BUILD_ENV.get("JAVA_HOME") or "default")
+
+    def gradle_args(self):
+        return ["--daemon", f"-Dorg.gradle.daemon.idletimeout={self.idle_timeout * 1000}"]
+
+    def acquire(self, key, project_dir):
+        """Mark a build as using a daemon for key; returns True if one should be warm."""
+        with self._lock:
+            pool = self._pools.setdefault(key, {"daemons": 0, "busy": 0, "last_used": 0, "stopping": False})
+            while pool["stopping"]:
+                self._stopped.wait()
+            self._expire()
+            warm = pool["daemons"] > pool["busy"]
+            pool["busy"] += 1
+            pool["project_dir"] = project_dir
+            self._pools.move_to_end(key)
+            return warm
+
+    def release(self, key, expected_warm, started_daemon):
+        """Record a finished build and stop daemons beyond the idle limit."""
+        with self._lock:
+            pool = self._pools[key]
+            pool["busy"] -= 1
+            pool["last_used"] = time.time()
+            if started_daemon and not expected_warm:
+                pool["daemons"] += 1
+            pool["daemons"] = max(pool["daemons"], 1)
+            self._pools.move_to_end(key)
+            evicted = self._select_evictions()
+        for evicted_key, project_dir in evicted:
+            self._stop_daemons(evicted_key, project_dir)
+
+    def summary(self):
+        with self._lock:
+            self._expire()
+            return [
+                {
+                    "gradle_version": key[0],
+                    "java_home": key[1],
+                    "daemons": pool["daemons"],
+                    "busy": pool["busy"],
+                    "idle": max(pool["daemons"] - pool["busy"], 0),
+                    "last_used": int(pool["last_used"]),
+                }
+                for key, pool in self._pools.items()
+            ]
+
+    def _expire(self):
+        cutoff = time.time() - self.idle_timeout
+        for pool in self._pools.values():
+            if not pool["busy"] and pool["last_used"] < cutoff:
+                pool["daemons"] = 0
+
+    def _select_evictions(self):
+        idle = sum(max(pool["daemons"] - pool["busy"], 0) for pool in self._pools.values())
+        evicted = []
+        for key, pool in self._pools.items():
+            if idle <= self.max_idle:
+                break
+            # --stop ends every daemon of that Gradle version, so skip busy ones
+            if pool["busy"] or not pool["daemons"] or pool["stopping"]:
+                continue
+            idle -= pool["daemons"]
+            pool["daemons"] = 0
+            pool["stopping"] = True
+            evicted.append((key, pool["project_dir"]))
+        return evicted
+
+    def _stop_daemons(self, key, project_dir):
+        logging.info("Stopping idle Gradle %s daemons (JDK %s)", key[0], key[1])
+        try:
+            subprocess.run(
+                [str(project_dir / "gradlew"), "--stop"],
+                cwd=str(project_dir),
+                capture_output=True,
+                env=BUILD_ENV,
+                timeout=60
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logging.error("Failed to stop Gradle daemons for %s: %s", key[0], e)
+        finally:
+            with self._lock:
+                self._pools[key]["stopping"] = False
+                self._stopped.notify_all()
+
+
+GRADLE_DAEMONS = GradleDaemonPool()
+
+
+class BuildCache:
+    """Storage behind the Gradle HTTP build cache endpoint (/cache/<key>).
+
+    Entries are files named by their cache key. An in-memory LRU index,
+    rebuilt from file mtimes on first use, tracks total size; the least
+    recently used entries are deleted once it exceeds ``max_bytes``.
+    """
+
+    KEY_PATTERN = re.compile(r"^[0-9a-f]{16,128}$")
+    READ_CHUNK = 64 * 1024
+
+    def __init__(self, root=None, max_bytes=None, max_entry_bytes=None):
+        self.root = Path(root or BUILD_CACHE_DIR)
+        self.max_bytes = max_bytes or BUILD_CACHE_MAX_MB * 1024 * 1024
+        self.max_entry_bytes = max_entry_bytes or BUILD_CACHE_MAX_ENTRY_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._index = None
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def valid_key(self, key):
+        return bool(self.KEY_PATTERN.match(key))
+
+    def get(self, key):
+        """Return the entry's path on a hit (marking it recently used), else None."""
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                self.misses += 1
+                return None
+            index.move_to_end(key)
+            self.hits += 1
+        path = self.root / key
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def store(self, key, stream, length):
+        """Copy ``length`` bytes from stream into the cache under key."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / f".{key}.{threading.get_ident()}.tmp"
+        try:
+            with tmp_path.open("wb") as f:
+                remaining = length
+                while remaining > 0:
+                    chunk = stream.read(min(self.READ_CHUNK, remaining))
+                    if not chunk:
+                        raise ValueError("Request body ended early.")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            os.replace(tmp_path, self.root / key)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        with self._lock:
+            index = self._load_index()
+            self._size += length - index.pop(key, 0)
+            index[key] = length
+            self.stores += 1
+            evicted = self._evict()
+        for old_key in evicted:
+            try:
+                (self.root / old_key).unlink()
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            index = self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(index),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+    def _load_index(self):
+        if self._index is None:
+            entries = []
+            if self.root.exists():
+                for entry in self.root.iterdir():
+                    if entry.is_file() and self.valid_key(entry.name):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name, stat.st_size))
+            entries.sort()
+            self._index = collections.OrderedDict((name, size) for _, name, size in entries)
+            self._size = sum(self._index.values())
+        return self._index
+
+    def _evict(self):
+        evicted = []
+        while self._size > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+
+
+BUILD_CACHE = BuildCache()
+
+BUILD_CACHE_INIT_SCRIPT = """// Generated by the Android build server: use its shared build cache
+gradle.settingsEvaluated { settings ->
+    settings.buildCache {
+        remote(HttpBuildCache) {
+            url = '%(url)s'
+            push = true
+            try {
+                allowInsecureProtocol = true
+            } catch (MissingPropertyException ignored) {
+                // Gradle < 6.0 allows plain HTTP without this flag
+            }
+        }
+    }
+}
+"""
+
+
+def build_cache_init_script():
+    """Write the init script pointing Gradle at this server's build cache."""
+    GRADLE_INIT_DIR.mkdir(exist_ok=True)
+    path = (GRADLE_INIT_DIR / "build-cache.gradle").resolve()
+    content = BUILD_CACHE_INIT_SCRIPT % {"url": f"http://127.0.0.1:{PORT}/cache/"}
+    if not path.exists() or path.read_text() != content:
+        path.write_text(content)
+    return path
+
+
+TASK_PROFILE_INIT_SCRIPT = """// Generated by the Android build server: report task timings for build profiles
+import org.gradle.api.services.BuildService
+import org.gradle.api.services.BuildServiceParameters
+import org.gradle.build.event.BuildEventsListenerRegistry
+import org.gradle.tooling.events.FinishEvent
+import org.gradle.tooling.events.OperationCompletionListener
+import org.gradle.tooling.events.task.TaskFailureResult
+import org.gradle.tooling.events.task.TaskFinishEvent
+import org.gradle.tooling.events.task.TaskSkippedResult
+
+abstract class BuildServerTaskProfile implements BuildService<BuildServiceParameters.None>, OperationCompletionListener {
+    @Override
+    void onFinish(FinishEvent event) {
+        if (!(event instanceof TaskFinishEvent)) {
+            return
+        }
+        def result = event.result
+        def outcome
+        if (result instanceof TaskFailureResult) {
+            outcome = 'FAILED'
+        } else if (result instanceof TaskSkippedResult) {
+            outcome = result.skipMessage
+        } else if (result.fromCache) {
+            outcome = 'FROM-CACHE'
+        } else if (result.upToDate) {
+            outcome = 'UP-TO-DATE'
+        } else {
+            outcome = 'EXECUTED'
+        }
+        println "%(task_prefix)s${event.descriptor.taskPath} ${outcome} ${result.endTime - result.startTime}"
+    }
+}
+
+def configurationStarted = System.currentTimeMillis()
+gradle.projectsEvaluated {
+    println "%(config_prefix)s${System.currentTimeMillis() - configurationStarted}"
+}
+def profile = gradle.sharedServices.registerIfAbsent('buildServerTaskProfile', BuildServerTaskProfile) {}
+gradle.services.get(BuildEventsListenerRegistry).onTaskCompletion(profile)
+"""
+# Task completion listeners (BuildEventsListenerRegistry) exist since Gradle 6.1
+TASK_PROFILE_MIN_GRADLE = (6, 1)
+# Profiles kept per project
+PROFILE_HISTORY = 20
+
+
+class TaskProfile:
+    """Task timings and outcomes of one Gradle run.
+
+    Fed line by line from the output of a build run with the task profile
+    init script, which prints a marker line per finished task and one with
+    the configuration time. Outcomes are Gradle's: ``EXECUTED``,
+    ``UP-TO-DATE``, ``FROM-CACHE``, ``FAILED`` or a skip reason such as
+    ``NO-SOURCE``.
+    """
+
+    TASK_PREFIX = "##build-server-task "
+    CONFIG_PREFIX = "##build-server-config "
+
+    def __init__(self):
+        self.tasks = []
+        self.configuration_ms = None
+
+    @staticmethod
+    def supported(project_dir):
+        version = gradle_wrapper_version(project_dir)
+        match = re.match(r"(\d+)\.(\d+)", version or "")
+        return bool(match) and (int(match.group(1)), int(match.group(2))) >= TASK_PROFILE_MIN_GRADLE
+
+    def feed(self, line):
+        if line.startswith(self.TASK_PREFIX):
+            try:
+                path, rest = line[len(self.TASK_PREFIX):].split(" ", 1)
+                outcome, duration = rest.rsplit(" ", 1)
+                self.tasks.append({"path": path, "outcome": outcome, "ms": int(duration)})
+            except ValueError:
+                pass
+        elif line.startswith(self.CONFIG_PREFIX):
+            try:
+                self.configuration_ms = int(line[len(self.CONFIG_PREFIX):])
+            except ValueError:
+                pass
+
+    def summary(self):
+        outcomes = collections.Counter(task["outcome"] for task in self.tasks)
+        # Only tasks that ran or came from the cache could have been cache hits
+        cacheable = outcomes["FROM-CACHE"] + outcomes["EXECUTED"]
+        return {
+            "configuration_ms": self.configuration_ms,
+            "task_ms": sum(task["ms"] for task in self.tasks),
+            "tasks": len(self.tasks),
+            "outcomes": dict(outcomes),
+            "cache_hit_ratio": round(outcomes["FROM-CACHE"] / cacheable, 3) if cacheable else None,
+        }
+
+
+def task_profile_init_script():
+    """Write the init script that reports task timings."""
+    GRADLE_INIT_DIR.mkdir(exist_ok=True)
+    path = (GRADLE_INIT_DIR / "task-profile.gradle").resolve()
+    content = TASK_PROFILE_INIT_SCRIPT % {
+        "task_prefix": TaskProfile.TASK_PREFIX,
+        "config_prefix": TaskProfile.CONFIG_PREFIX,
+    }
+    if not path.exists() or path.read_text() != content:
+        path.write_text(content)
+    return path
+
+
+def build_profiles_path(project_name):
+    return LOGS_DIR / f"{project_name}.profiles.json"
+
+
+def save_build_profile(project_name, build_type, profile, returncode):
+    """Keep a build's task profile, dropping all but the last PROFILE_HISTORY."""
+    path = build_profiles_path(project_name)
+    profiles = _load_json_file(path, [])
+    profiles.append(dict(
+        profile.summary(),
+        build_type=build_type,
+        returncode=returncode,
+        timestamp=int(time.time()),
+        task_list=profile.tasks,
+    ))
+    _write_json_file(path, profiles[-PROFILE_HISTORY:])
+
+
+def build_profile_report(project_name, limit=10):
+    """Summarise stored profiles: slowest tasks of the latest build and per-build trends."""
+    profiles = _load_json_file(build_profiles_path(project_name), [])
+    if not profiles:
+        return None
+    latest = profiles[-1]
+    slowest = sorted(latest["task_list"], key=lambda task: task["ms"], reverse=True)[:limit]
+    history = [{k: v for k, v in p.items() if k != "task_list"} for p in reversed(profiles)]
+    return {"latest": history[0], "slowest_tasks": slowest, "history": history}
+
+
+class FailureSummary:
+    """Why a Gradle build failed, picked out of its output line by line.
+
+    Records the failing task, the headline under "What went wrong", and
+    errors with their kind (``kotlin``, ``java``, ``resource`` or
+    ``dependency``) and, where the compiler gives one, file, line and
+    column. Gradle repeats some errors in its final report, so duplicates
+    are dropped; past MAX_ERRORS they are only counted.
+    """
+
+    MAX_ERRORS = 20
+    TASK_PATTERNS = (
+        re.compile(r"^> Task (?P<task>:\S+) FAILED$"),
+        re.compile(r"Execution failed for task '(?P<task>:[^']+)'"),
+    )
+    ERROR_PATTERNS = (
+        ("kotlin", re.compile(r"^e: (?:file://)?(?P<file>\S.*?\.kts?):(?P<line>\d+):(?P<column>\d+) (?P<message>.+)$")),
+        ("kotlin", re.compile(r"^e: (?P<file>\S.*?\.kts?): \((?P<line>\d+), (?P<column>\d+)\): (?P<message>.+)$")),
+        ("java", re.compile(r"^(?P<file>\S.*?\.java):(?P<line>\d+): error: (?P<message>.+)$")),
+        ("resource", re.compile(
+            r"^(?:ERROR:\s*)?(?P<file>\S.*?):(?P<line>\d+)(?::(?P<column>\d+)[\d-]*)?: AAPT: error: (?P<message>.+)$"
+        )),
+        ("resource", re.compile(r"^(?:ERROR:\s*)?(?:AAPT: )?error: (?P<message>(?:resource|attribute|style attribute) .+)$")),
+        ("dependency", re.compile(r"^(?:> )?(?P<message>Could not (?:find|resolve) [\w.\-]+:[\w.\-]+(?::\S+)?\.?)$")),
+    )
+    WHAT_WENT_WRONG = "* What went wrong:"
+
+    def __init__(self):
+        self.task = None
+        self.headline = None
+        self.errors = []
+        self.error_count = 0
+        self._seen = set()
+        self._in_what_went_wrong = False
+
+    def feed(self, line):
+        stripped = line.strip()
+        if self._in_what_went_wrong:
+            if stripped:
+                self._in_what_went_wrong = False
+                if self.headline is None:
+                    self.headline = stripped
+        elif stripped == self.WHAT_WENT_WRONG:
+            self._in_what_went_wrong = True
+            return
+        if self.task is None:
+            for pattern in self.TASK_PATTERNS:
+                match = pattern.search(stripped)
+                if match:
+                    self.task = match.group("task")
+                    break
+        for kind, pattern in self.ERROR_PATTERNS:
+            match = pattern.match(stripped)
+            if match:
+                self._add(kind, match.groupdict())
+                return
+
+    def _add(self, kind, fields):
+        error = {"kind": kind, "message": fields["message"].strip()}
+        if fields.get("file"):
+            error["file"] = fields["file"]
+            error["line"] = int(fields["line"])
+            if fields.get("column"):
+                error["column"] = int(fields["column"])
+        key = tuple(sorted(error.items()))
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self.error_count += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(error)
+
+    def summary(self):
+        """The failure as a dict, or None if nothing was recognised."""
+        if self.task is None and self.headline is None and not self.errors:
+            return None
+        return {
+            "task": self.task,
+            "headline": self.headline,
+            "errors": self.errors,
+            "error_count": self.error_count,
+        }
+
+
+def run_gradle(project_name, project_dir, tasks, build_cache=False, profile=None, failures=None):
+    """Run gradlew tasks on a tracked daemon. Returns ``(returncode, tail, warm_daemon)``.
+
+    With ``build_cache`` the shared build cache is enabled through an init script.
+    A TaskProfile passed as ``profile`` is filled with the run's task timings,
+    and a FailureSummary passed as ``failures`` with the errors in its output.
+    """
+    gradlew = project_dir / "gradlew"
+    key = GRADLE_DAEMONS.daemon_key(project_dir)
+    expected_warm = GRADLE_DAEMONS.acquire(key, project_dir)
+    cold_start = []
+
+    def watch_daemon(line):
+        if not cold_start and line.startswith(GradleDaemonPool.COLD_START_MARKER):
+            cold_start.append(True)
+        if profile is not None:
+            profile.feed(line)
+        if failures is not None:
+            failures.feed(line)
+
+    cmd = [str(gradlew)] + GRADLE_DAEMONS.gradle_args()
+    if build_cache and BUILD_CACHE_ENABLED:
+        cmd += ["--build-cache", "--init-script", str(build_cache_init_script())]
+    if profile is not None:
+        cmd += ["--init-script", str(task_profile_init_script())]
+    cmd += list(tasks)
+    try:
+        returncode, tail = run_logged_command(cmd, project_dir, build_log_path(project_name), on_line=watch_daemon)
+    finally:
+        GRADLE_DAEMONS.release(key, expected_warm, bool(cold_start))
+    return returncode, tail, not cold_start
+
+
+# Directories that hold build outputs or tool state rather than build inputs
+FINGERPRINT_EXCLUDED_DIRS = {".git", ".gradle", ".idea", ".cxx", ".externalNativeBuild"}
+# Output directories, only skipped at the project root and in modules (included by the
+# settings file or next to a build script):
+# elsewhere (say a Java package named "build") they hold sources
+FINGERPRINT_OUTPUT_DIRS = {"build", "captures", "node_modules"}
+GRADLE_BUILD_SCRIPTS = ("build.gradle", "build.gradle.kts")
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def input_fingerprint(project_dir, build_type, index=None):
+    """Fingerprint a project's source inputs.
+
+    ``index`` maps relative paths to ``[mtime_ns, size, sha256]`` from a
+    previous run; files whose mtime and size are unchanged reuse that hash,
+    so only modified files are read. Returns ``(fingerprint, new_index)``.
+    """
+    index = index or {}
+    new_index = {}
+    modules = {project_dir} | {
+        project_dir.joinpath(*module.strip(":").split(":")) for module in settings_modules(project_dir)
+    }
+    for root, dirs, files in os.walk(project_dir):
+        is_module = Path(root) in modules or any(script in files for script in GRADLE_BUILD_SCRIPTS)
+        dirs[:] = [
+            d for d in dirs
+            if d not in FINGERPRINT_EXCLUDED_DIRS and not (is_module and d in FINGERPRINT_OUTPUT_DIRS)
+        ]
+        for name in files:
+            path = Path(root) / name
+            rel_path = path.relative_to(project_dir).as_posix()
+            try:
+                stat = path.stat()
+                previous = index.get(rel_path)
+                if previous and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+                    file_hash = previous[2]
+                else:
+                    file_hash = _hash_file(path)
+            except OSError:
+                # Vanished or unreadable files are not inputs
+                continue
+            new_index[rel_path] = [stat.st_mtime_ns, stat.st_size, file_hash]
+    digest = hashlib.sha256(f"{build_type}\n".encode())
+    for rel_path in sorted(new_index):
+        digest.update(f"{rel_path}\0{new_index[rel_path][2]}\n".encode())
+    return digest.hexdigest(), new_index
+
+
+def fingerprint_index_path(project_name):
+    return ARTIFACT_DIR / project_name / ".input-index.json"
+
+
+def build_record_path(project_name, build_type):
+    return ARTIFACT_DIR / project_name / f".last-{build_type}-build.json"
+
+
+def _load_json_file(path, default):
+    try:
+        with path.open("r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json_file(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def reusable_artifact(project_name, build_type, fingerprint):
+    """Return the artifact recorded for an identical earlier build, if it still exists."""
+    record = _load_json_file(build_record_path(project_name, build_type), {})
+    if record.get("fingerprint") != fingerprint or not record.get("artifact"):
+        return None
+    artifact = ARTIFACT_DIR / project_name / record["artifact"]
+    return artifact if artifact.is_file() else None
+
+
+def run_build(project_name, build_type, force=False):
+    project_dir = project_path(project_name)
+    if not project_dir:
+        return
+
+    phases = METRICS.phases("build", project_name)
+    job = BUILD_HISTORY.start_job(project_name, "build", variant=build_type)
+    log_source = build_log_path(project_name)
+    try:
+        write_status(project_name, "preparing", 10)
+        phases.start("fingerprint")
+        fingerprint, index = input_fingerprint(
+            project_dir, build_type, _load_json_file(fingerprint_index_path(project_name), {})
+        )
+        _write_json_file(fingerprint_index_path(project_name), index)
+        cached_apk = None if force else reusable_artifact(project_name, build_type, fingerprint)
+        if cached_apk:
+            logging.info("Inputs of %s unchanged, reusing %s", project_name, cached_apk.name)
+            # Gradle did not run, so the project's log belongs to an earlier job
+            log_source = None
+            job["artifact_sha256"] = _load_json_file(build_record_path(project_name, build_type), {}).get("sha256")
+            write_status(project_name, "done", 100, message="Inputs unchanged; reused previous APK.",
+                         artifact=f"/artifacts/{project_name}/{cached_apk.name}", up_to_date=True)
+            return
+
+        gradlew = project_dir / "gradlew"
+        subprocess.run(["chmod", "+x", str(gradlew)], check=True)
+
+        write_status(project_name, "building", 40)
+        phases.start("gradle")
+        profile = TaskProfile() if TaskProfile.supported(project_dir) else None
+        failures = FailureSummary()
+        returncode, tail, warm_daemon = run_gradle(
+            project_name, project_dir, [f"assemble{build_type.capitalize()}"], build_cache=True,
+            profile=profile, failures=failures,
+        )
+        job["exit_code"] = returncode
+        if profile is not None:
+            save_build_profile(project_name, build_type, profile, returncode)
+        if returncode != 0:
+            last_line = next((line for line in reversed(tail) if line.strip()), "")
+            logging.error("Build failed for %s (exit %s): %s", project_name, returncode, last_line)
+            failure = failures.summary()
+            job["failure"] = failure
+            extra = {"failure": failure} if failure else {}
+            write_status(project_name, "error", 0, message="Build failed. View logs for details.",
+                         warm_daemon=warm_daemon, **extra)
+            return
+
+        write_status(project_name, "finding_apk", 75, warm_daemon=warm_daemon)
+        phases.start("find_apk")
+        latest_apk = find_latest_apk(project_dir, build_type)
+        if not latest_apk:
+            write_status(project_name, "error", 0, message="APK not found in build outputs.")
+            return
+
+        phases.start("publish")
+        entry = ARTIFACT_STORE.publish(
+            project_name, latest_apk, build_type,
+            application_id=apk_application_id(project_dir, latest_apk),
+        )
+        job["artifact_sha256"] = entry["sha256"]
+        _write_json_file(build_record_path(project_name, build_type), {
+            "fingerprint": fingerprint,
+            "artifact": entry["name"],
+            "sha256": entry["sha256"],
+            "timestamp": int(time.time()),
+        })
+
+        artifact_url = f"/artifacts/{project_name}/{entry['name']}"
+        write_status(project_name, "done", 100, artifact=artifact_url, warm_daemon=warm_daemon)
+    except subprocess.CalledProcessError as e:
+        # Capture failed build output
+        try:
+            # Try to get stderr if available
+            error_output = e.stderr if hasattr(e, 'stderr') and e.stderr else ""
+            stdout_output = e.stdout if hasattr(e, 'stdout') and e.stdout else ""
+            log_content = f"{stdout_output}\n{error_output}".strip()
+            if not log_content:
+                log_content = str(e)
+            save_build_log(project_name, log_content)
+        except Exception:
+            save_build_log(project_name, str(e))
+        
+        logging.error("Build failed for %s: %s", project_name, e)
+        write_status(project_name, "error", 0, message="Build failed. View logs for details.")
+    except Exception as e:
+        save_build_log(project_name, f"Unexpected error: {str(e)}")
+        logging.error("Unexpected build error for %s: %s", project_name, e)
+        write_status(project_name, "error", 0, message="Unexpected error. View logs for details.")
+    finally:
+        phases.finish()
+        BUILD_HISTORY.finish_job(job, log_source=log_source)
+        with BUILD_LOCK:
+            ACTIVE_BUILDS.pop(project_name, None)
+
+
+def run_clean_cache(project_name):
+    """Clean Gradle cache for a project."""
+    project_dir = project_path(project_name)
+    if not project_dir:
+        return
+
+    phases = METRICS.phases("clean", project_name)
+    job = BUILD_HISTORY.start_job(project_name, "clean")
+    try:
+        write_status(project_name, "cleaning", 10, message="Cleaning Gradle cache...")
+        gradlew = project_dir / "gradlew"
+        subprocess.run(["chmod", "+x", str(gradlew)], check=True)
+
+        # Run gradle clean
+        write_status(project_name, "cleaning", 50, message="Running gradle clean...")
+        phases.start("gradle")
+        returncode, _, _ = run_gradle(project_name, project_dir, ["clean"])
+        job["exit_code"] = returncode
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, ["gradlew", "clean"])
+
+        # Also clean .gradle directory in project
+        phases.start("remove_build_dirs")
+        gradle_cache = project_dir / ".gradle"
+        if gradle_cache.exists():
+            shutil.rmtree(str(gradle_cache), ignore_errors=True)
+
+        # Clean build directory
+        build_dir = project_dir / "build"
+        if build_dir.exists():
+            shutil.rmtree(str(build_dir), ignore_errors=True)
+
+        app_build_dir = project_dir / "app" / "build"
+        if app_build_dir.exists():
+            shutil.rmtree(str(app_build_dir), ignore_errors=True)
+
+        write_status(project_name, "done", 100, message="Cache cleaned successfully.")
+    except subprocess.CalledProcessError as e:
+        logging.error("Clean cache failed for %s: %s", project_name, e)
+        write_status(project_name, "error", 0, message="Clean cache failed. View logs for details.")
+    except Exception as e:
+        save_build_log(project_name, f"Unexpected error: {str(e)}")
+        logging.error("Unexpected clean error for %s: %s", project_name, e)
+        write_status(project_name, "error", 0, message="Unexpected error. View logs for details.")
+    finally:
+        phases.finish()
+        BUILD_HISTORY.finish_job(job, log_source=build_log_path(project_name))
+        with BUILD_LOCK:
+            ACTIVE_BUILDS.pop(project_name, None)
+
+
+class BuildScheduler:
+    """Run Gradle jobs with bounded concurrency and priority lanes.
+
+    Up to ``max_workers`` jobs run at once, each on its own worker thread
+    which picks up the next queued job when it finishes. Queued jobs are
+    ordered by lane (interactive before batch), then by submission order,
+    and their status shows their current queue position.
+    """
+
+    LANES = {"interactive": 0, "batch": 1}
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or MAX_CONCURRENT_BUILDS
+        self._lock = threading.Lock()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._local = threading.local()
+
+    def submit(self, project_name, target, args=(), priority="batch"):
+        """Start a job now if a slot is free, otherwise queue it. Returns the job."""
+        job = {
+            "project": project_name,
+            "target": target,
+            "args": args,
+            "priority": priority,
+            "submitted": time.time(),
+        }
+        with self._lock:
+            if self._running < self.max_workers:
+                self._running += 1
+                job["state"] = "running"
+            else:
+                job["state"] = "queued"
+                heapq.heappush(self._queue, (self.LANES[priority], next(self._sequence), job))
+                self._publish_positions()
+        if job["state"] == "running":
+            threading.Thread(target=self._work, args=(job,), daemon=True).start()
+        return job
+
+    def queued(self):
+        """Return queued jobs in the order they will run."""
+        with self._lock:
+            return [entry[2] for entry in sorted(self._queue)]
+
+    def running_count(self):
+        with self._lock:
+            return self._running
+
+    def current_job(self):
+        """Return the job running on the calling thread, if it was scheduled."""
+        return getattr(self._local, "job", None)
+
+    def _work(self, job):
+        while job is not None:
+            job["started"] = time.time()
+            METRICS.observe("build_server_queue_wait_seconds", job["started"] - job["submitted"],
+                            lane=job["priority"])
+            self._local.job = job
+            try:
+                job["target"](*job["args"])
+            except Exception:
+                logging.exception("Scheduled job for %s crashed", job["project"])
+            finally:
+                self._local.job = None
+            with self._lock:
+                if self._queue:
+                    job = heapq.heappop(self._queue)[2]
+                    job["state"] = "running"
+                    self._publish_positions()
+                else:
+                    job = None
+                    self._running -= 1
+
+    def _publish_positions(self):
+        # Called with _lock held: a job popped after its position was listed
+        # would otherwise have its running status overwritten with "queued"
+        for position, job in enumerate((entry[2] for entry in sorted(self._queue)), start=1):
+            write_status(
+                job["project"], "queued", 0,
+                message=f"Waiting for a build slot (position {position})",
+                queue_position=position,
+                priority=job["priority"],
+            )
+
+
+BUILD_SCHEDULER = BuildScheduler()
+
+
+# ioctl that clones a file's extents (reflink) on btrfs/XFS
+FICLONE = 0x40049409
+
+
+def _clone_or_copy(source, target):
+    """Copy a file, sharing its blocks with a reflink where the filesystem allows."""
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as src, open(target, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(str(source), str(target))
+            return
+        except OSError:
+            pass
+    shutil.copy2(str(source), str(target))
+
+
+class ArtifactStore:
+    """Content-addressed APK storage.
+
+    Each distinct APK is stored once under ``artifacts/.objects/<sha256>.apk``
+    and published to ``artifacts/<project>/<name>-<sha12>.apk`` as a hard link.
+    ``artifacts/<project>/.artifacts.json`` indexes every build (newest last)
+    and is cached in memory, so finding the latest artifact is a dict lookup.
+    Old builds beyond the project's retention are unlinked, and blobs no
+    longer linked from any project are deleted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = {}
+
+    def objects_dir(self):
+        return ARTIFACT_DIR / ".objects"
+
+    def index_path(self, project_name):
+        return ARTIFACT_DIR / project_name / ".artifacts.json"
+
+    def publish(self, project_name, source, build_type=None, application_id=None):
+        """Add an APK to the store and the project's index. Returns the index entry."""
+        source = Path(source)
+        sha256 = _hash_file(source)
+        size = source.stat().st_size
+        name = f"{source.stem}-{sha256[:12]}{source.suffix}"
+        project_artifacts = ARTIFACT_DIR / project_name
+        project_artifacts.mkdir(parents=True, exist_ok=True)
+        self.objects_dir().mkdir(parents=True, exist_ok=True)
+        blob = self.objects_dir() / f"{sha256}.apk"
+        with self._lock:
+            if not blob.exists():
+                tmp_path = blob.with_name(f".{blob.name}.tmp")
+                _clone_or_copy(source, tmp_path)
+                os.replace(tmp_path, blob)
+            target = project_artifacts / name
+            if not target.exists():
+                try:
+                    os.link(blob, target)
+                except OSError:
+                    shutil.copy2(str(blob), str(target))
+            index = self._index(project_name)
+            entry = {
+                "build": index["next_build"],
+                "build_type": build_type,
+                "name": name,
+                "sha256": sha256,
+                "size": size,
+                "timestamp": int(time.time()),
+            }
+            if application_id:
+                entry["application_id"] = application_id
+            index["next_build"] += 1
+            index["artifacts"].append(entry)
+            expired = self._apply_retention(project_name, index)
+            _write_json_file(self.index_path(project_name), index)
+        logging.info("Published %s for %s (%s)", name, project_name, sha256[:12])
+        if expired:
+            logging.info("Removed %d old artifacts of %s", len(expired), project_name)
+        return dict(entry)
+
+    def artifacts(self, project_name):
+        """Return the project's indexed artifacts, newest first."""
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._index(project_name)["artifacts"])]
+
+    def latest(self, project_name, build_type=None):
+        with self._lock:
+            for entry in reversed(self._index(project_name)["artifacts"]):
+                if build_type is None or entry.get("build_type") == build_type:
+                    return dict(entry)
+        return None
+
+    def find(self, project_name, name):
+        """Return the indexed entry published under ``name``, if any."""
+        with self._lock:
+            for entry in reversed(self._index(project_name)["artifacts"]):
+                if entry["name"] == name:
+                    return dict(entry)
+        return None
+
+    def get(self, project_name, build):
+        with self._lock:
+            for entry in self._index(project_name)["artifacts"]:
+                if entry["build"] == build:
+                    return dict(entry)
+        return None
+
+    def disk_usage(self):
+        """Return the bytes used under the artifact directory, counting hard links once."""
+        seen = set()
+        total = 0
+        for root, _, files in os.walk(ARTIFACT_DIR):
+            for name in files:
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                if (stat.st_dev, stat.st_ino) not in seen:
+                    seen.add((stat.st_dev, stat.st_ino))
+                    total += stat.st_size
+        return total
+
+    def retention(self, project_name):
+        with self._lock:
+            return self._index(project_name).get("retention") or ARTIFACT_RETENTION
+
+    def set_retention(self, project_name, keep):
+        """Keep ``keep`` artifacts for the project (None restores the default)."""
+        with self._lock:
+            index = self._index(project_name)
+            index["retention"] = keep
+            self._apply_retention(project_name, index)
+            _write_json_file(self.index_path(project_name), index)
+
+    def _index(self, project_name):
+        key = str(self.index_path(project_name))
+        index = self._indexes.get(key)
+        if index is None:
+            index = _load_json_file(self.index_path(project_name), None) or {
+                "next_build": 1, "retention": None, "artifacts": []
+            }
+            self._indexes[key] = index
+        return index
+
+    def _apply_retention(self, project_name, index):
+        keep = index.get("retention") or ARTIFACT_RETENTION
+        expired = index["artifacts"][:-keep] if len(index["artifacts"]) > keep else []
+        index["artifacts"] = index["artifacts"][len(expired):]
+        still_used = {entry["name"] for entry in index["artifacts"]}
+        for entry in expired:
+            if entry["name"] in still_used:
+                continue
+            try:
+                (ARTIFACT_DIR / project_name / entry["name"]).unlink()
+            except OSError:
+                pass
+            self._collect_blob(entry["sha256"])
+        return expired
+
+    def _collect_blob(self, sha256):
+        blob = self.objects_dir() / f"{sha256}.apk"
+        try:
+            if blob.stat().st_nlink <= 1:
+                blob.unlink()
+        except OSError:
+            pass
+
+
+ARTIFACT_STORE = ArtifactStore()
+
+
+class StaticAssets:
+    """Dashboard files held in memory with precompressed variants.
+
+    ``script.js`` and ``styles.css`` are also exposed under content
+    fingerprinted URLs (``/static/script.<hash>.js``) that index.html is
+    rewritten to use, so they can be cached indefinitely while index.html
+    itself is revalidated with its ETag on every load.
+    """
+
+    FILES = {
+        "index.html": "text/html; charset=utf-8",
+        "script.js": "application/javascript; charset=utf-8",
+        "styles.css": "text/css; charset=utf-8",
+    }
+    IMMUTABLE = "public, max-age=31536000, immutable"
+
+    def __init__(self, root=None):
+        self.root = root
+        self._lock = threading.Lock()
+        self._routes = None
+
+    def load(self):
+        """Read, fingerprint and compress every asset."""
+        root = Path(self.root or STATIC_DIR)
+        routes = {}
+        fingerprinted = {}
+        for name in ("script.js", "styles.css"):
+            body = (root / name).read_bytes()
+            digest = hashlib.sha256(body).hexdigest()[:12]
+            stem, extension = name.rsplit(".", 1)
+            url = f"/static/{stem}.{digest}.{extension}"
+            fingerprinted[name] = url
+            routes[url] = self._asset(body, self.FILES[name], digest, self.IMMUTABLE)
+            routes[f"/{name}"] = self._asset(body, self.FILES[name], digest, "no-cache")
+        html = (root / "index.html").read_text(encoding="utf-8")
+        html = html.replace('href="styles.css"', f'href="{fingerprinted["styles.css"]}"')
+        html = html.replace('src="script.js"', f'src="{fingerprinted["script.js"]}"')
+        body = html.encode("utf-8")
+        page = self._asset(body, self.FILES["index.html"], hashlib.sha256(body).hexdigest()[:12], "no-cache")
+        routes["/"] = routes["/index.html"] = page
+        with self._lock:
+            self._routes = routes
+
+    def get(self, url_path):
+        """Return the asset for a URL path, or None if it is not served."""
+        with self._lock:
+            routes = self._routes
+        if routes is None:
+            self.load()
+            routes = self._routes
+        return routes.get(url_path)
+
+    @staticmethod
+    def _asset(body, content_type, digest, cache_control):
+        return {
+            "body": body,
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+            "content_type": content_type,
+            "etag": f'"{digest}"',
+            "cache_control": cache_control,
+        }
+
+
+STATIC_ASSETS = StaticAssets()
+
+
+def parse_byte_range(header, size):
+    """Parse a single ``bytes=`` Range header into an inclusive ``(start, end)``.
+
+    Returns None when the header should be ignored (absent, malformed or
+    several ranges) and raises ValueError when the range cannot be satisfied.
+    """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", header or "")
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def latest_artifact_path(project_name):
+    entry = ARTIFACT_STORE.latest(project_name)
+    if entry:
+        path = ARTIFACT_DIR / project_name / entry["name"]
+        if path.exists():
+            return path
+    # Artifacts copied before the store existed
+    project_artifacts = ARTIFACT_DIR / project_name
+    if project_artifacts.exists():
+        artifacts = list(project_artifacts.glob("*.apk"))
+        if artifacts:
+            artifacts.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+            return artifacts[0]
     return None
 
 
-def find_adb():
-    """Find adb executable in common locations or PATH."""
-    # Common Android SDK locations
-    common_paths = [
-        "/home/android/sdk/platform-tools/adb",
-        os.path.expanduser("~/Android/Sdk/platform-tools/adb"),
-        os.path.expanduser("~/sdk/platform-tools/adb"),
-        "/opt/android-sdk/platform-tools/adb",
-    ]
-    
-    # Check common paths first
-    for path in common_paths:
-        if os.path.isfile(path) and os.access(path, os.X_OK):
-            return path
-    
-    # Check PATH
-    adb_path = shutil.which("adb")
-    if adb_path:
-        return adb_path
-    
-    return None
+_ADB_PATH = None
+
+
+def find_adb():
+    """Find adb executable in common locations or PATH.
+
+    The path found last time is reused as long as it is still executable.
+    """
+    global _ADB_PATH
+    if _ADB_PATH and os.path.isfile(_ADB_PATH) and os.access(_ADB_PATH, os.X_OK):
+        return _ADB_PATH
+
+    # Common Android SDK locations
+    common_paths = [
+        "/home/android/sdk/platform-tools/adb",
+        os.path.expanduser("~/Android/Sdk/platform-tools/adb"),
+        os.path.expanduser("~/sdk/platform-tools/adb"),
+        "/opt/android-sdk/platform-tools/adb",
+    ]
+    
+    # Check common paths first
+    for path in common_paths:
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            _ADB_PATH = path
+            return path
+    
+    # Check PATH
+    adb_path = shutil.which("adb")
+    _ADB_PATH = adb_path
+    return adb_path
+
+
+class AdbError(Exception):
+    """The ADB server or the device refused a request."""
+
+
+class AdbStreamingUnsupported(AdbError):
+    """The device cannot take an APK streamed over the connection."""
+
+
+class AdbClient:
+    """Client for the ADB server's host protocol on localhost.
+
+    Requests go straight to the running ADB server instead of spawning the
+    adb CLI. Every request is a ``<4 hex digit length><payload>`` message
+    answered with ``OKAY`` or ``FAIL <length><message>``. Host services
+    close the connection after answering, so each call opens its own
+    (local, cheap) connection. The CLI is only used to start the server.
+    """
+
+    def __init__(self, host="127.0.0.1", port=ADB_SERVER_PORT, timeout=ADB_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._start_lock = threading.Lock()
+        self._start_attempted = False
+
+    def _open(self, timeout=None):
+        return socket.create_connection((self.host, self.port), timeout=timeout or self.timeout)
+
+    @staticmethod
+    def _recv_exact(sock, size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise AdbError("ADB server closed the connection")
+            data += chunk
+        return data
+
+    def _read_string(self, sock):
+        length = int(self._recv_exact(sock, 4), 16)
+        return self._recv_exact(sock, length).decode("utf-8", errors="replace")
+
+    @staticmethod
+    def _read_all(sock):
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks).decode("utf-8", errors="replace")
+            chunks.append(chunk)
+
+    def _send(self, sock, request):
+        payload = request.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+        status = self._recv_exact(sock, 4)
+        if status == b"FAIL":
+            raise AdbError(self._read_string(sock))
+        if status != b"OKAY":
+            raise AdbError(f"Unexpected ADB response {status!r}")
+
+    def _host(self, request, timeout=None):
+        with self._open(timeout) as sock:
+            self._send(sock, request)
+            return self._read_string(sock)
+
+    def _service(self, serial, request, timeout=None):
+        """Open ``request`` on a device; returns the socket streaming its data."""
+        sock = self._open(timeout)
+        try:
+            self._send(sock, f"host:transport:{serial}")
+            self._send(sock, request)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def available(self):
+        """Return True if the ADB server answers, starting it through the CLI if needed."""
+        try:
+            self.version()
+            self._start_attempted = False
+            return True
+        except (OSError, AdbError):
+            pass
+        with self._start_lock:
+            if self._start_attempted:
+                return False
+            self._start_attempted = True
+            adb_path = find_adb()
+            if not adb_path:
+                return False
+            try:
+                subprocess.run([adb_path, "start-server"], capture_output=True, timeout=ADB_TIMEOUT)
+            except (OSError, subprocess.SubprocessError) as e:
+                logging.error("Could not start the ADB server: %s", e)
+                return False
+        try:
+            self.version()
+            return True
+        except (OSError, AdbError):
+            return False
+
+    def version(self):
+        return int(self._host("host:version"), 16)
+
+    def devices(self):
+        """Return ``[{"serial": ..., "state": ...}]`` for every device the server knows."""
+        devices = []
+        for line in self._host("host:devices").splitlines():
+            serial, _, state = line.partition("\t")
+            if serial:
+                devices.append({"serial": serial, "state": state.strip()})
+        return devices
+
+    def connect(self, address, timeout=None):
+        """Connect the server to a network device; returns the server's message."""
+        message = self._host(f"host:connect:{address}", timeout)
+        if not message.startswith(("connected to", "already connected to")):
+            raise AdbError(message)
+        return message
+
+    def shell(self, serial, command, timeout=None):
+        """Run a shell command on the device and return its output."""
+        with self._service(serial, f"shell:{command}", timeout) as sock:
+            return self._read_all(sock)
+
+    def install(self, serial, apk_path, timeout=ADB_INSTALL_TIMEOUT):
+        """Stream an APK to the device's package manager and install it.
+
+        Uses ``cmd package install -S`` (Android 7+), which reads the APK
+        from the connection, so nothing is pushed to the device's storage
+        first. Returns the package manager's output.
+        """
+        apk_path = Path(apk_path)
+        size = apk_path.stat().st_size
+        with self._open(timeout) as sock:
+            self._send(sock, f"host:transport:{serial}")
+            try:
+                self._send(sock, f"exec:cmd package install -r -S {size}")
+            except AdbError as e:
+                raise AdbStreamingUnsupported(str(e)) from e
+            with apk_path.open("rb") as f:
+                sock.sendfile(f)
+            output = self._read_all(sock)
+        if "Success" in output:
+            return output
+        if "Failure" in output:
+            raise AdbError(output.strip())
+        # e.g. "cmd: not found" on devices before Android 7
+        raise AdbStreamingUnsupported(output.strip() or "no output")
+
+
+ADB_CLIENT = AdbClient()
+
+
+class DeviceMonitor:
+    """Keeps the configured network devices connected and tracks their health.
+
+    Once started, a background thread reconnects every device in
+    device.json through the ADB server and records its state (``online``,
+    ``offline``, ``unauthorized``, or ``unknown`` without an ADB server)
+    every ``interval`` seconds. A failing device is retried with
+    exponential backoff up to ``max_backoff`` seconds.
+    """
+
+    # ADB device states that are not simply "offline"
+    STATES = {"device": "online", "unauthorized": "unauthorized"}
+
+    def __init__(self, interval=DEVICE_CHECK_INTERVAL, max_backoff=DEVICE_MAX_BACKOFF,
+                 timeout=DEVICE_CONNECT_TIMEOUT):
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._health = {}
+        self._next_check = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def state(self, address):
+        """Return the last known health of a device."""
+        with self._lock:
+            health = self._health.get(address)
+            return dict(health) if health else {"state": "unknown"}
+
+    def check(self, address):
+        """Connect to the device now and record its state."""
+        message = None
+        try:
+            if not ADB_CLIENT.available():
+                state, message = "unknown", "ADB server is not running"
+            else:
+                ADB_CLIENT.connect(address, timeout=self.timeout)
+                devices = {d["serial"]: d["state"] for d in ADB_CLIENT.devices()}
+                adb_state = devices.get(address)
+                state = self.STATES.get(adb_state, "offline")
+                if state != "online":
+                    message = adb_state or "not connected"
+        except (OSError, AdbError) as e:
+            state, message = "offline", str(e) or "connection timed out"
+        now = time.time()
+        with self._lock:
+            previous = self._health.get(address, {})
+            failures = 0 if state == "online" else previous.get("failures", 0) + 1
+            health = {"state": state, "checked": int(now), "failures": failures}
+            if message:
+                health["message"] = message
+            self._health[address] = health
+            delay = min(self.interval * 2 ** failures, self.max_backoff) if failures else self.interval
+            self._next_check[address] = now + delay
+        if previous.get("state") != state:
+            logging.info("Device %s is %s", address, state)
+        return dict(health)
+
+    def ensure(self, address):
+        """Return the device's health, checking it now unless it was seen online recently."""
+        health = self.state(address)
+        if health["state"] == "online" and time.time() - health["checked"] < 2 * self.interval:
+            return health
+        return self.check(address)
+
+    def check_due(self):
+        """Check every configured device whose next check is due."""
+        addresses = {d["address"] for d in load_device().get("devices", []) if d.get("address")}
+        now = time.time()
+        with self._lock:
+            for address in set(self._health) - addresses:
+                self._health.pop(address, None)
+                self._next_check.pop(address, None)
+            due = [a for a in sorted(addresses) if self._next_check.get(a, 0) <= now]
+        if due:
+            with ThreadPoolExecutor(max_workers=min(DEPLOY_WORKERS, len(due)), thread_name_prefix="device-check") as pool:
+                list(pool.map(self.check, due))
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="device-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check_due()
+            except Exception as e:
+                logging.error("Device health check failed: %s", e)
+            self._stop.wait(1)
+
+
+DEVICE_MONITOR = DeviceMonitor()
 
 
 def run_pair_device(pair_address, pairing_code):
@@ -442,6 +3096,182 @@ def run_pair_device(pair_address, pairing_code):
         return {"success": False, "message": f"Unexpected error: {str(e)}"}
 
 
+def deploy_artifact(project_name, project_dir, build_type=None):
+    """Return ``(apk_path, entry)`` for the APK to deploy.
+
+    That is the latest artifact, else the newest build output (which gets
+    published). ``entry`` is the artifact's index entry, or None for
+    artifacts copied before the store existed.
+    """
+    apk_path = latest_artifact_path(project_name)
+    entry = ARTIFACT_STORE.latest(project_name)
+    if not apk_path and build_type:
+        latest_apk = find_latest_apk(project_dir, build_type)
+        if latest_apk:
+            entry = ARTIFACT_STORE.publish(
+                project_name, latest_apk, build_type,
+                application_id=apk_application_id(project_dir, latest_apk),
+            )
+            apk_path = ARTIFACT_DIR / project_name / entry["name"]
+    if not apk_path:
+        return None, None
+    if not entry or entry["name"] != Path(apk_path).name:
+        entry = None
+    # Ensure absolute path
+    return Path(apk_path).resolve(), entry
+
+
+_INSTALL_RECORDS_LOCK = threading.Lock()
+
+
+def install_records_path():
+    return ARTIFACT_DIR / ".installs.json"
+
+
+def record_install(device_addr, package, sha256, device_path):
+    """Remember which APK (by hash) is installed for a package on a device."""
+    with _INSTALL_RECORDS_LOCK:
+        records = _load_json_file(install_records_path(), {})
+        records[f"{device_addr}/{package}"] = {
+            "sha256": sha256,
+            "path": device_path,
+            "timestamp": int(time.time()),
+        }
+        _write_json_file(install_records_path(), records)
+
+
+def installed_record(device_addr, package):
+    with _INSTALL_RECORDS_LOCK:
+        return _load_json_file(install_records_path(), {}).get(f"{device_addr}/{package}")
+
+
+def device_shell(adb_path, device_addr, command):
+    """Run a shell command on a device, through the ADB server when possible."""
+    if ADB_CLIENT.available():
+        return ADB_CLIENT.shell(device_addr, command, timeout=ADB_TIMEOUT)
+    result = subprocess.run(
+        [adb_path, "-s", device_addr, "shell", command],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        timeout=ADB_TIMEOUT,
+    )
+    return result.stdout
+
+
+def installed_apk_path(adb_path, device_addr, package):
+    """Return the path of the package's base APK on the device, or None."""
+    output = device_shell(adb_path, device_addr, f"pm path {package}")
+    paths = [line[len("package:"):].strip() for line in output.splitlines() if line.startswith("package:")]
+    return next((path for path in paths if path.endswith("/base.apk")), paths[0] if paths else None)
+
+
+def already_installed(adb_path, device_addr, artifact):
+    """Return True if the device has exactly this artifact installed.
+
+    Only checked when the last install recorded for the device and package
+    was this artifact: the package must still live at the recorded path
+    and the file there must have the artifact's SHA-256.
+    """
+    package = artifact.get("application_id")
+    if not package:
+        return False
+    record = installed_record(device_addr, package)
+    if not record or record.get("sha256") != artifact["sha256"]:
+        return False
+    device_path = installed_apk_path(adb_path, device_addr, package)
+    if not device_path or device_path != record.get("path"):
+        return False
+    checksum = device_shell(adb_path, device_addr, f"sha256sum {shlex.quote(device_path)}").split()
+    return bool(checksum) and checksum[0] == artifact["sha256"]
+
+
+def install_on_device(adb_path, device_addr, apk_path, deploy_log, on_connected=None, artifact=None):
+    """Connect to a device and install an APK, appending adb's output to deploy_log.
+
+    Talks to the ADB server directly when it is reachable and falls back to
+    the adb CLI otherwise, or when the device cannot stream installs. If
+    ``artifact`` (the APK's index entry) is given, the install is skipped
+    when the device already has it. Returns False if the install was
+    skipped. Raises AdbError or subprocess.CalledProcessError if a step fails.
+    """
+    native = ADB_CLIENT.available()
+    deploy_log.append(f"Connecting to device {device_addr}:")
+    if native:
+        # Reuses the transport the device monitor keeps open; fails fast on dead devices
+        health = DEVICE_MONITOR.ensure(device_addr)
+        if health["state"] != "online":
+            raise AdbError(f"Device {device_addr} is {health['state']}: {health.get('message', '')}".rstrip(": "))
+        deploy_log.append(f"{device_addr} is online")
+    else:
+        connect_result = subprocess.run(
+            [adb_path, "connect", device_addr],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            timeout=DEVICE_CONNECT_TIMEOUT
+        )
+        deploy_log.append(connect_result.stdout)
+        if connect_result.stderr:
+            deploy_log.append(connect_result.stderr)
+        connect_result.check_returncode()
+
+    if on_connected:
+        on_connected()
+    package = artifact.get("application_id") if artifact else None
+    if package:
+        try:
+            if already_installed(adb_path, device_addr, artifact):
+                deploy_log.append(f"\n{apk_path.name} is already installed as {package}; skipping install.")
+                return False
+        except (AdbError, OSError, subprocess.SubprocessError) as e:
+            deploy_log.append(f"Could not check the installed version of {package}: {e}")
+
+    deploy_log.append(f"\nInstalling APK {apk_path.name}:")
+    if native:
+        try:
+            deploy_log.append(ADB_CLIENT.install(device_addr, apk_path))
+        except AdbStreamingUnsupported as e:
+            deploy_log.append(f"Streaming install not supported ({e}); using adb install")
+            _run_adb_install(adb_path, device_addr, apk_path, deploy_log)
+    else:
+        _run_adb_install(adb_path, device_addr, apk_path, deploy_log)
+
+    if package:
+        try:
+            device_path = installed_apk_path(adb_path, device_addr, package)
+            if device_path:
+                record_install(device_addr, package, artifact["sha256"], device_path)
+        except (AdbError, OSError, subprocess.SubprocessError) as e:
+            logging.warning("Could not record install of %s on %s: %s", package, device_addr, e)
+    return True
+
+
+def _run_adb_install(adb_path, device_addr, apk_path, deploy_log):
+    # With several devices connected adb needs the serial to pick one
+    install_result = subprocess.run(
+        [adb_path, "-s", device_addr, "install", "-r", str(apk_path)],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace"
+    )
+    deploy_log.append(install_result.stdout)
+    if install_result.stderr:
+        deploy_log.append(install_result.stderr)
+    install_result.check_returncode()
+
+
+def _log_deploy_error(deploy_log, error):
+    deploy_log.append(f"\nError: {str(error)}")
+    if getattr(error, "stdout", None):
+        deploy_log.append(f"stdout: {error.stdout}")
+    if getattr(error, "stderr", None):
+        deploy_log.append(f"stderr: {error.stderr}")
+
+
 def run_deploy(project_name, device_addr, build_type=None):
     if not device_addr:
         write_status(project_name, "error", 0, message="Device address not set.")
@@ -451,119 +3281,620 @@ def run_deploy(project_name, device_addr, build_type=None):
     if not project_dir:
         return
 
+    job = BUILD_HISTORY.start_job(project_name, "deploy", variant=build_type, device=device_addr)
     adb_path = find_adb()
     if not adb_path:
         error_msg = "ADB not found. Please install Android SDK platform-tools."
         logging.error("ADB not found for deployment of %s", project_name)
         write_status(project_name, "error", 0, message=error_msg)
+        BUILD_HISTORY.finish_job(job)
         return
 
     deploy_log = []
-    
-    try:
-        write_status(project_name, "connecting_device", 10)
-        connect_result = subprocess.run(
-            [adb_path, "connect", device_addr],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace"
-        )
-        deploy_log.append(f"Connecting to device {device_addr}:")
-        deploy_log.append(connect_result.stdout)
-        if connect_result.stderr:
-            deploy_log.append(connect_result.stderr)
-        connect_result.check_returncode()
+    phases = METRICS.phases("deploy", project_name)
+    # Deploy output goes to the device's own log; the project log belongs to builds
+    device_id = next(
+        (d["id"] for d in load_device().get("devices", []) if d.get("address") == device_addr), device_addr
+    )
 
-        apk_path = latest_artifact_path(project_name)
-        if not apk_path and build_type:
-            latest_apk = find_latest_apk(project_dir, build_type)
-            if latest_apk:
-                project_artifacts = ARTIFACT_DIR / project_name
-                project_artifacts.mkdir(parents=True, exist_ok=True)
-                apk_path = project_artifacts / latest_apk.name
-                shutil.copy2(str(latest_apk), str(apk_path))
+    def connected():
+        phases.start("install")
+        write_status(project_name, "installing_apk", 70)
 
+    try:
+        phases.start("find_apk")
+        apk_path, artifact = deploy_artifact(project_name, project_dir, build_type)
         if not apk_path:
             write_status(project_name, "error", 0, message="No APK available to deploy.")
             return
-
-        # Ensure absolute path
-        apk_path = Path(apk_path).resolve()
         if not apk_path.exists():
             write_status(project_name, "error", 0, message=f"APK file not found: {apk_path}")
             return
+        if artifact:
+            job["artifact_sha256"] = artifact["sha256"]
 
-        write_status(project_name, "installing_apk", 70)
-        install_result = subprocess.run(
-            [adb_path, "install", "-r", str(apk_path)],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace"
+        write_status(project_name, "connecting_device", 10)
+        phases.start("connect")
+        installed = install_on_device(
+            adb_path, device_addr, apk_path, deploy_log,
+            on_connected=connected,
+            artifact=artifact,
         )
-        deploy_log.append(f"\nInstalling APK {apk_path.name}:")
-        deploy_log.append(install_result.stdout)
-        if install_result.stderr:
-            deploy_log.append(install_result.stderr)
-        
-        # Save deploy log
-        log_content = "\n".join(deploy_log)
-        save_build_log(project_name, log_content)  # Reuse build log storage for deploy logs
-        
-        install_result.check_returncode()
-        write_status(project_name, "deployed", 100, message="APK installed on device.")
-    except subprocess.CalledProcessError as e:
+        if installed:
+            write_status(project_name, "deployed", 100, message="APK installed on device.", log_device=device_id)
+        else:
+            write_status(project_name, "deployed", 100, message="APK already installed on device.",
+                         unchanged=True, log_device=device_id)
+    except (subprocess.CalledProcessError, AdbError) as e:
         # Capture failed deploy output
-        deploy_log.append(f"\nError: {str(e)}")
-        if hasattr(e, 'stdout') and e.stdout:
-            deploy_log.append(f"stdout: {e.stdout}")
-        if hasattr(e, 'stderr') and e.stderr:
-            deploy_log.append(f"stderr: {e.stderr}")
-        
-        log_content = "\n".join(deploy_log)
-        save_build_log(project_name, log_content)
-        
+        _log_deploy_error(deploy_log, e)
         logging.error("Deploy failed for %s: %s", project_name, e)
-        write_status(project_name, "error", 0, message="Deploy failed. View logs for details.")
+        write_status(project_name, "error", 0, message="Deploy failed. View logs for details.", log_device=device_id)
+    except Exception as e:
+        deploy_log.append(f"Unexpected error: {str(e)}")
+        logging.error("Unexpected deploy error for %s: %s", project_name, e)
+        write_status(project_name, "error", 0, message="Unexpected error. View logs for details.",
+                     log_device=device_id)
+    finally:
+        phases.finish()
+        log_path = save_deploy_log(project_name, device_id, deploy_log) if deploy_log else None
+        BUILD_HISTORY.finish_job(job, log_source=log_path)
+
+
+def run_multi_deploy(project_name, devices, build_type=None):
+    """Install the project's APK on several devices at once.
+
+    Devices are installed to in parallel by up to DEPLOY_WORKERS threads, so
+    the deploy takes as long as the slowest device rather than the sum of
+    all of them. The state of every device is reported in the status
+    ``devices`` field and its adb output goes to its own deploy log.
+    """
+    project_dir = project_path(project_name)
+    if not project_dir:
+        return
+    if not devices:
+        write_status(project_name, "error", 0, message="No devices to deploy to.")
+        return
+
+    adb_path = find_adb()
+    if not adb_path:
+        logging.error("ADB not found for deployment of %s", project_name)
+        write_status(project_name, "error", 0, message="ADB not found. Please install Android SDK platform-tools.")
+        return
+
+    try:
+        apk_path, artifact = deploy_artifact(project_name, project_dir, build_type)
     except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        deploy_log.append(error_msg)
-        save_build_log(project_name, "\n".join(deploy_log))
         logging.error("Unexpected deploy error for %s: %s", project_name, e)
         write_status(project_name, "error", 0, message="Unexpected error. View logs for details.")
+        return
+    if not apk_path or not apk_path.exists():
+        write_status(project_name, "error", 0, message="No APK available to deploy.")
+        return
+
+    lock = threading.Lock()
+    states = {d["id"]: {"name": d.get("name", d["id"]), "state": "pending"} for d in devices}
+    finished = []
+
+    def report(device_id, state, message=None):
+        with lock:
+            states[device_id] = {"name": states[device_id]["name"], "state": state}
+            if message:
+                states[device_id]["message"] = message
+            if state in ("deployed", "unchanged", "error"):
+                finished.append(device_id)
+            # Published under the lock so device updates never go out of order
+            write_status(
+                project_name, "deploying", 10 + 90 * len(finished) // len(devices),
+                message=f"{len(finished)} of {len(devices)} devices finished",
+                devices={k: dict(v) for k, v in states.items()},
+            )
+
+    def deploy_one(device):
+        device_id = device["id"]
+        deploy_log = []
+        phases = METRICS.phases("deploy", project_name)
+        job = BUILD_HISTORY.start_job(project_name, "deploy", variant=build_type, device=device["address"])
+        if artifact:
+            job["artifact_sha256"] = artifact["sha256"]
+
+        def connected():
+            phases.start("install")
+            report(device_id, "installing_apk")
+
+        report(device_id, "connecting_device")
+        phases.start("connect")
+        try:
+            installed = install_on_device(
+                adb_path, device["address"], apk_path, deploy_log,
+                on_connected=connected,
+                artifact=artifact,
+            )
+            state, message = ("deployed" if installed else "unchanged"), None
+        except (subprocess.CalledProcessError, AdbError) as e:
+            _log_deploy_error(deploy_log, e)
+            logging.error("Deploy of %s to %s failed: %s", project_name, device_id, e)
+            state, message = "error", "Deploy failed. View device log for details."
+        except Exception as e:
+            deploy_log.append(f"Unexpected error: {str(e)}")
+            logging.error("Unexpected deploy error for %s on %s: %s", project_name, device_id, e)
+            state, message = "error", "Unexpected error. View device log for details."
+        phases.finish()
+        log_path = save_deploy_log(project_name, device_id, deploy_log)
+        BUILD_HISTORY.finish_job(job, status=state, message=message, log_source=log_path)
+        report(device_id, state, message)
+        return state != "error"
+
+    write_status(project_name, "deploying", 10, devices={k: dict(v) for k, v in states.items()})
+    workers = min(DEPLOY_WORKERS, len(devices))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deploy") as pool:
+        results = list(pool.map(deploy_one, devices))
+
+    succeeded = sum(results)
+    if succeeded == len(devices):
+        write_status(project_name, "deployed", 100, message=f"APK installed on {succeeded} devices.", devices=states)
+    else:
+        write_status(
+            project_name, "error", 0,
+            message=f"APK installed on {succeeded} of {len(devices)} devices. View logs for details.",
+            devices=states,
+        )
+
+
+def metrics_gauges():
+    """Current values for the gauges shown by /api/metrics."""
+    return [
+        ("build_server_active_builds", "Jobs running on the build scheduler.", BUILD_SCHEDULER.running_count()),
+        ("build_server_queued_builds", "Jobs waiting for a build slot.", len(BUILD_SCHEDULER.queued())),
+        ("build_server_artifact_disk_bytes", "Disk space used by stored artifacts.", ARTIFACT_STORE.disk_usage()),
+        ("build_server_log_archive_bytes", "Disk space used by archived job logs.", LOG_ARCHIVE.disk_usage()),
+        ("build_server_build_cache_bytes", "Size of the shared Gradle build cache.", BUILD_CACHE.stats()["size_bytes"]),
+        ("build_server_event_streams", "Open /api/events streams.", STATUS_EVENTS.subscriber_count()),
+    ]
 
 
 class Handler(http.server.SimpleHTTPRequestHandler):
-    def _send_json(self, payload, status=HTTPStatus.OK):
+    # Routes followed by a project, file or cache key; reported without the suffix
+    PREFIX_ROUTES = ("/artifacts/", "/cache/", "/static/")
+    # Streams stay open for minutes, so their duration says nothing about latency
+    UNTIMED_ROUTES = {"/api/events"}
+
+    # Routes reported under their own path; any other path is reported as "unmatched"
+    # so clients cannot create a series per path
+    KNOWN_ROUTES = frozenset({
+        "/", "/index.html", "/script.js", "/styles.css",
+        "/api/apks", "/api/artifact-retention", "/api/artifacts", "/api/build-cache", "/api/clean-cache",
+        "/api/daemons", "/api/deploy", "/api/device", "/api/events", "/api/history", "/api/logs",
+        "/api/metrics", "/api/pair-device", "/api/profile", "/api/projects", "/api/projects/rescan",
+        "/api/search", "/api/start-build", "/api/status",
+    })
+
+    KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"})
+
+    def parse_request(self):
+        self._request_started = time.monotonic()
+        self._response_code = None
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self._response_code = int(code)
+        super().send_response(code, message)
+
+    def handle_one_request(self):
+        # Set here as well: an over-long request line is answered before parse_request()
+        self._request_started = time.monotonic()
+        self._response_code = None
+        self.path = ""
+        super().handle_one_request()
+        if self._response_code is None:
+            return
+        route = self._metrics_route()
+        if route not in self.UNTIMED_ROUTES:
+            METRICS.observe(
+                "build_server_http_request_duration_seconds",
+                time.monotonic() - self._request_started,
+                method=self.command if self.command in self.KNOWN_METHODS else "other",
+                route=route, code=self._response_code,
+            )
+
+    def _metrics_route(self):
+        if self._response_code == HTTPStatus.NOT_FOUND:
+            return "unmatched"
+        path = urlparse(getattr(self, "path", "")).path
+        for prefix in self.PREFIX_ROUTES:
+            if path.startswith(prefix):
+                return prefix.rstrip("/")
+        return path if path in self.KNOWN_ROUTES else "unmatched"
+
+    def _send_json(self, payload, status=HTTPStatus.OK, headers=None):
         body = json.dumps(payload).encode()
         self.send_response(status)
         self.send_header("Content-type", "application/json")
         self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
         self.wfile.write(body)
 
+    def _send_scheduled(self, job, started_message, queued_message):
+        position = next((i for i, queued in enumerate(BUILD_SCHEDULER.queued(), start=1) if queued is job), None)
+        if position is None:
+            self._send_json({"message": started_message})
+        else:
+            self._send_json({"message": queued_message, "queue_position": position})
+
+    def _send_status_snapshot(self, params):
+        """Send the status of every project (or of ``projects=a,b``) in one response."""
+        projects = list_projects()
+        requested = params.get("projects", [""])[0]
+        if requested:
+            wanted = set(requested.split(","))
+            projects = [p for p in projects if p in wanted]
+        version = STATUS_STORE.version
+        etag = status_snapshot_etag(version, projects)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        statuses = STATUS_STORE.snapshot(projects)
+        self._send_json({"version": version, "statuses": statuses}, headers=headers)
+
+    def _stream_status_events(self):
+        """Send status updates as Server-Sent Events until the client disconnects."""
+        subscription = STATUS_EVENTS.subscribe()
+        if subscription is None:
+            self._send_json({"error": "Too many event streams."}, status=HTTPStatus.SERVICE_UNAVAILABLE)
+            return
+        self.close_connection = True
+        try:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("X-Accel-Buffering", "no")
+            self.end_headers()
+            self.wfile.write(b"retry: 3000\n\n")
+            while True:
+                try:
+                    payload = subscription.get(timeout=EVENT_KEEPALIVE)
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n")
+                    continue
+                if payload is None:
+                    break
+                self.wfile.write(f"event: status\ndata: {json.dumps(payload)}\n\n".encode())
+        except OSError:
+            # Client went away
+            pass
+        finally:
+            STATUS_EVENTS.unsubscribe(subscription)
+
+    def _build_cache_key(self):
+        """Return the cache key for a /cache/ request, or None after sending an error."""
+        if self.client_address[0] not in ("127.0.0.1", "::1"):
+            self.send_error(HTTPStatus.FORBIDDEN)
+            return None
+        key = urlparse(self.path).path[len('/cache/'):]
+        if not BUILD_CACHE.valid_key(key):
+            self.send_error(HTTPStatus.BAD_REQUEST)
+            return None
+        return key
+
+    def _serve_build_cache(self):
+        key = self._build_cache_key()
+        if key is None:
+            return
+        path = BUILD_CACHE.get(key)
+        try:
+            f = path.open("rb") if path else None
+        except OSError:
+            f = None
+        if f is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        with f:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/vnd.gradle.build-cache-artifact.v1")
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile)
+
+    def _serve_artifact(self, head_only=False):
+        """Serve /artifacts/<project>/<file> with ETag, Range and sendfile support."""
+        parts = [unquote(part) for part in urlparse(self.path).path.split('/')]
+        if len(parts) != 4 or any(
+            not part or part.startswith('.') or any(sep in part for sep in ('/', '\\', '\0'))
+            for part in parts[2:]
+        ):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        project, name = parts[2], parts[3]
+        path = ARTIFACT_DIR / project / name
+        try:
+            f = path.open("rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            entry = ARTIFACT_STORE.find(project, name)
+            if entry:
+                etag = f'"{entry["sha256"]}"'
+                cache_control = "public, max-age=31536000, immutable"
+            else:
+                etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+                cache_control = "no-cache"
+            headers = {
+                "ETag": etag,
+                "Accept-Ranges": "bytes",
+                "Cache-Control": cache_control,
+            }
+            if_none_match = self.headers.get("If-None-Match", "")
+            if etag in if_none_match or if_none_match.strip() == "*":
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                for header, value in headers.items():
+                    self.send_header(header, value)
+                self.end_headers()
+                return
+            byte_range = None
+            if_range = self.headers.get("If-Range")
+            if not if_range or if_range == etag:
+                try:
+                    byte_range = parse_byte_range(self.headers.get("Range"), size)
+                except ValueError:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            if byte_range:
+                start, end = byte_range
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                start, end = 0, size - 1
+                self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/vnd.android.package-archive")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.end_headers()
+            if head_only or end < start:
+                return
+            self.wfile.flush()
+            # socket.sendfile uses os.sendfile, copying in the kernel without the GIL
+            self.connection.sendfile(f, offset=start, count=end - start + 1)
+
+    def _serve_static(self, head_only=False):
+        """Serve an allowlisted dashboard file from memory, gzipped when accepted."""
+        asset = STATIC_ASSETS.get(urlparse(self.path).path)
+        if asset is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        headers = {
+            "ETag": asset["etag"],
+            "Cache-Control": asset["cache_control"],
+            "Vary": "Accept-Encoding",
+        }
+        if asset["etag"] in self.headers.get("If-None-Match", ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.end_headers()
+            return
+        body = asset["body"]
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = asset["gzip"]
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", asset["content_type"])
+        self.send_header("Content-Length", str(len(body)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        if urlparse(self.path).path.startswith('/artifacts/'):
+            self._serve_artifact(head_only=True)
+        else:
+            self._serve_static(head_only=True)
+
+    def do_PUT(self):
+        if not self.path.startswith('/cache/'):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        key = self._build_cache_key()
+        if key is None:
+            return
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.send_error(HTTPStatus.LENGTH_REQUIRED)
+            return
+        if length > BUILD_CACHE.max_entry_bytes:
+            self.send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        try:
+            BUILD_CACHE.store(key, self.rfile, length)
+        except (OSError, ValueError) as e:
+            logging.error("Failed to store build cache entry %s: %s", key, e)
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+        self.send_response(HTTPStatus.CREATED)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
     def do_GET(self):
         logging.info(f"GET request for {self.path}")
         parsed = urlparse(self.path)
-        if parsed.path == '/':
-            self.path = 'index.html'
-            return http.server.SimpleHTTPRequestHandler.do_GET(self)
+        if parsed.path.startswith('/cache/'):
+            self._serve_build_cache()
+        elif parsed.path.startswith('/artifacts/'):
+            self._serve_artifact()
         elif parsed.path == '/api/projects':
-            self._send_json({"projects": list_projects()})
+            if parse_qs(parsed.query).get("details", [""])[0] in ("1", "true"):
+                details = project_details()
+                self._send_json({"projects": list(details), "details": details})
+            else:
+                self._send_json({"projects": list_projects()})
+        elif parsed.path == '/api/history':
+            params = parse_qs(parsed.query)
+            project = params.get("project", [""])[0] or None
+            if project and not project_path(project):
+                self._send_json({"error": "Invalid project."}, status=HTTPStatus.BAD_REQUEST)
+                return
+            try:
+                limit = int(params.get("limit", ["50"])[0])
+                since = params.get("since", [""])[0]
+                since = float(since) if since else None
+            except ValueError:
+                self._send_json({"error": "Invalid limit or since."}, status=HTTPStatus.BAD_REQUEST)
+                return
+            jobs, next_cursor = BUILD_HISTORY.jobs(
+                project_name=project,
+                job_type=params.get("type", [""])[0] or None,
+                status=params.get("status", [""])[0] or None,
+                since=since,
+                before=params.get("before", [""])[0] or None,
+                limit=limit,
+            )
+            self._send_json({"jobs": jobs, "next": next_cursor})
+        elif parsed.path == '/api/search':
+            params = parse_qs(parsed.query)
+            text = params.get("q", [""])[0]
+            if len(text) < LogSearch.MIN_QUERY:
+                self._send_json({"error": f"Search text of at least {LogSearch.MIN_QUERY} characters required."},
+                                status=HTTPStatus.BAD_REQUEST)
+                return
+            if not LOG_SEARCH.available():
+                self._send_json({"error": "Log search needs SQLite with FTS5 trigram support (3.34 or newer)."},
+                                status=HTTPStatus.SERVICE_UNAVAILABLE)
+                return
+            try:
+                regex = params.get("regex", [""])[0]
+                pattern = re.compile(regex) if regex else None
+            except re.error as e:
+                self._send_json({"error": f"Invalid regex: {e}"}, status=HTTPStatus.BAD_REQUEST)
+                return
+            try:
+                limit = int(params.get("limit", ["100"])[0])
+                since, until = (params.get(name, [""])[0] for name in ("since", "until"))
+                since = float(since) if since else None
+                until = float(until) if until else None
+            except ValueError:
+                self._send_json({"error": "Invalid limit, since or until."}, status=HTTPStatus.BAD_REQUEST)
+                return
+            matches, truncated = LOG_SEARCH.search(
+                text,
+                pattern,
+                project_name=params.get("project", [""])[0] or None,
+                job_type=params.get("type", [""])[0] or None,
+                since=since,
+                until=until,
+                limit=limit,
+            )
+            self._send_json({"matches": matches, "truncated": truncated})
+        elif parsed.path == '/api/profile':
+            params = parse_qs(parsed.query)
+            project = params.get("project", [""])[0]
+            if not project_path(project):
+                self._send_json({"error": "Invalid project."}, status=HTTPStatus.BAD_REQUEST)
+                return
+            try:
+                limit = max(1, int(params.get("limit", ["10"])[0]))
+            except ValueError:
+                self._send_json({"error": "Invalid limit."}, status=HTTPStatus.BAD_REQUEST)
+                return
+            report = build_profile_report(project, limit)
+            if report is None:
+                self._send_json({"error": "No build profiles available."}, status=HTTPStatus.NOT_FOUND)
+                return
+            self._send_json(report)
+        elif parsed.path == '/api/metrics':
+            body = METRICS.render(metrics_gauges()).encode()
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
         elif parsed.path == '/api/device':
-            self._send_json(load_device())
-        elif parsed.path == '/api/status':
+            data = load_device()
+            for device in data.get("devices", []):
+                device["health"] = DEVICE_MONITOR.state(device.get("address"))
+            self._send_json(data)
+        elif parsed.path == '/api/apks':
+            params = parse_qs(parsed.query)
+            project = params.get("project", [""])[0]
+            build_type = params.get("build_type", [""])[0] or None
+            project_dir = project_path(project)
+            if not project_dir:
+                self._send_json({"error": "Invalid project."}, status=HTTPStatus.BAD_REQUEST)
+                return
+            apks = []
+            for output in find_apk_outputs(project_dir, build_type):
+                output = dict(output, path=output["path"].relative_to(project_dir).as_posix())
+                apks.append(output)
+            self._send_json({"apks": apks})
+        elif parsed.path == '/api/artifacts':
             params = parse_qs(parsed.query)
             project = params.get("project", [""])[0]
+            if not project_path(project):
+                self._send_json({"error": "Invalid project."}, status=HTTPStatus.BAD_REQUEST)
+                return
+            self._send_json({
+                "artifacts": ARTIFACT_STORE.artifacts(project),
+                "retention": ARTIFACT_STORE.retention(project),
+            })
+        elif parsed.path == '/api/build-cache':
+            self._send_json(BUILD_CACHE.stats())
+        elif parsed.path == '/api/daemons':
+            self._send_json({"daemons": GRADLE_DAEMONS.summary(), "max_idle": GRADLE_DAEMONS.max_idle})
+        elif parsed.path == '/api/status':
+            params = parse_qs(parsed.query, keep_blank_values=True)
+            if "project" not in params:
+                self._send_status_snapshot(params)
+                return
+            project = params.get("project", [""])[0]
             project_dir = project_path(project)
             if not project_dir:
                 self._send_json({"error": "Invalid project."}, status=HTTPStatus.BAD_REQUEST)
                 return
             self._send_json(load_status(project))
+        elif parsed.path == '/api/events':
+            self._stream_status_events()
         elif parsed.path == '/api/logs':
             try:
                 params = parse_qs(parsed.query)
+                job_id = params.get("job", [""])[0]
+                if job_id:
+                    paged = "start" in params or "count" in params
+                    try:
+                        start = max(0, int(params.get("start", ["0"])[0]))
+                        count = int(params.get("count", [str(LOG_PAGE_LINES)])[0])
+                    except ValueError:
+                        self._send_json({"error": "Invalid start or count."}, status=HTTPStatus.BAD_REQUEST)
+                        return
+                    count = max(0, min(count, MAX_LOG_PAGE_LINES))
+                    result = get_job_log(job_id, start, count) if paged else get_job_log(job_id)
+                    if result is None:
+                        self._send_json({"error": "No logs available."}, status=HTTPStatus.NOT_FOUND)
+                        return
+                    lines, total = result
+                    if paged:
+                        self._send_json({
+                            "lines": [line.rstrip("\r\n") for line in lines],
+                            "start": start,
+                            "total": total,
+                        })
+                    else:
+                        self._send_json({"logs": "".join(lines)})
+                    return
                 project = params.get("project", [""])[0]
                 if not project:
                     self._send_json({"error": "Project parameter required."}, status=HTTPStatus.BAD_REQUEST)
@@ -572,7 +3903,22 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                 if not project_dir:
                     self._send_json({"error": "Invalid project."}, status=HTTPStatus.BAD_REQUEST)
                     return
-                log_content = get_build_log(project)
+                device_id = params.get("device", [""])[0] or None
+                if "since" in params:
+                    try:
+                        since = max(0, int(params["since"][0]))
+                        wait = min(max(0.0, float(params.get("wait", ["0"])[0])), MAX_LOG_WAIT)
+                    except ValueError:
+                        self._send_json({"error": "Invalid since or wait."}, status=HTTPStatus.BAD_REQUEST)
+                        return
+                    log_path = deploy_log_path(project, device_id) if device_id else build_log_path(project)
+                    delta = LIVE_LOGS.read(log_path, since, params.get("log", [""])[0] or None, wait)
+                    if delta is None:
+                        self._send_json({"error": "No logs available."}, status=HTTPStatus.NOT_FOUND)
+                        return
+                    self._send_json(delta)
+                    return
+                log_content = get_build_log(project, device_id)
                 if log_content is None:
                     self._send_json({"error": "No logs available."}, status=HTTPStatus.NOT_FOUND)
                     return
@@ -583,7 +3929,7 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                 self._send_json({"error": "Failed to retrieve logs."}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
                 return
         else:
-            return http.server.SimpleHTTPRequestHandler.do_GET(self)
+            self._serve_static()
 
     def do_POST(self):
         logging.info(f"POST request for {self.path}")
@@ -604,15 +3950,21 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                     self._send_json({"error": "Project not found or missing gradlew."}, status=HTTPStatus.BAD_REQUEST)
                     return
 
+                priority = data.get("priority") or ("interactive" if build_type == "debug" else "batch")
+                if priority not in BuildScheduler.LANES:
+                    self._send_json({"error": "Priority must be interactive or batch."}, status=HTTPStatus.BAD_REQUEST)
+                    return
+
                 with BUILD_LOCK:
                     if project in ACTIVE_BUILDS:
                         self._send_json({"message": "Build already running."})
                         return
-                    t = threading.Thread(target=run_build, args=(project, build_type), daemon=True)
-                    ACTIVE_BUILDS[project] = t
-                    t.start()
+                    job = BUILD_SCHEDULER.submit(
+                        project, run_build, (project, build_type, bool(data.get("force"))), priority=priority
+                    )
+                    ACTIVE_BUILDS[project] = job
 
-                self._send_json({"message": "Build started"})
+                self._send_scheduled(job, "Build started", "Build queued")
             except json.JSONDecodeError:
                 logging.error("Invalid JSON in POST request")
                 self._send_json({"error": "Invalid JSON"}, status=HTTPStatus.BAD_REQUEST)
@@ -632,13 +3984,15 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                         address = data.get("address", "").strip()
                         device_id = data.get("device_id", "").strip() or f"device_{int(time.time())}"
                         device_name = data.get("device_name", "").strip() or f"Device {device_id}"
+                        group = data.get("group")
+                        group = group.strip() if isinstance(group, str) else None
                         if not address:
                             self._send_json({"error": "Device address is required."}, status=HTTPStatus.BAD_REQUEST)
                             return
                         if " " in address:
                             self._send_json({"error": "Invalid device address."}, status=HTTPStatus.BAD_REQUEST)
                             return
-                        result = save_device(address=address, device_id=device_id, device_name=device_name)
+                        result = save_device(address=address, device_id=device_id, device_name=device_name, group=group)
                         self._send_json(result)
                     elif action == "remove":
                         device_id = data.get("device_id", "").strip()
@@ -678,6 +4032,20 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                 if not project_dir:
                     self._send_json({"error": "Project not found."}, status=HTTPStatus.BAD_REQUEST)
                     return
+                # "devices" is "all" or a list of device ids; "group" names a device group
+                target = data.get("devices") or data.get("group")
+                if target:
+                    devices = select_devices(target)
+                    if not devices:
+                        self._send_json({"error": "No matching devices."}, status=HTTPStatus.BAD_REQUEST)
+                        return
+                    threading.Thread(
+                        target=run_multi_deploy,
+                        args=(project, devices, build_type),
+                        daemon=True,
+                    ).start()
+                    self._send_json({"message": "Deploy started", "devices": len(devices)})
+                    return
                 device_addr = get_selected_device_address()
                 if not device_addr:
                     self._send_json({"error": "No device selected. Please select a device first."}, status=HTTPStatus.BAD_REQUEST)
@@ -710,11 +4078,33 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                     if project in ACTIVE_BUILDS:
                         self._send_json({"message": "Build already running."})
                         return
-                    t = threading.Thread(target=run_clean_cache, args=(project,), daemon=True)
-                    ACTIVE_BUILDS[project] = t
-                    t.start()
+                    job = BUILD_SCHEDULER.submit(project, run_clean_cache, (project,), priority="interactive")
+                    ACTIVE_BUILDS[project] = job
 
-                self._send_json({"message": "Clean cache started"})
+                self._send_scheduled(job, "Clean cache started", "Clean cache queued")
+            except json.JSONDecodeError:
+                logging.error("Invalid JSON in POST request")
+                self._send_json({"error": "Invalid JSON"}, status=HTTPStatus.BAD_REQUEST)
+            except Exception as e:
+                logging.error(f"Error processing POST request: {e}")
+                self._send_json({"error": "Server error"}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+        elif self.path == '/api/projects/rescan':
+            self._send_json({"projects": PROJECT_INDEX.rescan()})
+        elif self.path == '/api/artifact-retention':
+            content_length = int(self.headers['Content-Length'])
+            post_data = self.rfile.read(content_length)
+            try:
+                data = json.loads(post_data)
+                project = data.get("project", "")
+                keep = data.get("keep")
+                if not project_path(project):
+                    self._send_json({"error": "Project not found."}, status=HTTPStatus.BAD_REQUEST)
+                    return
+                if keep is not None and (not isinstance(keep, int) or isinstance(keep, bool) or keep < 1):
+                    self._send_json({"error": "keep must be a positive integer or null."}, status=HTTPStatus.BAD_REQUEST)
+                    return
+                ARTIFACT_STORE.set_retention(project, keep)
+                self._send_json({"project": project, "retention": ARTIFACT_STORE.retention(project)})
             except json.JSONDecodeError:
                 logging.error("Invalid JSON in POST request")
                 self._send_json({"error": "Invalid JSON"}, status=HTTPStatus.BAD_REQUEST)
@@ -759,13 +4149,94 @@ class ReusableTCPServer(socketserver.TCPServer):
     allow_reuse_address = True
 
 
+class PooledHTTPServer(ReusableTCPServer):
+    """Serve requests concurrently from a bounded worker pool.
+
+    At most ``max_inflight`` requests are accepted at once (running or waiting
+    for a worker); anything beyond that is answered with 503 straight away.
+    Each client socket gets ``request_timeout`` seconds per read/write.
+    """
+
+    BUSY_RESPONSE = (
+        b"HTTP/1.1 503 Service Unavailable\r\n"
+        b"Content-Length: 0\r\n"
+        b"Retry-After: 1\r\n"
+        b"Connection: close\r\n\r\n"
+    )
+
+    def __init__(self, server_address, handler_class, workers=None,
+                 max_inflight=None, request_timeout=None):
+        self.workers = workers or HTTP_WORKERS
+        self.max_inflight = max(max_inflight or MAX_INFLIGHT_REQUESTS, self.workers)
+        self.request_timeout = request_timeout or REQUEST_TIMEOUT
+        self.inflight = threading.BoundedSemaphore(self.max_inflight)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="http")
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        if not self.inflight.acquire(blocking=False):
+            logging.warning("Rejecting request from %s: server busy", client_address[0])
+            try:
+                request.sendall(self.BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        request.settimeout(self.request_timeout)
+        try:
+            self.pool.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Pool already shut down
+            self.inflight.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.inflight.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
 PORT = 8000
-try:
-    ensure_dirs()
-    with ReusableTCPServer(("0.0.0.0", PORT), Handler) as httpd:
-        logging.info(f"Serving at port {PORT}")
-        print(f"serving at port {PORT}")
-        httpd.serve_forever()
-except Exception as e:
-    logging.error(f"Failed to start server: {e}")
-    print(f"Failed to start server: {e}")
+
+
+def _handle_sigterm(signum, frame):
+    # Unwind through main() so pending status writes are flushed
+    raise SystemExit(0)
+
+
+def main():
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+    try:
+        ensure_dirs()
+        STATIC_ASSETS.load()
+        STATUS_STORE.start()
+        PROJECT_INDEX.start()
+        BUILD_HISTORY.start()
+        LOG_SEARCH.start()
+        DEVICE_MONITOR.start()
+        with PooledHTTPServer(("0.0.0.0", PORT), Handler) as httpd:
+            logging.info(f"Serving at port {PORT} with {httpd.workers} workers")
+            print(f"serving at port {PORT}")
+            httpd.serve_forever()
+    except Exception as e:
+        logging.error(f"Failed to start server: {e}")
+        print(f"Failed to start server: {e}")
+    finally:
+        STATUS_EVENTS.close()
+        DEVICE_MONITOR.stop()
+        LOG_SEARCH.stop()
+        BUILD_HISTORY.stop()
+        PROJECT_INDEX.stop()
+        STATUS_STORE.stop()
+
+
+if __name__ == "__main__":
+    main()
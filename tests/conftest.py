@@ -62,7 +62,7 @@ def test_device_file(temp_dir):
 
 
 @pytest.fixture
-def mock_server_paths(monkeypatch, test_projects_dir, test_status_dir, 
+def mock_server_paths(monkeypatch, temp_dir, test_projects_dir, test_status_dir, 
                       test_artifacts_dir, test_logs_dir, test_device_file):
     """Mock server paths for testing."""
     import server
@@ -72,6 +72,7 @@ def mock_server_paths(monkeypatch, test_projects_dir, test_status_dir,
     monkeypatch.setattr(server, "ARTIFACT_DIR", test_artifacts_dir)
     monkeypatch.setattr(server, "LOGS_DIR", test_logs_dir)
     monkeypatch.setattr(server, "DEVICE_FILE", test_device_file)
+    monkeypatch.setattr(server, "GRADLE_INIT_DIR", temp_dir / "gradle-init")
     
     return {
         "projects": test_projects_dir,
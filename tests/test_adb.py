@@ -1,4 +1,6 @@
-"""Tests for ADB finding functions."""
+"""Tests for finding adb and talking to the ADB server."""
+import socket
+import threading
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -47,3 +49,161 @@ class TestADBFinding:
         
         result = server.find_adb()
         assert result is None
+
+
+class _FakeAdbServer:
+    """Speaks enough of the ADB host protocol for the client tests."""
+
+    def __init__(self, install_output=b"Success\n", exec_supported=True):
+        self.install_output = install_output
+        self.exec_supported = exec_supported
+        self.requests = []
+        self.installed = b""
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def close(self):
+        self.sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _recv_exact(conn, size):
+        data = b""
+        while len(data) < size:
+            data += conn.recv(size - len(data))
+        return data
+
+    def _read_request(self, conn):
+        length = int(self._recv_exact(conn, 4), 16)
+        request = self._recv_exact(conn, length).decode()
+        self.requests.append(request)
+        return request
+
+    @staticmethod
+    def _reply(conn, text, status=b"OKAY"):
+        payload = text.encode()
+        conn.sendall(status + b"%04x" % len(payload) + payload)
+
+    def _handle(self, conn):
+        with conn:
+            request = self._read_request(conn)
+            if request == "host:version":
+                self._reply(conn, "0029")
+            elif request == "host:devices":
+                self._reply(conn, "10.0.0.1:5555\tdevice\nemulator-5554\toffline\n")
+            elif request.startswith("host:connect:"):
+                self._reply(conn, "connected to " + request.split(":", 2)[2])
+            elif request.startswith("host:transport:"):
+                conn.sendall(b"OKAY")
+                request = self._read_request(conn)
+                if request.startswith("shell:"):
+                    conn.sendall(b"OKAY" + request[6:].encode() + b"\n")
+                elif request.startswith("exec:cmd package install") and self.exec_supported:
+                    conn.sendall(b"OKAY")
+                    self.installed = self._recv_exact(conn, int(request.rsplit(" ", 1)[1]))
+                    conn.sendall(self.install_output)
+                else:
+                    self._reply(conn, "closed", status=b"FAIL")
+            else:
+                self._reply(conn, "unknown host service", status=b"FAIL")
+
+
+@pytest.fixture
+def adb_server():
+    server = _FakeAdbServer()
+    yield server
+    server.close()
+
+
+@pytest.mark.unit
+class TestAdbClient:
+    """Test the ADB host protocol client."""
+
+    def _client(self, adb_server):
+        import server
+        return server.AdbClient(port=adb_server.port, timeout=5)
+
+    def test_find_adb_reuses_found_path(self):
+        """Test the resolved adb path is not probed for again."""
+        import server
+        with patch('server.shutil.which', return_value="/usr/bin/adb"), \
+                patch('server.os.path.isfile', side_effect=lambda p: p == "/usr/bin/adb"), \
+                patch('server.os.access', return_value=True):
+            assert server.find_adb() == "/usr/bin/adb"
+            with patch('server.shutil.which') as mock_which:
+                assert server.find_adb() == "/usr/bin/adb"
+                mock_which.assert_not_called()
+
+    def test_devices_and_version(self, adb_server):
+        """Test listing devices with their states."""
+        client = self._client(adb_server)
+        assert client.version() == 0x29
+        assert client.devices() == [
+            {"serial": "10.0.0.1:5555", "state": "device"},
+            {"serial": "emulator-5554", "state": "offline"},
+        ]
+
+    def test_connect_and_shell(self, adb_server):
+        """Test connecting a network device and running a shell command on it."""
+        client = self._client(adb_server)
+        assert client.connect("10.0.0.1:5555") == "connected to 10.0.0.1:5555"
+        assert client.shell("10.0.0.1:5555", "pm path com.example") == "pm path com.example\n"
+        assert adb_server.requests[-2:] == ["host:transport:10.0.0.1:5555", "shell:pm path com.example"]
+
+    def test_install_streams_apk(self, adb_server, temp_dir):
+        """Test the APK bytes are streamed to the package manager."""
+        apk = temp_dir / "app.apk"
+        apk.write_bytes(b"x" * 100000)
+        client = self._client(adb_server)
+        assert "Success" in client.install("10.0.0.1:5555", apk)
+        assert adb_server.installed == apk.read_bytes()
+        assert adb_server.requests[-1] == "exec:cmd package install -r -S 100000"
+
+    def test_install_failure_and_unsupported(self, adb_server, temp_dir):
+        """Test install failures raise, and old devices report streaming as unsupported."""
+        import server
+        apk = temp_dir / "app.apk"
+        apk.write_bytes(b"apk")
+        client = self._client(adb_server)
+        adb_server.install_output = b"Failure [INSTALL_FAILED_VERSION_DOWNGRADE]\n"
+        with pytest.raises(server.AdbError) as error:
+            client.install("10.0.0.1:5555", apk)
+        assert not isinstance(error.value, server.AdbStreamingUnsupported)
+        adb_server.install_output = b"/system/bin/sh: cmd: not found\n"
+        with pytest.raises(server.AdbStreamingUnsupported):
+            client.install("10.0.0.1:5555", apk)
+        adb_server.exec_supported = False
+        with pytest.raises(server.AdbStreamingUnsupported):
+            client.install("10.0.0.1:5555", apk)
+
+    def test_unavailable_without_server_or_cli(self):
+        """Test the client reports no server when nothing listens and adb is missing."""
+        import server
+        with socket.create_server(("127.0.0.1", 0)) as placeholder:
+            port = placeholder.getsockname()[1]
+        client = server.AdbClient(port=port, timeout=1)
+        with patch('server.find_adb', return_value=None):
+            assert client.available() is False
+
+    def test_install_on_device_uses_server(self, adb_server, mock_server_paths, temp_dir):
+        """Test deploys go through the ADB server without spawning adb."""
+        import server
+        apk = temp_dir / "app.apk"
+        apk.write_bytes(b"apk")
+        log = []
+        with patch('server.ADB_CLIENT', self._client(adb_server)), \
+                patch('server.DEVICE_MONITOR', server.DeviceMonitor()), \
+                patch('server.subprocess.run') as mock_run:
+            server.install_on_device("/usr/bin/adb", "10.0.0.1:5555", apk, log)
+        mock_run.assert_not_called()
+        assert adb_server.installed == b"apk"
+        assert "10.0.0.1:5555 is online" in log
+        assert "host:connect:10.0.0.1:5555" in adb_server.requests
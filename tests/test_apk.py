@@ -1,4 +1,6 @@
 """Tests for APK finding functions."""
+import json
+import os
 import pytest
 from pathlib import Path
 import time
@@ -52,7 +54,79 @@ class TestAPKFinding:
         
         result = server.find_latest_apk(project_dir, "debug")
         assert result is None
-    
+
+    def _write_metadata(self, variant_dir, variant, files):
+        variant_dir.mkdir(parents=True)
+        elements = []
+        for name in files:
+            (variant_dir / name).write_bytes(b"apk")
+            elements.append({"type": "SINGLE", "filters": [], "versionCode": 3,
+                             "versionName": "1.2", "outputFile": name})
+        (variant_dir / "output-metadata.json").write_text(json.dumps({
+            "version": 3,
+            "applicationId": "com.example.app",
+            "variantName": variant,
+            "elements": elements,
+        }))
+
+    def test_find_apk_outputs_reads_output_metadata(self, mock_server_paths, test_projects_dir):
+        """Test APKs are listed from output-metadata.json per module and variant."""
+        import server
+
+        project_dir = test_projects_dir / "TestProject"
+        project_dir.mkdir()
+        (project_dir / "settings.gradle").write_text("include ':mobile', ':feature:tv'\n")
+        apk_root = project_dir / "mobile" / "build" / "outputs" / "apk"
+        self._write_metadata(apk_root / "free" / "debug", "freeDebug", ["mobile-free-debug.apk"])
+        self._write_metadata(apk_root / "paid" / "release", "paidRelease", ["mobile-paid-release.apk"])
+        # Stale APK not listed in the metadata is ignored
+        (apk_root / "free" / "debug" / "old.apk").write_bytes(b"old")
+        tv_root = project_dir / "feature" / "tv" / "build" / "outputs" / "apk"
+        self._write_metadata(tv_root / "debug", "debug", ["tv-debug.apk"])
+
+        outputs = server.find_apk_outputs(project_dir)
+        assert sorted(o["variant"] for o in outputs) == ["debug", "freeDebug", "paidRelease"]
+
+        debug = server.find_apk_outputs(project_dir, "debug")
+        assert {(o["module"], o["path"].name) for o in debug} == {
+            (":mobile", "mobile-free-debug.apk"),
+            (":feature:tv", "tv-debug.apk"),
+        }
+        assert debug[0]["application_id"] == "com.example.app"
+        assert debug[0]["version_name"] == "1.2"
+        assert server.find_latest_apk(project_dir, "release").name == "mobile-paid-release.apk"
+
+    def test_find_latest_apk_prefers_app_module(self, mock_server_paths, test_projects_dir):
+        """Test the :app APK is chosen even when another module finished later."""
+        import server
+
+        project_dir = test_projects_dir / "TestProject"
+        project_dir.mkdir()
+        (project_dir / "settings.gradle").write_text("include ':app', ':wear'\n")
+        self._write_metadata(project_dir / "app" / "build" / "outputs" / "apk" / "debug", "debug", ["app-debug.apk"])
+        time.sleep(0.05)
+        self._write_metadata(project_dir / "wear" / "build" / "outputs" / "apk" / "debug", "debug", ["wear-debug.apk"])
+
+        assert server.find_latest_apk(project_dir, "debug").name == "app-debug.apk"
+        assert server.find_latest_apk(project_dir, "debug", module="wear").name == "wear-debug.apk"
+        assert len(server.find_apk_outputs(project_dir, "debug")) == 2
+
+    def test_module_dirs_cached_until_settings_change(self, mock_server_paths, test_projects_dir):
+        """Test the module layout is reused until the settings file changes."""
+        import server
+
+        project_dir = test_projects_dir / "TestProject"
+        project_dir.mkdir()
+        settings = project_dir / "settings.gradle"
+        settings.write_text("include ':app'\n")
+        first = server.module_dirs(project_dir)
+        assert project_dir / "app" in first
+        assert server.module_dirs(project_dir) is first
+
+        settings.write_text("include ':app', ':lib:core'\n")
+        os.utime(settings, (settings.stat().st_atime, settings.stat().st_mtime + 5))
+        assert project_dir / "lib" / "core" in server.module_dirs(project_dir)
+
     def test_latest_artifact_path_exists(self, mock_server_paths, test_artifacts_dir):
         """Test finding latest artifact when it exists."""
         import server
@@ -84,3 +158,79 @@ class TestAPKFinding:
         
         result = server.latest_artifact_path("TestProject")
         assert result is None
+
+
+@pytest.mark.unit
+class TestArtifactStore:
+    """Test content-addressed artifact storage."""
+    
+    def _apk(self, directory, name, content):
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / name
+        path.write_bytes(content)
+        return path
+    
+    def test_publish_links_blob(self, mock_server_paths, temp_dir):
+        """Test publishing stores the APK once and hard-links it into the project."""
+        import server
+        store = server.ArtifactStore()
+        apk = self._apk(temp_dir / "out", "app-debug.apk", b"apk-bytes")
+        entry = store.publish("TestProject", apk, "debug")
+        
+        published = mock_server_paths["artifacts"] / "TestProject" / entry["name"]
+        blob = mock_server_paths["artifacts"] / ".objects" / f"{entry['sha256']}.apk"
+        assert entry["name"] == f"app-debug-{entry['sha256'][:12]}.apk"
+        assert published.read_bytes() == b"apk-bytes"
+        assert published.stat().st_ino == blob.stat().st_ino
+        assert entry["build"] == 1
+        assert store.latest("TestProject") == entry
+    
+    def test_identical_apks_stored_once(self, mock_server_paths, temp_dir):
+        """Test the same APK built by two projects shares one blob."""
+        import server
+        store = server.ArtifactStore()
+        apk = self._apk(temp_dir / "out", "app.apk", b"same")
+        first = store.publish("ProjectA", apk)
+        second = store.publish("ProjectB", apk)
+        assert first["sha256"] == second["sha256"]
+        assert len(list((mock_server_paths["artifacts"] / ".objects").glob("*.apk"))) == 1
+    
+    def test_latest_by_build_type(self, mock_server_paths, temp_dir):
+        """Test latest can be limited to a build type."""
+        import server
+        store = server.ArtifactStore()
+        debug = store.publish("TestProject", self._apk(temp_dir / "d", "app-debug.apk", b"d"), "debug")
+        release = store.publish("TestProject", self._apk(temp_dir / "r", "app-release.apk", b"r"), "release")
+        assert store.latest("TestProject")["build"] == release["build"]
+        assert store.latest("TestProject", "debug")["build"] == debug["build"]
+        assert store.get("TestProject", debug["build"])["sha256"] == debug["sha256"]
+    
+    def test_retention_removes_old_artifacts(self, mock_server_paths, temp_dir):
+        """Test builds beyond the retention are unlinked and their blobs collected."""
+        import server
+        store = server.ArtifactStore()
+        store.set_retention("TestProject", 2)
+        entries = [
+            store.publish("TestProject", self._apk(temp_dir / str(i), "app.apk", bytes([i])), "debug")
+            for i in range(3)
+        ]
+        assert [e["build"] for e in store.artifacts("TestProject")] == [3, 2]
+        assert not (mock_server_paths["artifacts"] / "TestProject" / entries[0]["name"]).exists()
+        assert not (mock_server_paths["artifacts"] / ".objects" / f"{entries[0]['sha256']}.apk").exists()
+        assert store.retention("TestProject") == 2
+    
+    def test_index_persisted(self, mock_server_paths, temp_dir):
+        """Test a new store instance reads the saved index."""
+        import server
+        entry = server.ArtifactStore().publish("TestProject", self._apk(temp_dir / "o", "app.apk", b"x"))
+        assert server.ArtifactStore().latest("TestProject") == entry
+    
+    def test_latest_artifact_path_uses_index(self, mock_server_paths, temp_dir):
+        """Test latest_artifact_path prefers the indexed artifact."""
+        import server
+        from unittest.mock import patch
+        store = server.ArtifactStore()
+        with patch('server.ARTIFACT_STORE', store):
+            entry = store.publish("TestProject", self._apk(temp_dir / "o", "app.apk", b"x"))
+            result = server.latest_artifact_path("TestProject")
+        assert result == mock_server_paths["artifacts"] / "TestProject" / entry["name"]
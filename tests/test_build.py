@@ -10,8 +10,7 @@ class TestBuildFunctions:
     
     @patch('server.subprocess.run')
     @patch('server.find_latest_apk')
-    @patch('server.shutil.copy2')
-    def test_run_build_success(self, mock_copy, mock_find_apk, mock_subprocess, 
+    def test_run_build_success(self, mock_find_apk, mock_subprocess,
                                 mock_server_paths, test_project):
         """Test successful build execution."""
         import server
@@ -27,8 +26,10 @@ class TestBuildFunctions:
         
         # Verify subprocess was called
         assert mock_subprocess.called
-        # Verify APK was copied
-        assert mock_copy.called
+        # Verify APK was published to the artifact store
+        entry = server.ARTIFACT_STORE.latest("TestProject")
+        assert (mock_server_paths["artifacts"] / "TestProject" / entry["name"]).read_bytes() == b"apk"
+        assert server.load_status("TestProject")["artifact"] == f"/artifacts/TestProject/{entry['name']}"
     
     @patch('server.subprocess.run')
     def test_run_build_invalid_project(self, mock_subprocess, mock_server_paths):
@@ -73,3 +74,92 @@ class TestBuildFunctions:
         status = server.load_status("TestProject")
         assert status["status"] == "error"
         assert "APK not found" in status.get("message", "")
+    
+    def test_run_build_failure_keeps_streamed_log(self, mock_server_paths, test_project):
+        """Test a failing Gradle run leaves its full output in the build log."""
+        import server
+        
+        (test_project / "gradlew").write_text("#!/bin/sh\necho 'Task :app:compileDebugKotlin FAILED'\nexit 1\n")
+        
+        server.run_build("TestProject", "debug")
+        
+        status = server.load_status("TestProject")
+        assert status["status"] == "error"
+        assert "compileDebugKotlin FAILED" in server.get_build_log("TestProject")
+        assert "TestProject" not in server.ACTIVE_BUILDS
+    
+    def _write_apk_producing_gradlew(self, project_dir):
+        (project_dir / "gradlew").write_text(
+            "#!/bin/sh\n"
+            "echo run >> runs.log.txt\n"
+            "mkdir -p app/build/outputs/apk/debug\n"
+            "echo apk > app/build/outputs/apk/debug/app-debug.apk\n"
+        )
+        (project_dir / "gradlew").chmod(0o755)
+        (project_dir / "app" / "src").mkdir(parents=True)
+        (project_dir / "app" / "src" / "Main.kt").write_text("fun main() {}")
+        (project_dir / "app" / "build.gradle").write_text("plugins {}")
+    
+    def test_run_build_skips_unchanged_inputs(self, mock_server_paths, test_project):
+        """Test a second build with identical inputs reuses the previous APK."""
+        import server
+        self._write_apk_producing_gradlew(test_project)
+        
+        server.run_build("TestProject", "debug")
+        # Gradle's own output files must not count as inputs
+        (test_project / "runs.log.txt").unlink()
+        (test_project / "build").mkdir()
+        (test_project / "build" / "tmp.txt").write_text("output")
+        server.run_build("TestProject", "debug")
+        
+        status = server.load_status("TestProject")
+        assert status["status"] == "done"
+        assert status["up_to_date"] is True
+        assert status["artifact"].startswith("/artifacts/TestProject/app-debug-")
+        assert not (test_project / "runs.log.txt").exists()
+    
+    def test_run_build_force_and_changed_inputs_rebuild(self, mock_server_paths, test_project):
+        """Test forcing or editing a source file runs Gradle again."""
+        import server
+        self._write_apk_producing_gradlew(test_project)
+        
+        server.run_build("TestProject", "debug")
+        server.run_build("TestProject", "debug", force=True)
+        assert (test_project / "runs.log.txt").read_text().count("run") == 2
+        
+        (test_project / "runs.log.txt").unlink()
+        (test_project / "app" / "src" / "Main.kt").write_text("fun main() { println() }")
+        server.run_build("TestProject", "debug")
+        assert (test_project / "runs.log.txt").exists()
+        assert "up_to_date" not in server.load_status("TestProject")
+    
+    def test_input_fingerprint_reuses_hashes(self, test_project):
+        """Test files with unchanged mtime and size are not re-read."""
+        import server
+        (test_project / "settings.gradle").write_text("include ':app'")
+        fingerprint, index = server.input_fingerprint(test_project, "debug")
+        with patch('server._hash_file') as mock_hash:
+            again, _ = server.input_fingerprint(test_project, "debug", index)
+        mock_hash.assert_not_called()
+        assert again == fingerprint
+        
+        other_type, _ = server.input_fingerprint(test_project, "release", index)
+        assert other_type != fingerprint
+    
+    def test_input_fingerprint_output_dirs_only_next_to_build_scripts(self, test_project):
+        """Test module build dirs are skipped but a source package named build is not."""
+        import server
+        app = test_project / "app"
+        (app / "build" / "outputs").mkdir(parents=True)
+        (app / "build.gradle").write_text("plugins {}")
+        package = app / "src" / "main" / "java" / "com" / "example" / "build"
+        package.mkdir(parents=True)
+        config = package / "Config.java"
+        config.write_text("package com.example.build; class Config {}")
+        fingerprint, index = server.input_fingerprint(test_project, "debug")
+        assert "app/src/main/java/com/example/build/Config.java" in index
+        
+        (app / "build" / "outputs" / "app.apk").write_bytes(b"apk")
+        assert server.input_fingerprint(test_project, "debug")[0] == fingerprint
+        config.write_text("package com.example.build; class Config { int x; }")
+        assert server.input_fingerprint(test_project, "debug")[0] != fingerprint
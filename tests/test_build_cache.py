@@ -0,0 +1,137 @@
+"""Tests for the shared Gradle build cache."""
+import http.client
+import threading
+import pytest
+from io import BytesIO
+from unittest.mock import patch
+
+KEY_A = "a" * 32
+KEY_B = "b" * 32
+KEY_C = "c" * 32
+
+
+@pytest.mark.unit
+class TestBuildCache:
+    """Test build cache storage."""
+    
+    def test_store_and_get(self, temp_dir):
+        """Test a stored entry is returned and counted as a hit."""
+        import server
+        cache = server.BuildCache(root=temp_dir / "cache", max_bytes=1024)
+        assert cache.get(KEY_A) is None
+        cache.store(KEY_A, BytesIO(b"payload"), 7)
+        path = cache.get(KEY_A)
+        assert path.read_bytes() == b"payload"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+        assert stats["size_bytes"] == 7
+    
+    def test_evicts_least_recently_used(self, temp_dir):
+        """Test the oldest unused entry goes first when over the size limit."""
+        import server
+        cache = server.BuildCache(root=temp_dir / "cache", max_bytes=20)
+        cache.store(KEY_A, BytesIO(b"x" * 10), 10)
+        cache.store(KEY_B, BytesIO(b"y" * 10), 10)
+        cache.get(KEY_A)
+        cache.store(KEY_C, BytesIO(b"z" * 10), 10)
+        assert cache.get(KEY_B) is None
+        assert not (temp_dir / "cache" / KEY_B).exists()
+        assert cache.get(KEY_A) is not None
+        assert cache.get(KEY_C) is not None
+        assert cache.stats()["evictions"] == 1
+    
+    def test_short_body_rejected(self, temp_dir):
+        """Test a truncated upload leaves no entry behind."""
+        import server
+        cache = server.BuildCache(root=temp_dir / "cache", max_bytes=1024)
+        with pytest.raises(ValueError):
+            cache.store(KEY_A, BytesIO(b"abc"), 10)
+        assert cache.get(KEY_A) is None
+        assert not list((temp_dir / "cache").iterdir())
+    
+    def test_index_rebuilt_from_disk(self, temp_dir):
+        """Test a new cache instance sees entries stored earlier."""
+        import server
+        cache = server.BuildCache(root=temp_dir / "cache", max_bytes=1024)
+        cache.store(KEY_A, BytesIO(b"payload"), 7)
+        reopened = server.BuildCache(root=temp_dir / "cache", max_bytes=1024)
+        assert reopened.get(KEY_A) is not None
+        assert reopened.stats()["size_bytes"] == 7
+    
+    def test_valid_key(self):
+        """Test only hex cache keys are accepted."""
+        import server
+        cache = server.BuildCache()
+        assert cache.valid_key(KEY_A)
+        assert not cache.valid_key("../etc/passwd")
+        assert not cache.valid_key("abc")
+    
+    def test_init_script(self, temp_dir, monkeypatch):
+        """Test the generated init script points Gradle at the server."""
+        import server
+        monkeypatch.setattr(server, "GRADLE_INIT_DIR", temp_dir / "init")
+        path = server.build_cache_init_script()
+        content = path.read_text()
+        assert f"url = 'http://127.0.0.1:{server.PORT}/cache/'" in content
+        assert "push = true" in content
+
+
+@pytest.mark.unit
+class TestBuildCacheEndpoint:
+    """Test the /cache/ HTTP protocol."""
+    
+    def test_put_then_get(self, temp_dir):
+        """Test Gradle's PUT/GET round trip."""
+        import server
+        cache = server.BuildCache(root=temp_dir / "cache", max_bytes=1024)
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with patch('server.BUILD_CACHE', cache):
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+                conn.request("GET", f"/cache/{KEY_A}")
+                response = conn.getresponse()
+                response.read()
+                assert response.status == 404
+                
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+                conn.request("PUT", f"/cache/{KEY_A}", body=b"task output")
+                response = conn.getresponse()
+                response.read()
+                assert response.status == 201
+                
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+                conn.request("GET", f"/cache/{KEY_A}")
+                response = conn.getresponse()
+                assert response.status == 200
+                assert response.read() == b"task output"
+                
+                conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+                conn.request("GET", "/cache/not-a-key")
+                response = conn.getresponse()
+                response.read()
+                assert response.status == 400
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+    
+    def test_rejects_remote_clients(self, temp_dir):
+        """Test only local Gradle processes can use the cache."""
+        import server
+        from http import HTTPStatus
+        from http.server import SimpleHTTPRequestHandler
+        from unittest.mock import MagicMock
+        original_init = SimpleHTTPRequestHandler.__init__
+        SimpleHTTPRequestHandler.__init__ = lambda self, *args, **kwargs: None
+        try:
+            handler = server.Handler(MagicMock(), ("192.168.1.50", 40000), None)
+        finally:
+            SimpleHTTPRequestHandler.__init__ = original_init
+        handler.client_address = ("192.168.1.50", 40000)
+        handler.path = f"/cache/{KEY_A}"
+        handler.send_error = MagicMock()
+        handler.do_PUT()
+        handler.send_error.assert_called_once_with(HTTPStatus.FORBIDDEN)
@@ -0,0 +1,150 @@
+"""Tests for deploying APKs to devices."""
+import hashlib
+import json
+import subprocess
+import threading
+import time
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+
+DEVICES = [
+    {"id": "pixel", "name": "Pixel", "address": "10.0.0.1:5555", "group": "rack"},
+    {"id": "tablet", "name": "Tablet", "address": "10.0.0.2:5555", "group": "rack"},
+    {"id": "tv", "name": "TV", "address": "10.0.0.3:5555"},
+]
+
+
+@pytest.fixture
+def deploy_project(monkeypatch, mock_server_paths, test_project):
+    """A project with a published APK and three configured devices, deployed through the adb CLI."""
+    import server
+    monkeypatch.setattr(server.ADB_CLIENT, "available", lambda: False)
+    artifacts = mock_server_paths["artifacts"] / "TestProject"
+    artifacts.mkdir()
+    (artifacts / "app-debug.apk").write_bytes(b"apk")
+    mock_server_paths["device"].write_text(json.dumps({"devices": DEVICES, "selected": "pixel"}))
+    return test_project
+
+
+def _fake_adb(failing=(), install_delay=0.0, calls=None, installed=None):
+    lock = threading.Lock()
+    running = [0]
+
+    def run(cmd, **kwargs):
+        if "install" in cmd:
+            with lock:
+                running[0] += 1
+                if calls is not None:
+                    calls.append(running[0])
+            time.sleep(install_delay)
+            with lock:
+                running[0] -= 1
+        # Both "adb connect <addr>" and "adb -s <addr> ..." carry the address third
+        address = cmd[2]
+        action = "install" if "install" in cmd else cmd[1]
+        if "shell" in cmd and installed is not None:
+            command = cmd[-1]
+            if command.startswith("pm path"):
+                stdout = "package:/data/app/com.example-1/base.apk\n" if address in installed else ""
+            else:
+                stdout = f"{installed.get(address, '')}  /data/app/com.example-1/base.apk\n"
+            return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+        if action == "install" and installed is not None:
+            installed[address] = hashlib.sha256(Path(cmd[-1]).read_bytes()).hexdigest()
+        returncode = 1 if address in failing and action == "install" else 0
+        return subprocess.CompletedProcess(cmd, returncode, stdout=f"{action} {address}", stderr="")
+    return run
+
+
+@pytest.mark.unit
+class TestMultiDeploy:
+    """Test fan-out deploys to device groups."""
+
+    def test_select_devices(self, deploy_project):
+        """Test targets select all devices, a group or explicit ids."""
+        import server
+        assert [d["id"] for d in server.select_devices("all")] == ["pixel", "tablet", "tv"]
+        assert [d["id"] for d in server.select_devices("rack")] == ["pixel", "tablet"]
+        assert [d["id"] for d in server.select_devices(["tv"])] == ["tv"]
+        assert server.select_devices("missing") == []
+
+    def test_devices_installed_in_parallel(self, deploy_project):
+        """Test all devices install at once and each reports success."""
+        import server
+        concurrency = []
+        with patch('server.find_adb', return_value="/usr/bin/adb"), \
+                patch('server.subprocess.run', side_effect=_fake_adb(install_delay=0.2, calls=concurrency)):
+            started = time.monotonic()
+            server.run_multi_deploy("TestProject", DEVICES, "debug")
+            elapsed = time.monotonic() - started
+
+        assert elapsed < 0.5
+        assert max(concurrency) == 3
+        status = server.load_status("TestProject")
+        assert status["status"] == "deployed"
+        assert {d["state"] for d in status["devices"].values()} == {"deployed"}
+
+    def test_failed_device_reported_separately(self, deploy_project, mock_server_paths):
+        """Test one failing device does not stop the others and gets its own log."""
+        import server
+        with patch('server.find_adb', return_value="/usr/bin/adb"), \
+                patch('server.subprocess.run', side_effect=_fake_adb(failing={"10.0.0.2:5555"})):
+            server.run_multi_deploy("TestProject", DEVICES, "debug")
+
+        status = server.load_status("TestProject")
+        assert status["status"] == "error"
+        assert "2 of 3" in status["message"]
+        assert status["devices"]["tablet"]["state"] == "error"
+        assert status["devices"]["pixel"]["state"] == "deployed"
+        assert "Error:" in server.get_build_log("TestProject", "tablet")
+        assert "install 10.0.0.1:5555" in server.get_build_log("TestProject", "pixel")
+        assert server.get_build_log("TestProject") is None
+
+    def test_single_device_install_targets_serial(self, deploy_project):
+        """Test the single-device deploy names the device when installing."""
+        import server
+        with patch('server.find_adb', return_value="/usr/bin/adb"), \
+                patch('server.subprocess.run', side_effect=_fake_adb()) as mock_run:
+            server.run_deploy("TestProject", "10.0.0.1:5555", "debug")
+        install = mock_run.call_args_list[-1][0][0]
+        assert install[:4] == ["/usr/bin/adb", "-s", "10.0.0.1:5555", "install"]
+        assert server.load_status("TestProject")["status"] == "deployed"
+    
+    def test_single_device_deploy_keeps_build_log(self, deploy_project):
+        """Test a deploy logs to the device's deploy log and leaves the build's log alone."""
+        import server
+        server.save_build_log("TestProject", "build output")
+        with patch('server.find_adb', return_value="/usr/bin/adb"), \
+                patch('server.subprocess.run', side_effect=_fake_adb(failing={"10.0.0.1:5555"})):
+            server.run_deploy("TestProject", "10.0.0.1:5555", "debug")
+        status = server.load_status("TestProject")
+        assert (status["status"], status["log_device"]) == ("error", "pixel")
+        assert "Error:" in server.get_build_log("TestProject", "pixel")
+        assert server.get_build_log("TestProject") == "build output"
+
+    def test_unchanged_apk_not_reinstalled(self, deploy_project, mock_server_paths, temp_dir):
+        """Test a second deploy of the same artifact is verified on the device and skipped."""
+        import server
+        apk = temp_dir / "app-debug.apk"
+        apk.write_bytes(b"new-apk")
+        server.ARTIFACT_STORE.publish("TestProject", apk, "debug", application_id="com.example")
+        installed = {}
+        fake = _fake_adb(installed=installed)
+        with patch('server.find_adb', return_value="/usr/bin/adb"), \
+                patch('server.subprocess.run', side_effect=fake) as mock_run:
+            server.run_deploy("TestProject", "10.0.0.1:5555", "debug")
+            assert server.load_status("TestProject")["message"] == "APK installed on device."
+            mock_run.reset_mock()
+
+            server.run_deploy("TestProject", "10.0.0.1:5555", "debug")
+            status = server.load_status("TestProject")
+            assert status["unchanged"] is True
+            assert not any("install" in call[0][0] for call in mock_run.call_args_list)
+
+            # Installed over by someone else: the checksum no longer matches
+            installed["10.0.0.1:5555"] = "0" * 64
+            server.run_deploy("TestProject", "10.0.0.1:5555", "debug")
+            assert any("install" in call[0][0] for call in mock_run.call_args_list)
+            assert "unchanged" not in server.load_status("TestProject")
@@ -1,6 +1,8 @@
 """Tests for device configuration functions."""
 import json
+import time
 import pytest
+from unittest.mock import patch
 from pathlib import Path
 
 
@@ -44,3 +46,84 @@ class TestDeviceConfig:
         assert result == {"address": ""}
         content = json.loads(test_device_file.read_text())
         assert content == {"address": ""}
+
+
+class _StubAdbClient:
+    """Reports the given ADB states and records connect attempts."""
+
+    def __init__(self, states):
+        self.states = states
+        self.connects = []
+
+    def available(self):
+        return True
+
+    def connect(self, address, timeout=None):
+        self.connects.append(address)
+        if address not in self.states:
+            raise OSError("timed out")
+        return f"connected to {address}"
+
+    def devices(self):
+        return [{"serial": address, "state": state} for address, state in self.states.items()]
+
+
+@pytest.mark.unit
+class TestDeviceMonitor:
+    """Test background device health checks."""
+
+    def _configure(self, device_file, *addresses):
+        devices = [{"id": f"d{i}", "name": f"D{i}", "address": a} for i, a in enumerate(addresses)]
+        device_file.write_text(json.dumps({"devices": devices, "selected": "d0"}))
+
+    def test_states_reported(self, mock_server_paths, test_device_file):
+        """Test online, unauthorized and unreachable devices are told apart."""
+        import server
+        self._configure(test_device_file, "10.0.0.1:5555", "10.0.0.2:5555", "10.0.0.3:5555")
+        client = _StubAdbClient({"10.0.0.1:5555": "device", "10.0.0.2:5555": "unauthorized"})
+        monitor = server.DeviceMonitor(interval=10, max_backoff=60)
+        with patch('server.ADB_CLIENT', client):
+            monitor.check_due()
+        assert monitor.state("10.0.0.1:5555")["state"] == "online"
+        assert monitor.state("10.0.0.2:5555")["state"] == "unauthorized"
+        offline = monitor.state("10.0.0.3:5555")
+        assert offline["state"] == "offline"
+        assert offline["message"] == "timed out"
+
+    def test_failing_device_backs_off(self, mock_server_paths, test_device_file):
+        """Test a dead device is retried less and less often, a healthy one every interval."""
+        import server
+        self._configure(test_device_file, "10.0.0.1:5555", "10.0.0.3:5555")
+        client = _StubAdbClient({"10.0.0.1:5555": "device"})
+        monitor = server.DeviceMonitor(interval=10, max_backoff=30)
+        now = time.time()
+        with patch('server.ADB_CLIENT', client):
+            for offset in (0, 11, 22, 33, 44, 55, 66):
+                with patch('server.time.time', return_value=now + offset):
+                    monitor.check_due()
+        assert client.connects.count("10.0.0.1:5555") == 7
+        # Retried after 20s, then at most every 30s
+        assert client.connects.count("10.0.0.3:5555") == 3
+        assert monitor.state("10.0.0.3:5555")["failures"] == 3
+
+    def test_ensure_fails_fast_without_reconnecting_online_device(self, mock_server_paths):
+        """Test a recently seen device is not reconnected and a dead one is rechecked once."""
+        import server
+        client = _StubAdbClient({"10.0.0.1:5555": "device"})
+        monitor = server.DeviceMonitor(interval=10)
+        with patch('server.ADB_CLIENT', client):
+            monitor.check("10.0.0.1:5555")
+            assert monitor.ensure("10.0.0.1:5555")["state"] == "online"
+            assert client.connects == ["10.0.0.1:5555"]
+            assert monitor.ensure("10.0.0.9:5555")["state"] == "offline"
+
+    def test_deploy_to_offline_device_fails_fast(self, mock_server_paths, temp_dir):
+        """Test install_on_device refuses an offline device without installing."""
+        import server
+        client = _StubAdbClient({})
+        apk = temp_dir / "app.apk"
+        apk.write_bytes(b"apk")
+        with patch('server.ADB_CLIENT', client), \
+                patch('server.DEVICE_MONITOR', server.DeviceMonitor()):
+            with pytest.raises(server.AdbError, match="offline"):
+                server.install_on_device("/usr/bin/adb", "10.0.0.3:5555", apk, [])
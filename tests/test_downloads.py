@@ -0,0 +1,129 @@
+"""Tests for artifact downloads."""
+import http.client
+import threading
+import pytest
+
+
+@pytest.mark.unit
+class TestParseByteRange:
+    """Test Range header parsing."""
+    
+    def test_ranges(self):
+        """Test the supported single-range forms."""
+        import server
+        assert server.parse_byte_range("bytes=0-9", 100) == (0, 9)
+        assert server.parse_byte_range("bytes=90-", 100) == (90, 99)
+        assert server.parse_byte_range("bytes=-10", 100) == (90, 99)
+        assert server.parse_byte_range("bytes=50-500", 100) == (50, 99)
+    
+    def test_ignored(self):
+        """Test headers that fall back to a full response."""
+        import server
+        assert server.parse_byte_range(None, 100) is None
+        assert server.parse_byte_range("bytes=0-1,5-6", 100) is None
+        assert server.parse_byte_range("items=0-1", 100) is None
+    
+    def test_unsatisfiable(self):
+        """Test ranges past the end of the file."""
+        import server
+        with pytest.raises(ValueError):
+            server.parse_byte_range("bytes=100-", 100)
+        with pytest.raises(ValueError):
+            server.parse_byte_range("bytes=-0", 100)
+
+
+@pytest.mark.unit
+class TestArtifactDownloads:
+    """Test the /artifacts/ route."""
+    
+    @pytest.fixture
+    def served_artifact(self, mock_server_paths, temp_dir):
+        import server
+        apk = temp_dir / "out" / "app-debug.apk"
+        apk.parent.mkdir()
+        apk.write_bytes(bytes(range(256)) * 4)
+        entry = server.ARTIFACT_STORE.publish("TestProject", apk, "debug")
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+        thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        yield httpd.server_address[1], entry
+        httpd.shutdown()
+        httpd.server_close()
+    
+    def _get(self, port, path, headers=None, method="GET"):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request(method, path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+    
+    def test_full_download(self, served_artifact):
+        """Test a plain GET returns the whole APK with a hash ETag."""
+        port, entry = served_artifact
+        response, body = self._get(port, f"/artifacts/TestProject/{entry['name']}")
+        assert response.status == 200
+        assert body == bytes(range(256)) * 4
+        assert response.getheader("ETag") == f'"{entry["sha256"]}"'
+        assert response.getheader("Accept-Ranges") == "bytes"
+    
+    def test_range_download(self, served_artifact):
+        """Test a resumed download gets only the requested bytes."""
+        port, entry = served_artifact
+        response, body = self._get(port, f"/artifacts/TestProject/{entry['name']}", {"Range": "bytes=1000-"})
+        assert response.status == 206
+        assert response.getheader("Content-Range") == "bytes 1000-1023/1024"
+        assert body == bytes(range(232, 256))
+    
+    def test_stale_if_range_sends_full_file(self, served_artifact):
+        """Test If-Range with an old ETag ignores the Range."""
+        port, entry = served_artifact
+        response, body = self._get(
+            port, f"/artifacts/TestProject/{entry['name']}", {"Range": "bytes=0-9", "If-Range": '"old"'}
+        )
+        assert response.status == 200
+        assert len(body) == 1024
+    
+    def test_unsatisfiable_range(self, served_artifact):
+        """Test a range past the end gets 416."""
+        port, entry = served_artifact
+        response, _ = self._get(port, f"/artifacts/TestProject/{entry['name']}", {"Range": "bytes=5000-"})
+        assert response.status == 416
+        assert response.getheader("Content-Range") == "bytes */1024"
+    
+    def test_if_none_match(self, served_artifact):
+        """Test an unchanged APK is not transferred again."""
+        port, entry = served_artifact
+        response, body = self._get(
+            port, f"/artifacts/TestProject/{entry['name']}", {"If-None-Match": f'"{entry["sha256"]}"'}
+        )
+        assert response.status == 304
+        assert body == b""
+    
+    def test_head(self, served_artifact):
+        """Test HEAD reports the size without a body."""
+        port, entry = served_artifact
+        response, body = self._get(port, f"/artifacts/TestProject/{entry['name']}", method="HEAD")
+        assert response.status == 200
+        assert response.getheader("Content-Length") == "1024"
+        assert body == b""
+    
+    def test_hidden_and_missing_files(self, served_artifact):
+        """Test index files and traversal attempts are not served."""
+        port, _ = served_artifact
+        assert self._get(port, "/artifacts/TestProject/.artifacts.json")[0].status == 404
+        assert self._get(port, "/artifacts/../server.py")[0].status == 404
+        assert self._get(port, "/artifacts/TestProject/missing.apk")[0].status == 404
+        assert self._get(port, "/artifacts/TestProject/%2E%2E%2Fserver.py")[0].status == 404
+        assert self._get(port, "/artifacts/%2E%2E/server.py")[0].status == 404
+    
+    def test_percent_encoded_names(self, mock_server_paths, temp_dir, served_artifact):
+        """Test project and file names are decoded as a browser encodes them."""
+        import server
+        port, _ = served_artifact
+        apk = temp_dir / "app-debug.apk"
+        apk.write_bytes(b"my app")
+        entry = server.ARTIFACT_STORE.publish("My App", apk, "debug")
+        response, body = self._get(port, f"/artifacts/My%20App/{entry['name']}")
+        assert response.status == 200
+        assert body == b"my app"
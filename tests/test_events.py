@@ -0,0 +1,120 @@
+"""Tests for status event streaming."""
+import json
+import threading
+import pytest
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+from http.server import SimpleHTTPRequestHandler
+
+
+@pytest.mark.unit
+class TestStatusEvents:
+    """Test status update fan-out."""
+    
+    def test_publish_reaches_subscribers(self):
+        """Test every subscriber gets published payloads."""
+        import server
+        events = server.StatusEvents(max_streams=4)
+        first = events.subscribe()
+        second = events.subscribe()
+        events.publish({"project": "A", "status": "building"})
+        assert first.get_nowait() == {"project": "A", "status": "building"}
+        assert second.get_nowait() == {"project": "A", "status": "building"}
+    
+    def test_stream_limit(self):
+        """Test subscribe refuses streams past the limit."""
+        import server
+        events = server.StatusEvents(max_streams=1)
+        subscription = events.subscribe()
+        assert subscription is not None
+        assert events.subscribe() is None
+        events.unsubscribe(subscription)
+        assert events.subscribe() is not None
+    
+    def test_slow_subscriber_dropped(self):
+        """Test a subscriber with a full queue is ended and removed."""
+        import server
+        events = server.StatusEvents(max_streams=2, max_queued=2)
+        subscription = events.subscribe()
+        for i in range(3):
+            events.publish({"progress": i})
+        assert events.subscriber_count() == 0
+        items = [subscription.get_nowait() for _ in range(subscription.qsize())]
+        assert items[-1] is None
+    
+    def test_close_ends_streams(self):
+        """Test close sends the end marker to every stream."""
+        import server
+        events = server.StatusEvents(max_streams=2)
+        subscription = events.subscribe()
+        events.close()
+        assert subscription.get_nowait() is None
+        assert events.subscriber_count() == 0
+    
+    def test_write_status_publishes(self, mock_server_paths):
+        """Test write_status pushes the new status to subscribers."""
+        import server
+        events = server.StatusEvents(max_streams=1)
+        with patch('server.STATUS_EVENTS', events):
+            subscription = events.subscribe()
+            server.write_status("TestProject", "building", 40)
+        payload = subscription.get_nowait()
+        assert payload["project"] == "TestProject"
+        assert payload["status"] == "building"
+        assert payload["progress"] == 40
+
+
+@pytest.mark.unit
+class TestEventStreamHandler:
+    """Test the /api/events endpoint."""
+    
+    def _create_handler(self, path):
+        import server
+        original_init = SimpleHTTPRequestHandler.__init__
+        SimpleHTTPRequestHandler.__init__ = lambda self, *args, **kwargs: None
+        try:
+            handler = server.Handler(MagicMock(), ("127.0.0.1", 8000), None)
+        finally:
+            SimpleHTTPRequestHandler.__init__ = original_init
+        handler.path = path
+        handler.request_version = 'HTTP/1.1'
+        handler.requestline = f'GET {path} HTTP/1.1'
+        handler.command = 'GET'
+        handler.headers = {}
+        handler.wfile = BytesIO()
+        handler.log_message = MagicMock()
+        return handler
+    
+    def test_streams_status_events(self, mock_server_paths):
+        """Test status updates are written as SSE frames."""
+        import server
+        events = server.StatusEvents(max_streams=1)
+        handler = self._create_handler("/api/events")
+        with patch('server.STATUS_EVENTS', events):
+            thread = threading.Thread(target=handler.do_GET)
+            thread.start()
+            while events.subscriber_count() == 0:
+                threading.Event().wait(0.01)
+            server.write_status("TestProject", "done", 100)
+            events.close()
+            thread.join(5)
+        body = handler.wfile.getvalue().decode()
+        assert "Content-Type: text/event-stream" in body
+        frame = body.split("event: status\n")[1]
+        data = json.loads(frame.split("data: ")[1].split("\n\n")[0])
+        assert data["status"] == "done"
+        assert handler.close_connection
+    
+    def test_rejects_when_limit_reached(self, mock_server_paths):
+        """Test the endpoint answers 503 when no stream slot is free."""
+        import server
+        from http import HTTPStatus
+        events = server.StatusEvents(max_streams=1)
+        events.subscribe()
+        handler = self._create_handler("/api/events")
+        handler._send_json = MagicMock()
+        with patch('server.STATUS_EVENTS', events):
+            handler.do_GET()
+        handler._send_json.assert_called_once_with(
+            {"error": "Too many event streams."}, status=HTTPStatus.SERVICE_UNAVAILABLE
+        )
@@ -0,0 +1,263 @@
+"""Tests for Gradle daemon management."""
+import pytest
+from unittest.mock import patch
+
+
+def _write_wrapper(project_dir, version):
+    wrapper = project_dir / "gradle" / "wrapper"
+    wrapper.mkdir(parents=True, exist_ok=True)
+    (wrapper / "gradle-wrapper.properties").write_text(
+        "distributionBase=GRADLE_USER_HOME\n"
+        f"distributionUrl=https\\://services.gradle.org/distributions/gradle-{version}-bin.zip\n"
+    )
+
+
+@pytest.mark.unit
+class TestGradleDaemonPool:
+    """Test daemon tracking and eviction."""
+    
+    def test_gradle_wrapper_version(self, test_project):
+        """Test reading the wrapper's Gradle version."""
+        import server
+        _write_wrapper(test_project, "8.5")
+        assert server.gradle_wrapper_version(test_project) == "8.5"
+    
+    def test_gradle_wrapper_version_missing(self, test_project):
+        """Test projects without wrapper properties."""
+        import server
+        assert server.gradle_wrapper_version(test_project) is None
+    
+    def test_first_build_cold_then_warm(self, test_project):
+        """Test a released daemon is reported warm for the next build."""
+        import server
+        pool = server.GradleDaemonPool(max_idle=4, idle_timeout=600)
+        key = ("8.5", "default")
+        assert pool.acquire(key, test_project) is False
+        pool.release(key, False, started_daemon=True)
+        assert pool.acquire(key, test_project) is True
+        pool.release(key, True, started_daemon=False)
+        assert pool.summary()[0]["daemons"] == 1
+        assert pool.summary()[0]["idle"] == 1
+    
+    def test_concurrent_builds_need_second_daemon(self, test_project):
+        """Test a busy daemon is not counted as available."""
+        import server
+        pool = server.GradleDaemonPool(max_idle=4, idle_timeout=600)
+        key = ("8.5", "default")
+        pool.acquire(key, test_project)
+        pool.release(key, False, started_daemon=True)
+        assert pool.acquire(key, test_project) is True
+        assert pool.acquire(key, test_project) is False
+        pool.release(key, False, started_daemon=True)
+        pool.release(key, True, started_daemon=False)
+        assert pool.summary()[0]["daemons"] == 2
+    
+    def test_idle_daemons_expire(self, test_project):
+        """Test entries older than the idle timeout count as cold."""
+        import server
+        pool = server.GradleDaemonPool(max_idle=4, idle_timeout=600)
+        key = ("8.5", "default")
+        pool.acquire(key, test_project)
+        pool.release(key, False, started_daemon=True)
+        with patch('server.time.time', return_value=server.time.time() + 601):
+            assert pool.acquire(key, test_project) is False
+    
+    @patch('server.subprocess.run')
+    def test_lru_eviction(self, mock_run, test_projects_dir):
+        """Test the least recently used version is stopped past the idle cap."""
+        import server
+        pool = server.GradleDaemonPool(max_idle=1, idle_timeout=600)
+        old_dir = test_projects_dir / "Old"
+        new_dir = test_projects_dir / "New"
+        pool.acquire(("7.6", "default"), old_dir)
+        pool.release(("7.6", "default"), False, started_daemon=True)
+        mock_run.assert_not_called()
+        pool.acquire(("8.5", "default"), new_dir)
+        pool.release(("8.5", "default"), False, started_daemon=True)
+        
+        mock_run.assert_called_once()
+        assert mock_run.call_args[0][0] == [str(old_dir / "gradlew"), "--stop"]
+        daemons = {entry["gradle_version"]: entry["daemons"] for entry in pool.summary()}
+        assert daemons == {"7.6": 0, "8.5": 1}
+    
+    @patch('server.subprocess.run')
+    def test_busy_version_not_evicted(self, mock_run, test_projects_dir):
+        """Test daemons of a version with a running build are never stopped."""
+        import server
+        pool = server.GradleDaemonPool(max_idle=0, idle_timeout=600)
+        key = ("8.5", "default")
+        pool.acquire(key, test_projects_dir)
+        pool.release(key, False, started_daemon=True)
+        mock_run.reset_mock()
+        pool.acquire(key, test_projects_dir)
+        pool.acquire(key, test_projects_dir)
+        pool.release(key, True, started_daemon=False)
+        mock_run.assert_not_called()
+    
+    def test_build_waits_for_pending_stop(self, test_projects_dir):
+        """Test a build of a version being stopped starts only once the stop is done."""
+        import threading
+        import time
+        import server
+        pool = server.GradleDaemonPool(max_idle=0, idle_timeout=600)
+        key = ("8.5", "default")
+        events = []
+        stopping = threading.Event()
+        
+        def slow_stop(*args, **kwargs):
+            stopping.set()
+            time.sleep(0.2)
+            events.append("stopped")
+        
+        def build():
+            stopping.wait(5)
+            pool.acquire(key, test_projects_dir)
+            events.append("acquired")
+        
+        builder = threading.Thread(target=build)
+        builder.start()
+        with patch('server.subprocess.run', side_effect=slow_stop):
+            pool.acquire(key, test_projects_dir)
+            pool.release(key, False, started_daemon=True)
+        builder.join(5)
+        assert events == ["stopped", "acquired"]
+    
+    def test_run_gradle_detects_cold_start(self, mock_server_paths, test_project):
+        """Test run_gradle reports a cold start from Gradle's output."""
+        import server
+        (test_project / "gradlew").write_text(
+            "#!/bin/sh\necho 'Starting a Gradle Daemon (subsequent builds will be faster)'\necho \"$@\"\n"
+        )
+        pool = server.GradleDaemonPool(max_idle=4, idle_timeout=600)
+        with patch('server.GRADLE_DAEMONS', pool):
+            returncode, tail, warm = server.run_gradle("TestProject", test_project, ["assembleDebug"])
+        assert returncode == 0
+        assert warm is False
+        assert tail[-1].startswith("--daemon -Dorg.gradle.daemon.idletimeout=600000")
+        assert tail[-1].endswith("assembleDebug")
+        
+        (test_project / "gradlew").write_text("#!/bin/sh\necho 'BUILD SUCCESSFUL'\n")
+        with patch('server.GRADLE_DAEMONS', pool):
+            _, _, warm = server.run_gradle("TestProject", test_project, ["assembleDebug"])
+        assert warm is True
+
+
+@pytest.mark.unit
+class TestTaskProfile:
+    """Test task-level build profiles."""
+    
+    def test_feed_and_summary(self):
+        """Test marker lines are parsed and outcomes counted."""
+        import server
+        profile = server.TaskProfile()
+        for line in [
+            "##build-server-config 1200",
+            "> Task :app:preBuild UP-TO-DATE",
+            "##build-server-task :app:compileDebugKotlin EXECUTED 5400",
+            "##build-server-task :lib:compileDebugKotlin FROM-CACHE 300",
+            "##build-server-task :app:mergeDebugResources UP-TO-DATE 20",
+            "##build-server-task :app:processDebugManifest FROM-CACHE 80",
+            "##build-server-task :app:compileDebugAidl NO-SOURCE 0",
+        ]:
+            profile.feed(line)
+        summary = profile.summary()
+        assert summary["configuration_ms"] == 1200
+        assert summary["tasks"] == 5
+        assert summary["task_ms"] == 5800
+        assert summary["outcomes"]["FROM-CACHE"] == 2
+        assert summary["cache_hit_ratio"] == round(2 / 3, 3)
+    
+    def test_supported_gradle_versions(self, test_project):
+        """Test profiling is only enabled where task completion listeners exist."""
+        import server
+        assert server.TaskProfile.supported(test_project) is False
+        _write_wrapper(test_project, "6.0.1")
+        assert server.TaskProfile.supported(test_project) is False
+        _write_wrapper(test_project, "8.5")
+        assert server.TaskProfile.supported(test_project) is True
+    
+    def test_run_build_stores_profile(self, mock_server_paths, test_project):
+        """Test a build records its profile and the report lists the slowest tasks."""
+        import server
+        _write_wrapper(test_project, "8.5")
+        (test_project / "gradlew").write_text(
+            "#!/bin/sh\n"
+            "case \"$*\" in *task-profile.gradle*) ;; *) exit 1;; esac\n"
+            "echo '##build-server-config 900'\n"
+            "echo '##build-server-task :app:compileDebugKotlin EXECUTED 4000'\n"
+            "echo '##build-server-task :app:dexBuilderDebug FROM-CACHE 700'\n"
+            "echo '##build-server-task :app:packageDebug EXECUTED 1500'\n"
+        )
+        pool = server.GradleDaemonPool(max_idle=4, idle_timeout=600)
+        with patch('server.GRADLE_DAEMONS', pool):
+            server.run_build("TestProject", "debug")
+        
+        report = server.build_profile_report("TestProject", limit=2)
+        assert [task["path"] for task in report["slowest_tasks"]] == [
+            ":app:compileDebugKotlin", ":app:packageDebug",
+        ]
+        assert report["latest"]["configuration_ms"] == 900
+        assert report["latest"]["cache_hit_ratio"] == round(1 / 3, 3)
+        assert report["latest"]["build_type"] == "debug"
+        assert "task_list" not in report["history"][0]
+
+
+@pytest.mark.unit
+class TestFailureSummary:
+    """Test failure extraction from build output."""
+    
+    def test_compiler_and_resource_errors(self):
+        """Test the failing task and compiler, resource and dependency errors are recognised."""
+        import server
+        failures = server.FailureSummary()
+        for line in [
+            "> Task :app:compileDebugKotlin FAILED",
+            "e: file:///src/app/src/main/java/com/example/Main.kt:12:5 Unresolved reference: foo",
+            "e: /src/app/src/main/java/com/example/Old.kt: (7, 9): Type mismatch",
+            "/src/lib/src/main/java/com/example/Util.java:33: error: cannot find symbol",
+            "ERROR: /src/app/src/main/res/layout/main.xml:4: AAPT: error: attribute android:foo not found.",
+            "   > Could not find com.example:missing:1.0.",
+            "* What went wrong:",
+            "Execution failed for task ':app:compileDebugKotlin'.",
+            "> Compilation error. See log for more details",
+            "e: file:///src/app/src/main/java/com/example/Main.kt:12:5 Unresolved reference: foo",
+        ]:
+            failures.feed(line)
+        summary = failures.summary()
+        assert summary["task"] == ":app:compileDebugKotlin"
+        assert summary["headline"] == "Execution failed for task ':app:compileDebugKotlin'."
+        assert summary["error_count"] == 5
+        assert summary["errors"][0] == {
+            "kind": "kotlin", "message": "Unresolved reference: foo",
+            "file": "/src/app/src/main/java/com/example/Main.kt", "line": 12, "column": 5,
+        }
+        assert (summary["errors"][1]["line"], summary["errors"][1]["column"]) == (7, 9)
+        assert [e["kind"] for e in summary["errors"][2:]] == ["java", "resource", "dependency"]
+        assert summary["errors"][3]["file"] == "/src/app/src/main/res/layout/main.xml"
+        assert summary["errors"][4]["message"] == "Could not find com.example:missing:1.0."
+    
+    def test_nothing_recognised(self):
+        """Test output without failure details has no summary."""
+        import server
+        failures = server.FailureSummary()
+        failures.feed("BUILD SUCCESSFUL in 3s")
+        assert failures.summary() is None
+    
+    def test_run_build_reports_failure(self, mock_server_paths, test_project):
+        """Test a failed build carries its failure in the status and the history."""
+        import server
+        (test_project / "gradlew").write_text(
+            "#!/bin/sh\n"
+            "echo '> Task :app:compileDebugJavaWithJavac FAILED'\n"
+            "echo '/p/app/src/main/java/A.java:3: error: missing return statement'\n"
+            "exit 1\n"
+        )
+        history = server.BuildHistory()
+        pool = server.GradleDaemonPool(max_idle=4, idle_timeout=600)
+        with patch('server.GRADLE_DAEMONS', pool), patch('server.BUILD_HISTORY', history):
+            server.run_build("TestProject", "debug")
+        
+        failure = server.load_status("TestProject")["failure"]
+        assert failure["task"] == ":app:compileDebugJavaWithJavac"
+        assert failure["errors"][0]["message"] == "missing return statement"
+        assert history.jobs(project_name="TestProject")[0][0]["failure"] == failure
@@ -86,6 +86,58 @@ class TestHandler:
         handler.do_GET()
         handler._send_json.assert_called_once_with({"status": "building", "progress": 50})
     
+    @patch('server.list_projects')
+    def test_get_status_bulk(self, mock_list_projects, mock_server_paths):
+        """Test GET /api/status without a project returns every status."""
+        import server
+        mock_list_projects.return_value = ["Project1", "Project2"]
+        server.write_status("Project1", "building", 40)
+        handler = self._create_handler()
+        handler.path = "/api/status"
+        handler._send_json = MagicMock()
+        handler.log_message = MagicMock()
+        handler.do_GET()
+        payload = handler._send_json.call_args[0][0]
+        assert payload["statuses"]["Project1"]["status"] == "building"
+        assert payload["statuses"]["Project2"]["status"] == "not_started"
+        assert "ETag" in handler._send_json.call_args[1]["headers"]
+    
+    @patch('server.list_projects')
+    def test_get_status_bulk_subset(self, mock_list_projects, mock_server_paths):
+        """Test GET /api/status?projects= limits the snapshot."""
+        mock_list_projects.return_value = ["Project1", "Project2"]
+        handler = self._create_handler()
+        handler.path = "/api/status?projects=Project2,Unknown"
+        handler._send_json = MagicMock()
+        handler.log_message = MagicMock()
+        handler.do_GET()
+        payload = handler._send_json.call_args[0][0]
+        assert list(payload["statuses"]) == ["Project2"]
+    
+    @patch('server.list_projects')
+    def test_get_status_bulk_not_modified(self, mock_list_projects, mock_server_paths):
+        """Test a matching If-None-Match gets 304 until a status changes."""
+        import server
+        from http import HTTPStatus
+        mock_list_projects.return_value = ["Project1"]
+        etag = server.status_snapshot_etag(server.STATUS_STORE.version, ["Project1"])
+        handler = self._create_handler()
+        handler.path = "/api/status"
+        handler.headers = {"If-None-Match": etag}
+        handler.send_response = MagicMock()
+        handler.send_header = MagicMock()
+        handler.end_headers = MagicMock()
+        handler._send_json = MagicMock()
+        handler.log_message = MagicMock()
+        handler.do_GET()
+        handler.send_response.assert_called_once_with(HTTPStatus.NOT_MODIFIED)
+        handler._send_json.assert_not_called()
+        
+        server.write_status("Project1", "building", 40)
+        handler._send_json = MagicMock()
+        handler.do_GET()
+        handler._send_json.assert_called_once()
+    
     @patch('server.save_device')
     def test_post_device(self, mock_save_device, mock_server_paths):
         """Test POST /api/device endpoint."""
@@ -144,3 +196,28 @@ class TestHandler:
             handler.do_POST()
             handler._send_json.assert_called_once_with({"message": "Deploy started"})
             mock_thread.assert_called_once()
+
+    def test_get_logs_since_offset(self, mock_server_paths, test_project):
+        """Test GET /api/logs with since returns only the appended bytes."""
+        import server
+        server.run_logged_command(["sh", "-c", "echo one; echo two"], test_project,
+                                  server.build_log_path("TestProject"))
+        handler = self._create_handler()
+        handler.path = "/api/logs?project=TestProject&since=4"
+        handler._send_json = MagicMock()
+        handler.log_message = MagicMock()
+        handler.do_GET()
+        delta = handler._send_json.call_args[0][0]
+        assert delta["data"] == "two\n"
+        assert delta["offset"] == 8
+        assert delta["running"] is False
+
+    def test_search_needs_three_characters(self, mock_server_paths):
+        """Test GET /api/search rejects text too short for the trigram index."""
+        from http import HTTPStatus
+        handler = self._create_handler()
+        handler.path = "/api/search?q=ab"
+        handler._send_json = MagicMock()
+        handler.log_message = MagicMock()
+        handler.do_GET()
+        assert handler._send_json.call_args[1]["status"] == HTTPStatus.BAD_REQUEST
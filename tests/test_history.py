@@ -0,0 +1,277 @@
+"""Tests for the build history database and job logs."""
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+
+@pytest.mark.unit
+class TestBuildHistory:
+    """Test recording and querying jobs."""
+
+    def test_jobs_recorded_and_filtered(self, mock_server_paths):
+        """Test finished jobs can be filtered by project, type and status."""
+        import server
+        history = server.BuildHistory()
+        build = history.start_job("App", "build", variant="debug")
+        assert history.job(build["id"])["status"] == "running"
+        history.finish_job(build, status="done", exit_code=0, artifact_sha256="ab" * 32)
+        deploy = history.start_job("App", "deploy", variant="debug", device="10.0.0.1:5555")
+        history.finish_job(deploy, status="error", message="Deploy failed.")
+        other = history.start_job("Other", "clean")
+        history.finish_job(other, status="done")
+
+        row = history.job(build["id"])
+        assert row["exit_code"] == 0
+        assert row["artifact_sha256"] == "ab" * 32
+        assert row["duration"] >= 0
+        assert [j["id"] for j in history.jobs(project_name="App")[0]] == [deploy["id"], build["id"]]
+        failures, _ = history.jobs(status="error")
+        assert [(j["type"], j["device"]) for j in failures] == [("deploy", "10.0.0.1:5555")]
+        assert history.jobs(job_type="clean")[0][0]["project"] == "Other"
+
+    def test_pagination(self, mock_server_paths):
+        """Test pages follow each other through the cursor without gaps."""
+        import server
+        history = server.BuildHistory()
+        ids = []
+        for i in range(5):
+            with patch('server.time.time', return_value=1000.0 + i):
+                job = history.start_job("App", "build")
+                history.finish_job(job, status="done")
+            ids.append(job["id"])
+
+        first, cursor = history.jobs(limit=2)
+        second, cursor2 = history.jobs(limit=2, before=cursor)
+        third, cursor3 = history.jobs(limit=2, before=cursor2)
+        assert [j["id"] for j in first + second + third] == ids[::-1]
+        assert cursor3 is None
+        assert [j["id"] for j in history.jobs(since=1003.0)[0]] == ids[:2:-1]
+
+    def test_write_behind(self, mock_server_paths):
+        """Test rows queued by the background writer are written by stop()."""
+        import server
+        history = server.BuildHistory()
+        history.start()
+        try:
+            job = history.start_job("App", "build")
+            history.finish_job(job, status="done")
+        finally:
+            history.stop()
+        assert history.job(job["id"])["status"] == "done"
+
+    def test_run_build_keeps_each_jobs_log(self, mock_server_paths, test_project):
+        """Test every build gets its own archived log that later builds do not overwrite."""
+        import server
+        history = server.BuildHistory()
+        pool = server.GradleDaemonPool(max_idle=4, idle_timeout=600)
+        with patch('server.BUILD_HISTORY', history), patch('server.GRADLE_DAEMONS', pool):
+            (test_project / "gradlew").write_text("#!/bin/sh\necho 'first failure'\nexit 2\n")
+            server.run_build("TestProject", "debug")
+            (test_project / "gradlew").write_text("#!/bin/sh\necho 'second failure'\nexit 3\n")
+            server.run_build("TestProject", "debug")
+            server.save_build_log("TestProject", "deploy output")
+
+            jobs, _ = history.jobs(project_name="TestProject")
+            assert [j["exit_code"] for j in jobs] == [3, 2]
+            assert all(j["status"] == "error" for j in jobs)
+            assert server.get_job_log(jobs[1]["id"]) == (["first failure\n"], 1)
+            assert server.get_job_log(jobs[0]["id"]) == (["second failure\n"], 1)
+
+
+@pytest.mark.unit
+class TestLogArchive:
+    """Test compressed job logs."""
+
+    def _source(self, temp_dir, lines):
+        source = temp_dir / "build.log"
+        source.write_text("".join(f"line {i}\n" for i in range(lines)))
+        return source
+
+    def test_line_ranges_read_from_blocks(self, mock_server_paths, temp_dir):
+        """Test a range is served from the blocks it covers and the file is plain gzip."""
+        import gzip
+        import server
+        archive = server.LogArchive()
+        with patch.object(server.LogArchive, 'BLOCK_LINES', 100):
+            name = archive.write("job1", self._source(temp_dir, 1050))
+        path = mock_server_paths["logs"] / "jobs" / name
+        assert gzip.decompress(path.read_bytes()).decode().count("\n") == 1050
+
+        lines, total = archive.read_lines(name, 195, 10)
+        assert total == 1050
+        assert lines == [f"line {i}\n" for i in range(195, 205)]
+        assert archive.read_lines(name, 1045)[0] == [f"line {i}\n" for i in range(1045, 1050)]
+        assert archive.read_lines(name, 2000, 10) == ([], 1050)
+
+        # A damaged block elsewhere in the file does not affect this range
+        data = bytearray(path.read_bytes())
+        data[-10:] = b"\0" * 10
+        path.write_bytes(bytes(data))
+        assert archive.read_lines(name, 0, 3)[0] == ["line 0\n", "line 1\n", "line 2\n"]
+
+    def test_carriage_returns_stay_inside_lines(self, mock_server_paths, temp_dir):
+        """Test lines are only split on LF, as they were counted when archived."""
+        import server
+        archive = server.LogArchive()
+        source = temp_dir / "build.log"
+        source.write_bytes(b"progress 10%\rprogress 100%\npage\x0cbreak\nline3\r\nline4 ERRORX\n")
+        with patch.object(server.LogArchive, 'BLOCK_LINES', 2):
+            name = archive.write("job1", source)
+        assert archive.read_lines(name, 3, 1) == (["line4 ERRORX\n"], 4)
+        lines, total = archive.read_lines(name)
+        assert total == 4
+        assert lines == ["progress 10%\rprogress 100%\n", "page\x0cbreak\n", "line3\r\n", "line4 ERRORX\n"]
+
+    def test_retention_by_size(self, mock_server_paths, temp_dir):
+        """Test the oldest logs are removed once the archive is over its size."""
+        import os
+        import server
+        archive = server.LogArchive(max_bytes=10 ** 9)
+        names = []
+        for i in range(3):
+            source = temp_dir / f"{i}.log"
+            source.write_bytes(os.urandom(2000))
+            names.append(archive.write(f"job{i}", source))
+            for path in (mock_server_paths["logs"] / "jobs").glob(f"job{i}.*"):
+                os.utime(path, (1000 + i, 1000 + i))
+        archive.max_bytes = archive.disk_usage() - 1
+        archive.enforce_retention()
+        assert archive.read_lines(names[0]) is None
+        assert archive.read_lines(names[1]) is not None
+        assert archive.read_lines(names[2]) is not None
+
+
+@pytest.mark.unit
+class TestLiveLogs:
+    """Test following logs while they are written."""
+
+    def test_follow_running_log(self, mock_server_paths):
+        """Test readers get only new bytes, wait for output and notice a new log."""
+        import server
+        logs = server.LiveLogs()
+        path = mock_server_paths["logs"] / "App.log"
+        path.write_text("one\n")
+        logs.begin(path)
+
+        first = logs.read(path)
+        assert (first["data"], first["offset"], first["running"]) == ("one\n", 4, True)
+
+        def append():
+            time.sleep(0.1)
+            with path.open("a") as f:
+                f.write("two\n")
+            logs.appended(path)
+        threading.Thread(target=append).start()
+        started = time.monotonic()
+        second = logs.read(path, 4, first["log_id"], wait=5)
+        assert second["data"] == "two\n"
+        assert time.monotonic() - started < 2
+
+        # The next job writes a new file; an offset into the old one starts over
+        path.unlink()
+        path.write_text("three\n")
+        logs.begin(path)
+        logs.end(path)
+        third = logs.read(path, 8, second["log_id"], wait=5)
+        assert (third["data"], third["reset"], third["running"]) == ("three\n", True, False)
+
+    def test_waiting_readers_limited(self, mock_server_paths):
+        """Test readers past max_waiters are answered at once instead of waiting."""
+        import server
+        logs = server.LiveLogs(max_waiters=1)
+        path = mock_server_paths["logs"] / "App.log"
+        path.write_text("one\n")
+        logs.begin(path)
+        waiter = threading.Thread(target=logs.read, args=(path, 4), kwargs={"wait": 1})
+        waiter.start()
+        while logs._waiters == 0:
+            time.sleep(0.01)
+
+        started = time.monotonic()
+        delta = logs.read(path, 4, wait=5)
+        assert time.monotonic() - started < 0.5
+        assert (delta["data"], delta["running"]) == ("", True)
+        waiter.join()
+        assert logs._waiters == 0
+
+    def test_limit_does_not_split_characters(self, mock_server_paths):
+        """Test a delta cut by the byte limit ends on a whole character."""
+        import server
+        logs = server.LiveLogs()
+        path = mock_server_paths["logs"] / "App.log"
+        path.write_text("abcd\u00e9f", encoding="utf-8")
+        delta = logs.read(path, limit=5)
+        assert (delta["data"], delta["offset"]) == ("abcd", 4)
+        assert logs.read(path, delta["offset"])["data"] == "\u00e9f"
+
+
+@pytest.mark.unit
+class TestLogSearch:
+    """Test searching archived job logs."""
+
+    def _job(self, history, temp_dir, project, text, started_at):
+        source = temp_dir / f"{project}-{started_at}.log"
+        source.write_text(text)
+        with patch('server.time.time', return_value=started_at):
+            job = history.start_job(project, "build")
+            history.finish_job(job, status="error", log_source=source)
+        return job
+
+    def test_search_finds_lines(self, mock_server_paths, temp_dir):
+        """Test matches come back with job and line, newest first, and respect filters."""
+        import re
+        import server
+        history = server.BuildHistory()
+        search = server.LogSearch()
+        with patch('server.BUILD_HISTORY', history), patch('server.LOG_SEARCH', search), \
+                patch.object(server.LogArchive, 'BLOCK_LINES', 2):
+            old = self._job(history, temp_dir, "App", "ok\nok\nok\njava.lang.OutOfMemoryError: Metaspace\n", 1000.0)
+            new = self._job(history, temp_dir, "Other", "w: 'foo' is deprecated\nOUTOFMEMORYERROR: Java heap\n", 2000.0)
+
+            matches, truncated = search.search("outofmemoryerror")
+            assert [(m["job"], m["line"]) for m in matches] == [(new["id"], 1), (old["id"], 3)]
+            assert matches[1]["text"] == "java.lang.OutOfMemoryError: Metaspace"
+            assert truncated is False
+            assert search.search("OutOfMemoryError", re.compile(r"Metaspace$"))[0][0]["job"] == old["id"]
+            assert [m["job"] for m in search.search("outofmemory", project_name="App")[0]] == [old["id"]]
+            assert [m["job"] for m in search.search("outofmemory", since=1500.0)[0]] == [new["id"]]
+            assert search.search("outofmemory", limit=1) == (matches[:1], True)
+
+    def test_search_lines_with_carriage_returns(self, mock_server_paths, temp_dir):
+        """Test block line counts and match line numbers ignore CRs inside lines."""
+        import server
+        history = server.BuildHistory()
+        search = server.LogSearch()
+        with patch('server.BUILD_HISTORY', history), patch('server.LOG_SEARCH', search), \
+                patch.object(server.LogArchive, 'BLOCK_LINES', 2):
+            job = self._job(history, temp_dir, "App",
+                            "progress 10%\rERRORX 100%\npage\x0cbreak\nline3 ERRORX\nline4\n", 1000.0)
+            matches, _ = search.search("ERRORX")
+        assert [(m["job"], m["line"], m["text"]) for m in matches] == [
+            (job["id"], 0, "progress 10%\rERRORX 100%"),
+            (job["id"], 2, "line3 ERRORX"),
+        ]
+
+    def test_removed_logs_leave_index(self, mock_server_paths, temp_dir):
+        """Test logs removed by retention are no longer found."""
+        import server
+        history = server.BuildHistory()
+        search = server.LogSearch()
+        with patch('server.BUILD_HISTORY', history), patch('server.LOG_SEARCH', search):
+            job = self._job(history, temp_dir, "App", "Execution failed for task ':app:lint'\n", 1000.0)
+            assert search.search("failed for task")[0]
+            search.remove(job["log"])
+            assert search.search("failed for task") == ([], False)
+
+    def test_background_indexer_catches_up(self, mock_server_paths, temp_dir):
+        """Test logs archived while nothing indexed them are indexed on start."""
+        import server
+        history = server.BuildHistory()
+        search = server.LogSearch()
+        with patch('server.BUILD_HISTORY', history), patch.object(server.LOG_SEARCH, 'add'):
+            job = self._job(history, temp_dir, "App", "Daemon will be stopped\n", 1000.0)
+        with patch('server.BUILD_HISTORY', history), patch('server.LOG_SEARCH', search):
+            search.start()
+            search.stop()
+            assert [m["job"] for m in search.search("daemon will")[0]] == [job["id"]]
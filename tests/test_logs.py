@@ -48,3 +48,29 @@ class TestBuildLogs:
         import server
         path = server.build_log_path("TestProject")
         assert path == mock_server_paths["logs"] / "TestProject.log"
+    
+    def test_run_logged_command_streams_full_output(self, mock_server_paths, test_logs_dir, temp_dir):
+        """Test command output goes to disk in full while only the tail is kept."""
+        import sys
+        import server
+        log_path = test_logs_dir / "TestProject.log"
+        script = "import sys\nfor i in range(500): print(f'line {i}')\nsys.exit(3)"
+        returncode, tail = server.run_logged_command(
+            [sys.executable, "-c", script], temp_dir, log_path, tail_lines=5
+        )
+        assert returncode == 3
+        assert tail == [f"line {i}" for i in range(495, 500)]
+        lines = log_path.read_text().splitlines()
+        assert len(lines) == 500
+        assert lines[0] == "line 0"
+    
+    def test_run_logged_command_merges_stderr(self, mock_server_paths, test_logs_dir, temp_dir):
+        """Test stderr is captured in the same log."""
+        import sys
+        import server
+        log_path = test_logs_dir / "TestProject.log"
+        script = "import sys\nprint('out', flush=True)\nprint('err', file=sys.stderr)"
+        returncode, tail = server.run_logged_command([sys.executable, "-c", script], temp_dir, log_path)
+        assert returncode == 0
+        assert tail == ["out", "err"]
+        assert log_path.read_text() == "out\nerr\n"
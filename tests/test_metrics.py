@@ -0,0 +1,125 @@
+"""Tests for build and request metrics."""
+import http.client
+import re
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+
+@pytest.mark.unit
+class TestMetrics:
+    """Test histogram recording and the text format."""
+
+    def test_histogram_rendering(self):
+        """Test buckets are cumulative and labels are escaped."""
+        import server
+        metrics = server.Metrics()
+        metrics.observe("build_server_queue_wait_seconds", 0.2, lane="interactive")
+        metrics.observe("build_server_queue_wait_seconds", 7, lane="interactive")
+        metrics.observe("build_server_phase_duration_seconds", 1, job="build", phase="gradle", project='a"b')
+        text = metrics.render([("build_server_active_builds", "Running jobs.", 2)])
+
+        assert "# TYPE build_server_queue_wait_seconds histogram" in text
+        assert 'build_server_queue_wait_seconds_bucket{lane="interactive",le="0.1"} 0' in text
+        assert 'build_server_queue_wait_seconds_bucket{lane="interactive",le="0.25"} 1' in text
+        assert 'build_server_queue_wait_seconds_bucket{lane="interactive",le="10"} 2' in text
+        assert 'build_server_queue_wait_seconds_bucket{lane="interactive",le="+Inf"} 2' in text
+        assert 'build_server_queue_wait_seconds_sum{lane="interactive"} 7.200000' in text
+        assert 'build_server_queue_wait_seconds_count{lane="interactive"} 2' in text
+        assert 'project="a\\"b"' in text
+        assert "# TYPE build_server_active_builds gauge\nbuild_server_active_builds 2\n" in text
+
+    def test_phase_timer(self):
+        """Test each phase and the job total are recorded."""
+        import server
+        metrics = server.Metrics()
+        phases = metrics.phases("build", "TestProject")
+        phases.start("fingerprint")
+        phases.start("gradle")
+        phases.finish()
+        text = metrics.render()
+        for phase in ("fingerprint", "gradle", "total"):
+            assert (f'build_server_phase_duration_seconds_count{{job="build",phase="{phase}",'
+                    f'project="TestProject"}} 1') in text
+
+    def test_run_build_records_phases(self, mock_server_paths, test_project):
+        """Test a build records its pipeline phases."""
+        import server
+        metrics = server.Metrics()
+        with patch('server.METRICS', metrics), \
+                patch('server.run_gradle', return_value=(1, ["FAILURE"], True)):
+            server.run_build("TestProject", "debug")
+        text = metrics.render()
+        assert 'job="build",phase="fingerprint",project="TestProject"} 1' in text
+        assert 'job="build",phase="gradle",project="TestProject"} 1' in text
+        assert 'job="build",phase="total",project="TestProject"} 1' in text
+
+
+@pytest.mark.unit
+class TestMetricsEndpoint:
+    """Test /api/metrics and per-route latency."""
+
+    @pytest.fixture
+    def port(self, mock_server_paths):
+        import server
+        with patch('server.METRICS', server.Metrics()):
+            httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+            thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+            thread.start()
+            yield httpd.server_address[1]
+            httpd.shutdown()
+            httpd.server_close()
+
+    def _get(self, port, path):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", path)
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_metrics_endpoint(self, port, mock_server_paths):
+        """Test route latency and gauges are exposed in the text format."""
+        artifacts = mock_server_paths["artifacts"] / "TestProject"
+        artifacts.mkdir()
+        (artifacts / "app.apk").write_bytes(b"x" * 1000)
+        self._get(port, "/api/device")
+        self._get(port, "/no/such/file")
+        # A request is recorded just after its response went out
+        for _ in range(50):
+            response, body = self._get(port, "/api/metrics")
+            text = body.decode()
+            if 'route="unmatched"' in text:
+                break
+            time.sleep(0.02)
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/plain; version=0.0.4")
+        assert ('build_server_http_request_duration_seconds_count'
+                '{code="200",method="GET",route="/api/device"} 1') in text
+        assert 'route="unmatched"' in text
+        assert "build_server_artifact_disk_bytes 1000" in text
+        # Other tests may leave jobs on the shared scheduler
+        assert re.search(r"^build_server_active_builds \d+$", text, re.M)
+
+    def test_rejected_requests_share_one_route(self, port, mock_server_paths):
+        """Test over-long request lines and unsupported methods do not add series per path."""
+        import socket
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            sock.sendall(b"GET /" + b"a" * 70000 + b" HTTP/1.1\r\n\r\n")
+            assert b" 414 " in sock.recv(1024).split(b"\r\n")[0]
+        for path in ("/x1", "/x2"):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("DELETE", path)
+            assert conn.getresponse().status == 501
+            conn.close()
+        expected = ('build_server_http_request_duration_seconds_count'
+                    '{code="501",method="DELETE",route="unmatched"} 2')
+        for _ in range(50):
+            text = self._get(port, "/api/metrics")[1].decode()
+            if expected in text and 'code="414"' in text:
+                break
+            time.sleep(0.02)
+        assert expected in text
+        assert 'code="414",method="other",route="unmatched"} 1' in text
+        assert "/x1" not in text
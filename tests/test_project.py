@@ -1,6 +1,7 @@
 """Tests for project-related functions."""
 import pytest
 from pathlib import Path
+from unittest.mock import patch
 
 
 @pytest.mark.unit
@@ -66,3 +67,128 @@ class TestProjectPath:
         
         projects = server.list_projects()
         assert projects == []
+
+
+@pytest.mark.unit
+class TestProjectIndex:
+    """Test the cached project index."""
+    
+    def _settings(self, project_dir, text):
+        (project_dir / "settings.gradle").write_text(text)
+    
+    def test_settings_modules(self, test_project):
+        """Test module names are read from Groovy and Kotlin settings."""
+        import server
+        self._settings(test_project, "rootProject.name = 'x'\ninclude ':app', ':core:data'\ninclude 'feature'\n")
+        (test_project / "settings.gradle.kts").write_text('include(":app", ":wear")\n')
+        assert server.settings_modules(test_project) == [":app", ":core:data", ":feature", ":wear"]
+    
+    def test_metadata(self, mock_server_paths, test_project):
+        """Test the index carries wrapper version and modules."""
+        import server
+        self._settings(test_project, "include ':app'\n")
+        wrapper = test_project / "gradle" / "wrapper"
+        wrapper.mkdir(parents=True)
+        (wrapper / "gradle-wrapper.properties").write_text(
+            "distributionUrl=https\\://services.gradle.org/distributions/gradle-8.7-all.zip\n"
+        )
+        index = server.ProjectIndex(rescan_interval=60)
+        assert index.projects() == {"TestProject": {"gradle_version": "8.7", "modules": [":app"]}}
+    
+    def test_cached_until_directory_changes(self, mock_server_paths, test_project):
+        """Test the directory is not rescanned while its mtime is unchanged."""
+        import os
+        import server
+        index = server.ProjectIndex(rescan_interval=60)
+        assert index.names() == ["TestProject"]
+        with patch('server.has_gradlew') as mock_has_gradlew:
+            assert index.names() == ["TestProject"]
+            mock_has_gradlew.assert_not_called()
+        
+        other = mock_server_paths["projects"] / "Another"
+        other.mkdir()
+        (other / "gradlew").write_text("#!/bin/sh\n")
+        # Make sure the directory mtime visibly changes
+        stat = mock_server_paths["projects"].stat()
+        os.utime(mock_server_paths["projects"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert index.names() == ["Another", "TestProject"]
+    
+    def test_concurrent_callers_share_one_scan(self, mock_server_paths, test_project):
+        """Test callers that all see the same change wait for a single scan."""
+        import os
+        import threading
+        import server
+        index = server.ProjectIndex(rescan_interval=60)
+        assert index.names() == ["TestProject"]
+        stat = mock_server_paths["projects"].stat()
+        os.utime(mock_server_paths["projects"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        
+        has_gradlew = server.has_gradlew
+        def slow_has_gradlew(path):
+            threading.Event().wait(0.2)
+            return has_gradlew(path)
+        
+        results = []
+        with patch('server.has_gradlew', side_effect=slow_has_gradlew) as mock_has_gradlew:
+            callers = [threading.Thread(target=lambda: results.append(index.names())) for _ in range(4)]
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join(10)
+            assert mock_has_gradlew.call_count == 1
+        assert results == [["TestProject"]] * 4
+    
+    def test_rescan_picks_up_new_gradlew(self, mock_server_paths, test_project):
+        """Test an explicit rescan finds changes the mtime check misses."""
+        import server
+        index = server.ProjectIndex(rescan_interval=60)
+        later = mock_server_paths["projects"] / "Later"
+        later.mkdir()
+        assert index.names() == ["TestProject"]
+        (later / "gradlew").write_text("#!/bin/sh\n")
+        assert index.rescan() == ["Later", "TestProject"]
+    
+    def test_interval_rescan_runs_in_background(self, mock_server_paths, test_project):
+        """Test once started, stale lists are rescanned by the thread and not by requests."""
+        import time
+        import server
+        index = server.ProjectIndex(rescan_interval=0.2)
+        assert index.names() == ["TestProject"]
+        later = mock_server_paths["projects"] / "Later"
+        later.mkdir()
+        index.projects()
+        (later / "gradlew").write_text("#!/bin/sh\n")
+        index.start()
+        try:
+            # The thread's first rescan is rescan_interval away
+            with patch.object(index, '_scan', wraps=index._scan) as mock_scan:
+                index._scanned_at = 0
+                assert index.names() == ["TestProject"]
+                mock_scan.assert_not_called()
+            deadline = time.monotonic() + 5
+            while index.names() != ["Later", "TestProject"] and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            index.stop()
+        assert index.names() == ["Later", "TestProject"]
+    
+    def test_unchanged_metadata_reused(self, mock_server_paths, test_project):
+        """Test metadata is only re-read for projects whose files changed."""
+        import server
+        index = server.ProjectIndex(rescan_interval=60)
+        index.names()
+        with patch('server.settings_modules') as mock_modules:
+            index.rescan()
+            mock_modules.assert_not_called()
+    
+    def test_project_details_include_last_build(self, mock_server_paths, test_project, temp_dir):
+        """Test details report the latest published artifact."""
+        import server
+        apk = temp_dir / "app.apk"
+        apk.write_bytes(b"apk")
+        with patch('server.PROJECT_INDEX', server.ProjectIndex(rescan_interval=60)), \
+             patch('server.ARTIFACT_STORE', server.ArtifactStore()) as store:
+            entry = store.publish("TestProject", apk, "debug")
+            details = server.project_details()
+        assert details["TestProject"]["last_build"]["build"] == entry["build"]
+        assert details["TestProject"]["last_build"]["build_type"] == "debug"
@@ -0,0 +1,134 @@
+"""Tests for the build scheduler."""
+import threading
+import pytest
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+
+def _wait_for(condition, timeout=5):
+    pause = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        pause.wait(0.01)
+    return condition()
+
+
+@pytest.mark.unit
+class TestBuildScheduler:
+    """Test bounded job scheduling."""
+    
+    def test_runs_immediately_when_slot_free(self, mock_server_paths):
+        """Test a job starts straight away below the limit."""
+        import server
+        scheduler = server.BuildScheduler(max_workers=2)
+        done = threading.Event()
+        job = scheduler.submit("TestProject", done.set)
+        assert job["state"] == "running"
+        assert done.wait(5)
+        assert _wait_for(lambda: scheduler.running_count() == 0)
+    
+    def test_queues_past_limit_with_priority(self, mock_server_paths):
+        """Test extra jobs queue, interactive ahead of batch."""
+        import server
+        scheduler = server.BuildScheduler(max_workers=1)
+        release = threading.Event()
+        order = []
+        scheduler.submit("Blocker", release.wait, (5,))
+        batch = scheduler.submit("Release", order.append, ("Release",), priority="batch")
+        interactive = scheduler.submit("Debug", order.append, ("Debug",), priority="interactive")
+        
+        assert batch["state"] == "queued"
+        assert scheduler.queued() == [interactive, batch]
+        assert server.load_status("Debug")["queue_position"] == 1
+        release_status = server.load_status("Release")
+        assert release_status["status"] == "queued"
+        assert release_status["queue_position"] == 2
+        
+        release.set()
+        assert _wait_for(lambda: len(order) == 2)
+        assert order == ["Debug", "Release"]
+        assert _wait_for(lambda: scheduler.running_count() == 0)
+    
+    def test_crashing_job_frees_slot(self, mock_server_paths):
+        """Test an exception in a job does not leak the worker slot."""
+        import server
+        scheduler = server.BuildScheduler(max_workers=1)
+        def boom():
+            raise RuntimeError("boom")
+        ran = threading.Event()
+        scheduler.submit("A", boom)
+        scheduler.submit("B", ran.set)
+        assert ran.wait(5)
+        assert _wait_for(lambda: scheduler.running_count() == 0)
+    
+    def test_default_concurrency_limited_by_memory(self):
+        """Test the default limit respects available memory."""
+        import server
+        with patch('server.os.cpu_count', return_value=32), \
+             patch('server.os.sysconf', side_effect=lambda name: 4096 if name == "SC_PAGE_SIZE" else 8 * 1024 * 256):
+            # 8 GB of RAM at 4 GB per build
+            assert server.default_build_concurrency(4096) == 2
+    
+    def test_default_concurrency_limited_by_cpu(self):
+        """Test the default limit is half the CPU count."""
+        import server
+        with patch('server.os.cpu_count', return_value=4), \
+             patch('server.os.sysconf', side_effect=ValueError):
+            assert server.default_build_concurrency(4096) == 2
+    
+    def test_start_build_reports_queue_position(self, mock_server_paths, test_project):
+        """Test POST /api/start-build answers with the queue position when full."""
+        import server
+        from http.server import SimpleHTTPRequestHandler
+        scheduler = server.BuildScheduler(max_workers=1)
+        release = threading.Event()
+        scheduler.submit("Blocker", release.wait, (5,))
+        
+        original_init = SimpleHTTPRequestHandler.__init__
+        SimpleHTTPRequestHandler.__init__ = lambda self, *args, **kwargs: None
+        try:
+            handler = server.Handler(MagicMock(), ("127.0.0.1", 8000), None)
+        finally:
+            SimpleHTTPRequestHandler.__init__ = original_init
+        handler.path = "/api/start-build"
+        json_data = b'{"project": "TestProject", "build_type": "release"}'
+        handler.headers = {"Content-Length": str(len(json_data))}
+        handler.rfile = BytesIO(json_data)
+        handler._send_json = MagicMock()
+        handler.log_message = MagicMock()
+        try:
+            with patch('server.BUILD_SCHEDULER', scheduler), patch('server.ACTIVE_BUILDS', {}) as active:
+                handler.do_POST()
+                handler._send_json.assert_called_once_with({"message": "Build queued", "queue_position": 1})
+                assert active["TestProject"]["priority"] == "batch"
+        finally:
+            release.set()
+            # Let the queued build finish while the test paths are still patched
+            assert _wait_for(lambda: scheduler.running_count() == 0)
+    
+    def test_running_job_not_reported_queued(self, mock_server_paths):
+        """Test a job popped while positions are published keeps its running status."""
+        import server
+        scheduler = server.BuildScheduler(max_workers=1)
+        release = threading.Event()
+        publishing = threading.Event()
+        write_status = server.write_status
+        scheduler.submit("Blocker", release.wait, (5,))
+        scheduler.submit("Next", write_status, ("Next", "building", 10))
+        
+        def slow_write_status(project_name, status, *args, **kwargs):
+            if project_name == "Next" and status == "queued" and not publishing.is_set():
+                # Let the blocker finish between listing and writing positions
+                publishing.set()
+                threading.Event().wait(0.3)
+            write_status(project_name, status, *args, **kwargs)
+        
+        with patch('server.write_status', side_effect=slow_write_status):
+            submitter = threading.Thread(target=scheduler.submit, args=("Later", lambda: None))
+            submitter.start()
+            assert publishing.wait(5)
+            release.set()
+            submitter.join(5)
+            assert _wait_for(lambda: scheduler.running_count() == 0)
+        assert server.load_status("Next")["status"] == "building"
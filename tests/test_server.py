@@ -0,0 +1,99 @@
+"""Tests for the pooled HTTP server."""
+import http.client
+import socket
+import socketserver
+import threading
+import pytest
+
+
+class _SlowHandler(socketserver.StreamRequestHandler):
+    """Answers 'slow' requests only once the test releases them."""
+
+    release = threading.Event()
+
+    def handle(self):
+        line = self.rfile.readline().strip()
+        if line == b"slow":
+            self.release.wait(5)
+        self.wfile.write(b"ok:" + line + b"\n")
+
+
+def _request(port, payload):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(payload + b"\n")
+        return sock.makefile("rb").read()
+
+
+@pytest.mark.unit
+class TestPooledHTTPServer:
+    """Test concurrent request serving."""
+
+    def _start(self, **kwargs):
+        import server
+        _SlowHandler.release = threading.Event()
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), _SlowHandler, **kwargs)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        return httpd
+
+    def _stop(self, httpd):
+        _SlowHandler.release.set()
+        httpd.shutdown()
+        httpd.server_close()
+
+    def test_slow_request_does_not_block_others(self):
+        """Test a long request leaves other workers free."""
+        httpd = self._start(workers=4, max_inflight=8)
+        port = httpd.server_address[1]
+        try:
+            results = []
+            slow = threading.Thread(target=lambda: results.append(_request(port, b"slow")))
+            slow.start()
+            assert _request(port, b"fast") == b"ok:fast\n"
+            assert not results
+            _SlowHandler.release.set()
+            slow.join(5)
+            assert results == [b"ok:slow\n"]
+        finally:
+            self._stop(httpd)
+
+    def test_rejects_when_inflight_limit_reached(self):
+        """Test requests past the in-flight limit get 503."""
+        httpd = self._start(workers=1, max_inflight=1)
+        port = httpd.server_address[1]
+        try:
+            slow = threading.Thread(target=_request, args=(port, b"slow"))
+            slow.start()
+            # Wait for the slow request to take the only slot
+            for _ in range(100):
+                if httpd.inflight._value == 0:
+                    break
+                threading.Event().wait(0.01)
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/")
+            response = conn.getresponse()
+            assert response.status == 503
+            assert response.getheader("Retry-After") == "1"
+            conn.close()
+        finally:
+            self._stop(httpd)
+            slow.join(5)
+
+    def test_request_timeout_applied(self):
+        """Test client sockets get the configured timeout."""
+        import server
+        seen = []
+
+        class TimeoutHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                seen.append(self.request.gettimeout())
+
+        httpd = server.PooledHTTPServer(("127.0.0.1", 0), TimeoutHandler, request_timeout=7)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            _request(httpd.server_address[1], b"x")
+            assert seen == [7]
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
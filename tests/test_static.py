@@ -0,0 +1,91 @@
+"""Tests for static dashboard assets."""
+import gzip
+import http.client
+import re
+import threading
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture
+def static_root(temp_dir):
+    root = temp_dir / "ui"
+    root.mkdir()
+    (root / "index.html").write_text(
+        '<link rel="stylesheet" href="styles.css">\n<script src="script.js"></script>\n'
+    )
+    (root / "script.js").write_text("console.log('dashboard');\n" * 50)
+    (root / "styles.css").write_text("body { color: red; }\n")
+    (root / "server.log").write_text("secret")
+    return root
+
+
+@pytest.mark.unit
+class TestStaticAssets:
+    """Test in-memory asset loading."""
+    
+    def test_index_uses_fingerprinted_urls(self, static_root):
+        """Test index.html references content-hashed asset URLs."""
+        import server
+        assets = server.StaticAssets(static_root)
+        page = assets.get("/")["body"].decode()
+        script_url = re.search(r'src="(/static/script\.[0-9a-f]{12}\.js)"', page).group(1)
+        assert re.search(r'href="/static/styles\.[0-9a-f]{12}\.css"', page)
+        script = assets.get(script_url)
+        assert script["cache_control"] == "public, max-age=31536000, immutable"
+        assert gzip.decompress(script["gzip"]) == script["body"]
+        assert assets.get("/index.html") is assets.get("/")
+    
+    def test_only_allowlisted_files(self, static_root):
+        """Test files outside the allowlist are not served."""
+        import server
+        assets = server.StaticAssets(static_root)
+        assert assets.get("/server.log") is None
+        assert assets.get("/device.json") is None
+        assert assets.get("/script.js")["cache_control"] == "no-cache"
+    
+    def test_repository_assets_load(self):
+        """Test the shipped dashboard files load."""
+        import server
+        assets = server.StaticAssets()
+        assert b"/static/script." in assets.get("/")["body"]
+
+
+@pytest.mark.unit
+class TestStaticRoutes:
+    """Test serving assets over HTTP."""
+    
+    @pytest.fixture
+    def port(self, static_root):
+        import server
+        with patch('server.STATIC_ASSETS', server.StaticAssets(static_root)):
+            httpd = server.PooledHTTPServer(("127.0.0.1", 0), server.Handler, workers=2)
+            thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+            thread.start()
+            yield httpd.server_address[1]
+            httpd.shutdown()
+            httpd.server_close()
+    
+    def _get(self, port, path, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+    
+    def test_gzip_and_revalidation(self, port):
+        """Test gzip negotiation and 304 on a matching ETag."""
+        response, body = self._get(port, "/", {"Accept-Encoding": "gzip, deflate"})
+        assert response.status == 200
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert b"/static/script." in gzip.decompress(body)
+        
+        response, body = self._get(port, "/", {"If-None-Match": response.getheader("ETag")})
+        assert response.status == 304
+        assert body == b""
+    
+    def test_unlisted_files_not_found(self, port):
+        """Test working-directory files are no longer exposed."""
+        assert self._get(port, "/server.log")[0].status == 404
+        assert self._get(port, "/server.py")[0].status == 404
@@ -87,3 +87,84 @@ class TestStatusManagement:
         data = json.loads(status_file.read_text())
         assert data["message"] == "Build complete"
         assert data["artifact"] == "/artifacts/TestProject/app.apk"
+    
+    def test_load_status_served_from_memory(self, mock_server_paths, test_status_dir):
+        """Test status is read from disk once and then kept in memory."""
+        import server
+        server.write_status("TestProject", "building", 40)
+        (test_status_dir / "TestProject.json").write_text("invalid json")
+        
+        result = server.load_status("TestProject")
+        assert result["status"] == "building"
+        assert result["progress"] == 40
+    
+    def test_write_status_bumps_version(self, mock_server_paths):
+        """Test every write advances the store version."""
+        import server
+        before = server.STATUS_STORE.version
+        server.write_status("TestProject", "building", 40)
+        server.write_status("TestProject", "done", 100)
+        assert server.STATUS_STORE.version == before + 2
+    
+    def test_status_snapshot(self, mock_server_paths):
+        """Test snapshot returns every requested project."""
+        import server
+        server.write_status("TestProject", "done", 100)
+        snapshot = server.STATUS_STORE.snapshot(["TestProject", "Other"])
+        assert snapshot["TestProject"]["status"] == "done"
+        assert snapshot["Other"] == {"status": "not_started", "progress": 0}
+    
+    def test_write_status_versions_per_project(self, mock_server_paths, test_status_dir):
+        """Test each project's version increases and is persisted."""
+        import server
+        server.write_status("TestProject", "building", 40)
+        server.write_status("TestProject", "done", 100)
+        server.write_status("Other", "building", 40)
+        assert server.load_status("TestProject")["version"] == 2
+        assert server.load_status("Other")["version"] == 1
+        data = json.loads((test_status_dir / "TestProject.json").read_text())
+        assert data["version"] == 2
+        assert not list(test_status_dir.glob(".*.tmp"))
+    
+    def test_version_continues_from_disk(self, mock_server_paths, test_status_dir):
+        """Test a fresh store picks up the version saved by a previous run."""
+        import server
+        (test_status_dir / "TestProject.json").write_text(
+            json.dumps({"project": "TestProject", "status": "done", "progress": 100, "version": 7})
+        )
+        store = server.StatusStore()
+        entry = store.put("TestProject", {"project": "TestProject", "status": "building", "progress": 40})
+        assert entry["version"] == 8
+    
+    def test_write_behind(self, mock_server_paths, test_status_dir):
+        """Test a started store defers disk writes until flushed."""
+        import server
+        store = server.StatusStore()
+        store.start(interval=60)
+        try:
+            store.put("TestProject", {"project": "TestProject", "status": "building", "progress": 40})
+            store.put("TestProject", {"project": "TestProject", "status": "done", "progress": 100})
+            assert store.get("TestProject")["status"] == "done"
+            assert not (test_status_dir / "TestProject.json").exists()
+        finally:
+            store.stop()
+        data = json.loads((test_status_dir / "TestProject.json").read_text())
+        assert data["status"] == "done"
+        assert data["version"] == 2
+    
+    def test_write_behind_flushes_periodically(self, mock_server_paths, test_status_dir):
+        """Test the background writer persists changes on its own."""
+        import time
+        import server
+        store = server.StatusStore()
+        store.start(interval=0.01)
+        try:
+            store.put("TestProject", {"project": "TestProject", "status": "building", "progress": 40})
+            status_file = test_status_dir / "TestProject.json"
+            for _ in range(200):
+                if status_file.exists():
+                    break
+                time.sleep(0.01)
+            assert json.loads(status_file.read_text())["status"] == "building"
+        finally:
+            store.stop()